@@ -10,16 +10,44 @@ Description:
     into Query Parameters for the API.
 
     Defined classes:
-    - Enums (Year, Commodity, Season, RegionLevel): Define fixed choice values,
+    - Enums (Year, Commodity, Season, RegionLevel, AgricultureMetric,
+      AgricultureDimension, Aggregation, ClimateVariable, PredictionFeature,
+      SimulationMethod): Define fixed choice values,
       providing dropdown functionality in Swagger UI and automatic input validation.
+    - StatisticsQuery: Base class with pagination ('skip', 'limit') and column
+      projection ('fields') shared by all statistics query classes below.
+    - YearRangeFilter, AgricultureFilter, ClimateFilter: Filter fields only,
+      reused by the query classes below.
     - AgricultureQuery: Groups filter parameters for the agriculture-data API.
-    - ClimateQuery: Groups filter parameters for the climate-data API.
+      List parameters (commodity, season, region_name) may be repeated
+      (e.g. ?commodity=rice&commodity=maize) and become SQL 'IN' clauses;
+      'year_from'/'year_to' become a 'BETWEEN' clause.
+    - ClimateQuery: Groups filter parameters for the climate-data API
+      (same conventions as AgricultureQuery).
     - SoilQuery: Groups filter parameters for the soil-data API.
-    - PredictionInput: Defines the 21 input features for the prediction API.
+    - ProvinceQuery: Groups parameters for the provinces API.
+    - AgricultureSummaryQuery: Groups parameters for the agriculture-summary
+      analytics API (filters + group_by, metric, agg).
+    - ClimateAnomalyQuery: Groups parameters for the climate-anomalies
+      analytics API (climate filters + variable).
+    - ClimateNormalQuery: Groups parameters for the climate-normals analytics API
+      (province_name, variable).
+    - ForecastQuery: Groups parameters for the analytics/forecasts API
+      (series filters + forecast year range, which may go beyond 2024).
+    - RegionMapQuery: Groups parameters for the geo/region-columns API
+      (year, metric, commodity).
+    - GeoProvinceQuery: Groups parameters for the geo/provinces API
+      (point lookup, viewport 'bbox' lookup, k-nearest search).
+    - PredictionInput: Defines the 21 input features for the prediction API
+      (missing climate features are filled from the province's climate normals).
     - PredictionOutput: Defines the JSON response structure of the prediction API.
+    - SweepAxis, PredictionSweepInput, PredictionSweepOutput: Request and response
+      of the prediction sweep API (a base input + 1-2 features to vary).
+    - PredictionSimulationInput, PredictionSimulationOutput: Request and response
+      of the Monte Carlo simulation API (quantiles under climate uncertainty).
 """
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field, model_validator
+from typing import Dict, List, Optional
 from enum import Enum
 
 # --- 1. ENUMS (FIXED CHOICE VALUES) (Support for Swagger UI display) ---
@@ -61,6 +89,7 @@ class Commodity(str, Enum):
     cassava = "cassava"
     sweet_potato = "sweet_potato"
     sugarcane = "sugarcane"
+    groundnut = "groundnut"
 
 class Season(str, Enum):
     annual = "annual"
@@ -73,31 +102,219 @@ class RegionLevel(str, Enum):
     region = "region"
     country = "country"
 
+class AgricultureMetric(str, Enum):
+    production_thousand_tonnes = "production_thousand_tonnes"
+    area_thousand_ha = "area_thousand_ha"
+    yield_ta_per_ha = "yield_ta_per_ha"
+
+class AgricultureDimension(str, Enum):
+    year = "year"
+    commodity = "commodity"
+    season = "season"
+    region_level = "region_level"
+    region_name = "region_name"
+
+class Aggregation(str, Enum):
+    sum = "sum"
+    mean = "mean"
+    min = "min"
+    max = "max"
+    count = "count"
+
+class ClimateVariable(str, Enum):
+    avg_temperature = "avg_temperature"
+    min_temperature = "min_temperature"
+    max_temperature = "max_temperature"
+    surface_temperature = "surface_temperature"
+    wet_bulb_temperature = "wet_bulb_temperature"
+    precipitation = "precipitation"
+    solar_radiation = "solar_radiation"
+    relative_humidity = "relative_humidity"
+    wind_speed = "wind_speed"
+    surface_pressure = "surface_pressure"
+
+class PredictionFeature(str, Enum):
+    """Numeric features of PredictionInput that a sweep can vary."""
+    year = "year"
+    avg_temperature = "avg_temperature"
+    min_temperature = "min_temperature"
+    max_temperature = "max_temperature"
+    surface_temperature = "surface_temperature"
+    wet_bulb_temperature = "wet_bulb_temperature"
+    precipitation = "precipitation"
+    solar_radiation = "solar_radiation"
+    relative_humidity = "relative_humidity"
+    wind_speed = "wind_speed"
+    surface_pressure = "surface_pressure"
+    surface_elevation = "surface_elevation"
+    avg_ndvi = "avg_ndvi"
+    soil_ph_level = "soil_ph_level"
+    soil_organic_carbon = "soil_organic_carbon"
+    soil_nitrogen_content = "soil_nitrogen_content"
+    soil_sand_ratio = "soil_sand_ratio"
+    soil_clay_ratio = "soil_clay_ratio"
+
+class SimulationMethod(str, Enum):
+    """How climate scenarios are drawn from a province's history."""
+    bootstrap = "bootstrap" # Moving-block bootstrap of the historical years
+    normal = "normal" # Fitted multivariate normal
+
 # --- 2. QUERY PARAMETER CLASSES ---
-class AgricultureQuery(BaseModel):
+# These classes are used as FastAPI "Query parameter models":
+#   query_params: Annotated[AgricultureQuery, Query()]
+# (required for list fields such as ?commodity=rice&commodity=maize).
+class StatisticsQuery(BaseModel):
     """
-    Groups filter parameters (query params) for the /agriculture-data API.
-    FastAPI will automatically handle Depends() for this class.
+    Parameters shared by all statistics endpoints:
+    pagination ('skip', 'limit') and column projection ('fields',
+    e.g. ?fields=year,region_name or ?fields=year&fields=region_name).
+    """
+    skip: int = 0 # Skip first 'skip' records
+    limit: Optional[int] = 1000 # Retrieve maximum 'limit' records (default is 1000)
+    fields: Optional[List[str]] = None
+
+class YearRangeFilter(BaseModel):
+    """
+    Base class for filters supporting a single 'year' and/or a
+    'year_from'/'year_to' range (both bounds inclusive, each optional).
     """
     year: Optional[Year] = None
-    commodity: Optional[Commodity] = None
-    season: Optional[Season] = None
+    year_from: Optional[Year] = None
+    year_to: Optional[Year] = None
+
+    @model_validator(mode="after")
+    def check_year_range(self):
+        if self.year_from is not None and self.year_to is not None and self.year_from > self.year_to:
+            raise ValueError("'year_from' must be less than or equal to 'year_to'")
+        return self
+
+class AgricultureFilter(YearRangeFilter):
+    """
+    Filter parameters for agriculture data (shared by /agriculture-data and /analytics).
+    """
+    commodity: Optional[List[Commodity]] = None
+    season: Optional[List[Season]] = None
     region_level: Optional[RegionLevel] = None
-    region_name: Optional[str] = None
+    region_name: Optional[List[str]] = None
+
+class ClimateFilter(YearRangeFilter):
+    """
+    Filter parameters for climate data.
+    """
+    province_name: Optional[List[str]] = None
+
+class AgricultureQuery(StatisticsQuery, AgricultureFilter):
+    """
+    Groups filter parameters (query params) for the /agriculture-data API.
+    """
 
-class ClimateQuery(BaseModel):
+class ClimateQuery(StatisticsQuery, ClimateFilter):
     """
     Groups filter parameters (query params) for the /climate-data API.
     """
-    year: Optional[Year] = None
-    province_name: Optional[str] = None
 
-class SoilQuery(BaseModel):
+class SoilQuery(StatisticsQuery):
     """
     Groups filter parameters (query params) for the /soil-data API.
     """
     province_name: Optional[str] = None
 
+class ProvinceQuery(StatisticsQuery):
+    """
+    Groups parameters (query params) for the /provinces API.
+    """
+    limit: Optional[int] = 100
+
+class AgricultureSummaryQuery(AgricultureFilter):
+    """
+    Groups parameters (query params) for the /analytics/agriculture-summary API:
+    the same filters as /agriculture-data, plus the GROUP BY dimensions,
+    the metric and the aggregate function.
+    """
+    group_by: List[AgricultureDimension] = [AgricultureDimension.year]
+    metric: AgricultureMetric = AgricultureMetric.production_thousand_tonnes
+    agg: Aggregation = Aggregation.sum
+
+class ClimateAnomalyQuery(StatisticsQuery, ClimateFilter):
+    """
+    Groups parameters (query params) for the /analytics/climate-anomalies API:
+    the same filters as /climate-data, plus the climate variable(s) to return.
+    """
+    variable: Optional[List[ClimateVariable]] = None
+
+class ClimateNormalQuery(StatisticsQuery):
+    """
+    Groups parameters (query params) for the /analytics/climate-normals API.
+    """
+    province_name: Optional[List[str]] = None
+    variable: Optional[List[ClimateVariable]] = None
+
+class ForecastQuery(StatisticsQuery):
+    """
+    Groups parameters (query params) for the /analytics/forecasts API.
+    'year_from'/'year_to' are plain integers: forecast years start after the
+    last year of the dataset and go up to FORECAST_HORIZON (2050 by default).
+    """
+    commodity: Optional[List[Commodity]] = None
+    season: Optional[List[Season]] = None
+    region_level: Optional[RegionLevel] = None
+    region_name: Optional[List[str]] = None
+    metric: Optional[List[AgricultureMetric]] = None
+    year_from: Optional[int] = None
+    year_to: Optional[int] = None
+
+    @model_validator(mode="after")
+    def check_year_range(self):
+        if self.year_from is not None and self.year_to is not None and self.year_from > self.year_to:
+            raise ValueError("'year_from' must be less than or equal to 'year_to'")
+        return self
+
+class RegionMapQuery(BaseModel):
+    """
+    Groups parameters (query params) for the /geo/region-columns API.
+    All commodities are returned when 'commodity' is omitted.
+    """
+    year: Year = Year.Y2024
+    metric: AgricultureMetric = AgricultureMetric.production_thousand_tonnes
+    commodity: Optional[List[Commodity]] = None
+
+class GeoProvinceQuery(BaseModel):
+    """
+    Groups parameters (query params) for the /geo/provinces API. Exactly one mode:
+    - ?lat=&lon=        : Provinces whose bounding box contains the point.
+    - ?lat=&lon=&k=     : The 'k' provinces whose center is nearest to the point.
+    - ?bbox=min_lon,min_lat,max_lon,max_lat : Provinces intersecting the viewport.
+    """
+    lat: Optional[float] = Field(default=None, ge=-90, le=90)
+    lon: Optional[float] = Field(default=None, ge=-180, le=180)
+    k: Optional[int] = Field(default=None, ge=1, le=100)
+    bbox: Optional[str] = None
+
+    @model_validator(mode="after")
+    def check_mode(self):
+        has_point = self.lat is not None and self.lon is not None
+        if (self.lat is None) != (self.lon is None):
+            raise ValueError("'lat' and 'lon' must be given together")
+        if has_point == (self.bbox is not None):
+            raise ValueError("Give either 'lat'/'lon' or 'bbox'")
+        if self.k is not None and not has_point:
+            raise ValueError("'k' requires 'lat' and 'lon'")
+        if self.bbox is not None:
+            bounds = self.bbox_bounds()
+            if bounds[0] > bounds[2] or bounds[1] > bounds[3]:
+                raise ValueError("'bbox' must be 'min_lon,min_lat,max_lon,max_lat'")
+        return self
+
+    def bbox_bounds(self) -> tuple:
+        """Parse 'bbox' into (min_lon, min_lat, max_lon, max_lat)."""
+        try:
+            bounds = tuple(float(value) for value in self.bbox.split(","))
+        except ValueError:
+            bounds = ()
+        if len(bounds) != 4:
+            raise ValueError("'bbox' must be 4 comma-separated numbers: min_lon,min_lat,max_lon,max_lat")
+        return bounds
+
 class PredictionInput(BaseModel):
     """
     Defines the structure (schema) of the 21 input features
@@ -108,17 +325,17 @@ class PredictionInput(BaseModel):
     commodity: str
     season: str
     
-    # 10 climate factors
-    avg_temperature: Optional[float] = 0.0
-    min_temperature: Optional[float] = 0.0
-    max_temperature: Optional[float] = 0.0
-    surface_temperature: Optional[float] = 0.0
-    wet_bulb_temperature: Optional[float] = 0.0
-    precipitation: Optional[float] = 0.0
-    solar_radiation: Optional[float] = 0.0
-    relative_humidity: Optional[float] = 0.0
-    wind_speed: Optional[float] = 0.0
-    surface_pressure: Optional[float] = 0.0
+    # 10 climate factors (omitted or null: filled from the province's climate normals)
+    avg_temperature: Optional[float] = None
+    min_temperature: Optional[float] = None
+    max_temperature: Optional[float] = None
+    surface_temperature: Optional[float] = None
+    wet_bulb_temperature: Optional[float] = None
+    precipitation: Optional[float] = None
+    solar_radiation: Optional[float] = None
+    relative_humidity: Optional[float] = None
+    wind_speed: Optional[float] = None
+    surface_pressure: Optional[float] = None
     
     # 7 soil factors
     surface_elevation: Optional[float] = 0.0
@@ -136,4 +353,75 @@ class PredictionOutput(BaseModel):
     """
     predicted_production: float
     predicted_area: float
-    predicted_yield: float
\ No newline at end of file
+    predicted_yield: float
+    # Climate features missing from the input, with the normal used to fill them
+    imputed_features: Dict[str, float] = {}
+
+class SweepAxis(BaseModel):
+    """One varied feature of a sweep: 'steps' evenly spaced values from 'start' to 'stop' (inclusive)."""
+    feature: PredictionFeature
+    start: float
+    stop: float
+    steps: int = Field(default=21, ge=2, le=100)
+
+class PredictionSweepInput(BaseModel):
+    """
+    Defines the JSON body of the /predict/sweep API: a base input
+    and 1 or 2 features to vary (the grid has at most 100 x 100 points).
+    """
+    base: PredictionInput
+    axes: List[SweepAxis] = Field(min_length=1, max_length=2)
+
+    @model_validator(mode="after")
+    def check_axes(self):
+        if len({axis.feature for axis in self.axes}) != len(self.axes):
+            raise ValueError("The varied features must be different")
+        return self
+
+class SweepAxisValues(BaseModel):
+    feature: str
+    values: List[float]
+
+class PredictionSweepOutput(BaseModel):
+    """
+    Defines the JSON response structure of the /predict/sweep API.
+    Predictions are flattened in row-major order over 'shape' (one entry per axis).
+    """
+    axes: List[SweepAxisValues]
+    shape: List[int]
+    predicted_production: List[float]
+    predicted_area: List[float]
+    predicted_yield: List[float]
+    imputed_features: Dict[str, float] = {}
+
+class PredictionSimulationInput(BaseModel):
+    """
+    Defines the JSON body of the /predict/simulate API. Climate features given
+    in 'base' are held fixed; the missing ones are drawn from the province's
+    historical climate ('draws' scenarios, reproducible with 'seed').
+    """
+    base: PredictionInput
+    draws: int = Field(default=10000, ge=100, le=100000)
+    method: SimulationMethod = SimulationMethod.bootstrap
+    block_size: int = Field(default=3, ge=1, le=10) # Years per block ('bootstrap' only)
+    seed: int = 0
+
+class SimulationSummary(BaseModel):
+    p10: float
+    p50: float
+    p90: float
+    mean: float
+    std: float
+
+class PredictionSimulationOutput(BaseModel):
+    """
+    Defines the JSON response structure of the /predict/simulate API:
+    the distribution of each prediction over the simulated climate scenarios.
+    """
+    draws: int
+    method: str
+    seed: int
+    simulated_features: List[str]
+    predicted_production: SimulationSummary
+    predicted_area: SimulationSummary
+    predicted_yield: SimulationSummary
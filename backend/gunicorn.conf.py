@@ -0,0 +1,58 @@
+"""
+File: backend/gunicorn.conf.py
+Description:
+    Gunicorn configuration for the multi-worker serving mode:
+        gunicorn -c gunicorn.conf.py main:app
+
+    - Runs WEB_CONCURRENCY Uvicorn workers (default: one per CPU core).
+    - The app is imported once in the master process ('preload_app'), then forked.
+    - Before the workers are forked, the 'when_ready' hook loads the dataset
+      snapshot (the in-memory read store, see utils/column_store.py) ONCE and
+      publishes it as memory-mapped '.npy' files under SHARED_STORE_DIR.
+      Every worker maps the same files, so RSS does not grow with the number of workers.
+    - The same hook loads the current prediction model (see utils/prediction_model.py):
+      its arrays are memory-mapped read-only, so the forked workers share its pages too
+      (a model published later is mapped by each worker from the same files).
+
+    The single-process mode ('uvicorn main:app') is unchanged.
+
+    Configuration (environment variables):
+    - PORT: Port to bind (default 8000).
+    - WEB_CONCURRENCY: Number of workers (default: number of CPU cores).
+    - SHARED_STORE_DIR: Shared snapshot directory (default '/dev/shm/vietnam-agriculture').
+"""
+import multiprocessing
+import os
+
+# Must be set before the app is imported: multi-worker mode always serves from the shared read store
+os.environ.setdefault("READ_STORE", "1")
+os.environ.setdefault("SHARED_STORE_DIR", "/dev/shm/vietnam-agriculture")
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+workers = int(os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+worker_class = "uvicorn_worker.UvicornWorker"
+preload_app = True
+
+
+def when_ready(server):
+    """Load the dataset snapshot once in the master process, before any worker is forked."""
+    from sqlmodel import Session
+
+    from main import table_queries
+    from utils.column_store import get_read_store
+    from utils.connect_database import engine, get_db_and_tables
+    from utils.dataset_version import get_dataset_version
+    from utils.prediction_model import get_prediction_model
+
+    get_db_and_tables()
+    with Session(engine) as session:
+        version = get_dataset_version()
+        get_read_store(session, version, table_queries())
+    server.log.info(f"Published shared dataset snapshot {version} to {os.environ['SHARED_STORE_DIR']}")
+
+    model = get_prediction_model()
+    if model is not None:
+        server.log.info(f"Loaded prediction model {model.version} (memory-mapped, shared by the workers)")
+
+    # Workers must not inherit the master's open database connections
+    engine.dispose()
@@ -8,21 +8,48 @@ Description:
     3. Defining all API endpoints (routes) that the Frontend will call:
         - GET /: Welcome page.
         - GET /db-test: Database connection verification.
+        - GET /debug/slow-queries: Most expensive query shapes (with EXPLAIN plans; only with SLOW_QUERY_ENDPOINT=1).
+        - GET /debug/coalescing: Counters of coalesced (single-flight) requests.
         - GET /api/v1/statistics/provinces: Retrieve list of provinces.
         - GET /api/v1/statistics/agriculture-data: Retrieve agricultural data (with filtering).
         - GET /api/v1/statistics/climate-data: Retrieve climate data (with JOIN).
         - GET /api/v1/statistics/soil-data: Retrieve soil data (with JOIN).
-        - POST /api/v1/predict: Accept 21 features and return predictions (currently using mock logic).
+        - GET /api/v1/geo/provinces: Point-in-bbox, viewport and k-nearest province lookups (spatial index).
+        - GET /api/v1/geo/region-columns: Ready-to-render columns of the 3D region map (precomputed).
+        - GET /api/v1/version: Current dataset revision (and model version), used to key client caches.
+        - GET /api/v1/bundle: All four datasets in one response (column arrays, served from memory).
+        - GET /api/v1/analytics/agriculture-summary: Grouped aggregates of agricultural data (SQL or DuckDB engine).
+        - GET /api/v1/analytics/climate-anomalies: Precomputed climate baselines, z-scores and rolling statistics.
+        - GET /api/v1/analytics/climate-normals: Precomputed per-province climate normals (mean, median, percentiles, recent mean).
+        - GET /api/v1/analytics/forecasts: Precomputed trend forecasts (with intervals) of every agricultural series up to 2050.
+        - POST /api/v1/predict: Accept 21 features and return predictions (trained model, mock logic until one is trained).
+        - POST /api/v1/predict/sweep: Response surface over a grid of 1-2 varied features (one vectorized call).
+        - POST /api/v1/predict/simulate: P10/P50/P90 of the predictions over simulated climate scenarios (Monte Carlo).
 """
-from fastapi import FastAPI, Depends
-from utils.connect_database import get_session, get_db_and_tables
-from sqlmodel import Session, select
+from fastapi import FastAPI, Depends, HTTPException, Query, Request, Response
+from utils.connect_database import engine, get_session, get_db_and_tables
+from utils.query_profiler import get_top_queries, SLOW_QUERY_ENDPOINT, SLOW_QUERY_THRESHOLD_MS, SLOW_QUERY_TOP_N
+from utils.serialization import schema_columns, project_columns, encode_rows
+from utils.compression import CompressionMiddleware
+from utils.dataset_version import get_dataset_version
+from utils.bundle import get_bundle
+from utils.column_store import READ_STORE_ENABLED, get_read_store, read_rows
+from utils.single_flight import coalesce, single_flight
+from utils.spatial_index import get_spatial_index
+from utils.map_layer import scale_elevations
+from utils.analytics_engine import CLIMATE_FEATURES, get_analytics_engine
+from utils.climate_statistics import CLIMATE_FILL_STATISTIC, get_climate_history, get_climate_normals, sample_climate
+from utils.prediction_model import read_latest_version, score
+from sqlmodel import Session, func, select
 
 from typing import Annotated, List, Optional
+import numpy as np
+import orjson
+import pandas as pd
 
-from model import AgricultureData, ClimateData, Province, SoilData
-from schemas import AgricultureDataRead, ClimateDataRead, ProvinceRead, SoilDataRead
-from dependencies import AgricultureQuery, ClimateQuery, SoilQuery, PredictionInput, PredictionOutput
+from model import AgricultureData, AgricultureForecast, ClimateAnomaly, ClimateData, ClimateNormal, Province, RegionMapLayer, SoilData
+from schemas import AgricultureDataRead, AgricultureForecastRead, ClimateAnomalyRead, ClimateDataRead, ClimateNormalRead, ProvinceGeoRead, ProvinceRead, RegionMapColumnRead, SoilDataRead
+from dependencies import AgricultureQuery, ClimateQuery, SoilQuery, ProvinceQuery, AgricultureSummaryQuery, ClimateAnomalyQuery, ClimateNormalQuery, ForecastQuery, GeoProvinceQuery, RegionMapQuery, PredictionInput, PredictionOutput, PredictionSweepInput, PredictionSweepOutput, PredictionSimulationInput, PredictionSimulationOutput
 
 # --- 1. APPLICATION INITIALIZATION ---
 app = FastAPI(
@@ -31,11 +58,21 @@ app = FastAPI(
     version="1.0.0"
 )
 
+# Negotiated zstd/br/gzip compression for large responses (see utils/compression.py)
+app.add_middleware(CompressionMiddleware)
+
 # --- 2. STARTUP EVENT CONFIGURATION ---
 @app.on_event("startup")
 def start_up():
-    """Invoke create_db_and_tables to initialize database and tables on startup event."""
+    """
+    Invoke create_db_and_tables to initialize database and tables on startup event,
+    then build the province spatial index (and the in-memory read store if READ_STORE is enabled).
+    """
     get_db_and_tables()
+    with Session(engine) as session:
+        spatial_index(session)
+        if READ_STORE_ENABLED:
+            get_read_store(session, get_dataset_version(), table_queries())
 
 # --- 3. BASIC API ENDPOINTS ---
 @app.get("/")
@@ -54,127 +91,557 @@ def get_db_connection(session: Session = Depends(get_session)):
         
     except Exception as e:
         return {"status": "error", "message": "Database connection failed.", "error_details": str(e)}
+
+@app.get("/debug/slow-queries")
+def get_slow_queries(limit: int = SLOW_QUERY_TOP_N):
+    """
+    Endpoint to inspect the most expensive query shapes (by total time).
+    Shapes that exceeded the slow-query threshold include their EXPLAIN plan.
+    Disabled (404) unless SLOW_QUERY_ENDPOINT=1.
+    """
+    if not SLOW_QUERY_ENDPOINT:
+        raise HTTPException(status_code=404, detail="Not Found")
+    return {
+        "threshold_ms": SLOW_QUERY_THRESHOLD_MS,
+        "queries": get_top_queries(limit)
+    }
     
+@app.get("/debug/coalescing")
+def get_coalescing_stats():
+    """
+    Endpoint to inspect request coalescing: per route, how many requests ran
+    their query ('executed') and how many reused an in-flight one ('coalesced').
+    """
+    return single_flight.get_stats()
+
 # --- 4. DATA RETRIEVAL API ENDPOINTS ---
-@app.get("/api/v1/statistics/agriculture-data", response_model=list[AgricultureDataRead])
-def get_agriculture_data(*, session: Annotated[Session, Depends(get_session)],
-                         # Pagination parameters
-                         skip: int = 0, # Skip first 'skip' records
-                         limit: Optional[int] = 1000, # Retrieve maximum 'limit' records (default is 1000)
-                         query_params: AgricultureQuery = Depends()):
+# Columns selected by the statistics endpoints, derived from the Read schemas (API contract).
+# Rows are fetched as plain tuples and encoded directly to JSON (see utils/serialization.py).
+# With READ_STORE=1 the same rows are read from memory instead (see utils/column_store.py).
+AGRICULTURE_COLUMNS = schema_columns(AgricultureDataRead, AgricultureData)
+CLIMATE_COLUMNS = schema_columns(ClimateDataRead, ClimateData, {"province_name": Province.province_name})
+SOIL_COLUMNS = schema_columns(SoilDataRead, SoilData, {"province_name": Province.province_name})
+PROVINCE_COLUMNS = schema_columns(ProvinceRead, Province)
+
+def table_queries() -> dict:
+    """Full-table queries (ordered by id) used by the bundle and the read store: {table_name -> (columns, select_query)}."""
+    return {
+        "agriculture": (AGRICULTURE_COLUMNS.keys(),
+                        select(*AGRICULTURE_COLUMNS.values()).order_by(AgricultureData.id)),
+        "provinces": (PROVINCE_COLUMNS.keys(),
+                      select(*PROVINCE_COLUMNS.values()).order_by(Province.id)),
+        "climate": (CLIMATE_COLUMNS.keys(),
+                    select(*CLIMATE_COLUMNS.values()).select_from(ClimateData)
+                    .join(Province, ClimateData.province_id == Province.id).order_by(ClimateData.id)),
+        "soil": (SOIL_COLUMNS.keys(),
+                 select(*SOIL_COLUMNS.values()).select_from(SoilData)
+                 .join(Province, SoilData.province_id == Province.id).order_by(SoilData.id)),
+    }
+
+def read_store_rows(session: Session, table_name: str, columns: dict, query_params) -> tuple:
+    """Answer a statistics query from the in-memory read store (see utils/column_store.py): (rows, total)."""
+    store = get_read_store(session, get_dataset_version(), table_queries())
+    rows, total = read_rows(store[table_name], columns.keys(), query_params)
+    # Same contract as paginate(): the total is only returned with the first page
+    return rows, (total if not query_params.skip else None)
+
+def paginate(session: Session, query, query_params) -> tuple:
     """
-    API endpoint for retrieving agricultural data with filtering and pagination support.
+    Run one page ('skip'/'limit') of a filtered query (which must have a deterministic ORDER BY,
+    since clients request the pages concurrently).
+
+    Returns:
+        tuple: (rows, total) - 'total' counts ALL rows matching the filters. It is only
+               computed for the first page (skip == 0), the one clients read it from; None otherwise.
     """
-    query = select(AgricultureData)
+    total = None
+    if not query_params.skip:
+        total = session.exec(select(func.count()).select_from(query.order_by(None).subquery())).one()
+    rows = session.exec(query.offset(query_params.skip).limit(query_params.limit)).all()
+    return rows, total
+
+def coalesced_rows_response(route: str, columns: dict, query_params, fetch_rows) -> Response:
+    """
+    Encode the rows returned by 'fetch_rows()' -> (rows, total) as a JSON Response.
+    The number of rows matching the filters (all pages) is returned in the
+    X-Total-Count header of the first page, so clients can request every other page at once.
+    Identical concurrent requests (same route, parameters and dataset version)
+    share one call to 'fetch_rows()' (see utils/single_flight.py).
+    """
+    params = query_params.model_dump(mode="json", exclude={"fields"})
+    params["fields"] = list(columns)
+
+    def encode_page():
+        rows, total = fetch_rows()
+        return encode_rows(columns.keys(), rows), total
+
+    content, total = coalesce(route, params, get_dataset_version(), encode_page)
+    headers = {} if total is None else {"X-Total-Count": str(total)}
+    return Response(content=content, media_type="application/json", headers=headers)
+
+def spatial_index(session: Session):
+    """Return the province spatial index for the current dataset version."""
+    columns, query = table_queries()["provinces"]
+    return get_spatial_index(session, get_dataset_version(), columns, query)
+
+def apply_year_filters(query, year_column, query_params):
+    """Add 'year' (=) and 'year_from'/'year_to' (BETWEEN, >=, <=) conditions to a query."""
     if query_params.year:
-        query = query.where(AgricultureData.year == query_params.year)
+        query = query.where(year_column == query_params.year)
+    if query_params.year_from and query_params.year_to:
+        query = query.where(year_column.between(query_params.year_from, query_params.year_to))
+    elif query_params.year_from:
+        query = query.where(year_column >= query_params.year_from)
+    elif query_params.year_to:
+        query = query.where(year_column <= query_params.year_to)
+    return query
+
+def apply_agriculture_filters(query, query_params: AgricultureQuery):
+    """Translate an AgricultureQuery into WHERE clauses (lists become IN clauses)."""
+    query = apply_year_filters(query, AgricultureData.year, query_params)
     if query_params.commodity:
-        query = query.where(AgricultureData.commodity == query_params.commodity)
+        query = query.where(AgricultureData.commodity.in_(query_params.commodity))
     if query_params.season:
-        query = query.where(AgricultureData.season == query_params.season)
+        query = query.where(AgricultureData.season.in_(query_params.season))
     if query_params.region_name:
-        query = query.where(AgricultureData.region_name == query_params.region_name)
+        query = query.where(AgricultureData.region_name.in_(query_params.region_name))
     if query_params.region_level:
         query = query.where(AgricultureData.region_level == query_params.region_level)
-    agriculture_data = session.exec(query.offset(skip).limit(limit)).all()
-    return agriculture_data
+    return query
+
+def apply_climate_filters(query, query_params: ClimateQuery):
+    """Translate a ClimateQuery into WHERE clauses (the query must JOIN Province)."""
+    query = apply_year_filters(query, ClimateData.year, query_params)
+    if query_params.province_name:
+        query = query.where(Province.province_name.in_(query_params.province_name))
+    return query
+
+@app.get("/api/v1/statistics/agriculture-data", response_model=list[AgricultureDataRead])
+def get_agriculture_data(*, session: Annotated[Session, Depends(get_session)],
+                         # Filters, pagination (skip/limit) and column projection (fields)
+                         query_params: Annotated[AgricultureQuery, Query()]):
+    """
+    API endpoint for retrieving agricultural data with filtering and pagination support.
+    Only the columns listed in 'fields' are selected (all columns if omitted).
+    """
+    columns = project_columns(AGRICULTURE_COLUMNS, query_params.fields)
+
+    def fetch_rows():
+        if READ_STORE_ENABLED:
+            return read_store_rows(session, "agriculture", columns, query_params)
+        query = apply_agriculture_filters(select(*columns.values()), query_params)
+        return paginate(session, query.order_by(AgricultureData.id), query_params)
+
+    return coalesced_rows_response("agriculture-data", columns, query_params, fetch_rows)
     
 @app.get("/api/v1/statistics/climate-data", response_model=list[ClimateDataRead])
 def get_climate_data(*, session: Annotated[Session, Depends(get_session)],
-                       # Pagination parameters
-                       skip: int = 0,
-                       limit: Optional[int] = 1000,
-                       query_params: ClimateQuery = Depends()):
+                       # Filters, pagination (skip/limit) and column projection (fields)
+                       query_params: Annotated[ClimateQuery, Query()]):
     """
     API endpoint for retrieving climate data.
     Automatically performs JOIN with Province table to retrieve 'province_name'.
+    Only the columns listed in 'fields' are selected (all columns if omitted).
     """
-    query = select(ClimateData, Province).join(Province, ClimateData.province_id == Province.id)
+    columns = project_columns(CLIMATE_COLUMNS, query_params.fields)
 
-    if query_params.year:
-        query = query.where(ClimateData.year == query_params.year)
-    
-    if query_params.province_name:
-        query = query.where(Province.province_name == query_params.province_name)
-        
-    query = query.offset(skip).limit(limit)
-    
-    # results_from_db is a list of tuples: [(climate1, province1), (climate2, province2), ...]
-    results_from_db = session.exec(query).all()
-    
-    response = []
-    for climate, province in results_from_db:
-        data = climate.model_dump() 
-        data['province_name'] = province.province_name 
-        response.append(data)
-    
-    return response
+    def fetch_rows():
+        if READ_STORE_ENABLED:
+            return read_store_rows(session, "climate", columns, query_params)
+        query = select(*columns.values()).select_from(ClimateData).join(Province, ClimateData.province_id == Province.id)
+        query = apply_climate_filters(query, query_params)
+
+        # rows is a list of plain tuples, already including 'province_name' from the JOIN
+        return paginate(session, query.order_by(ClimateData.id), query_params)
+
+    return coalesced_rows_response("climate-data", columns, query_params, fetch_rows)
 
 @app.get("/api/v1/statistics/soil-data", response_model=List[SoilDataRead])
 def get_soil_data(*, session: Annotated[Session, Depends(get_session)],
-                  # Pagination parameters
-                  skip: int = 0,
-                  limit: Optional[int] = 1000,
-                  query_params: SoilQuery = Depends()):
+                  # Filters, pagination (skip/limit) and column projection (fields)
+                  query_params: Annotated[SoilQuery, Query()]):
     """
     API endpoint for retrieving detailed soil data for each province.
     Automatically performs JOIN with Province table to retrieve 'province_name'.
+    Only the columns listed in 'fields' are selected (all columns if omitted).
     """
-    query = select(SoilData, Province).join(Province, SoilData.province_id == Province.id)
+    columns = project_columns(SOIL_COLUMNS, query_params.fields)
 
-    if query_params.province_name:
-        query = query.where(Province.province_name == query_params.province_name)
-        
-    query = query.offset(skip).limit(limit)
+    def fetch_rows():
+        if READ_STORE_ENABLED:
+            return read_store_rows(session, "soil", columns, query_params)
+        query = select(*columns.values()).select_from(SoilData).join(Province, SoilData.province_id == Province.id)
 
-    # results_from_db is a list of tuples: [(soil1, province1), (soil2, province2), ...]
-    results_from_db = session.exec(query).all()
-    
-    response = []
-    for soil, province in results_from_db:
-        data = soil.model_dump()
-        data['province_name'] = province.province_name 
-        response.append(data)
-    
-    return response
+        if query_params.province_name:
+            query = query.where(Province.province_name == query_params.province_name)
+
+        # rows is a list of plain tuples, already including 'province_name' from the JOIN
+        return paginate(session, query.order_by(SoilData.id), query_params)
+
+    return coalesced_rows_response("soil-data", columns, query_params, fetch_rows)
 
 @app.get("/api/v1/statistics/provinces", response_model=List[ProvinceRead])
 def get_provinces(*, session: Annotated[Session, Depends(get_session)],
-                  # Pagination parameters
-                  skip: int = 0,
-                  limit: Optional[int] = 100):
+                  # Pagination (skip/limit) and column projection (fields)
+                  query_params: Annotated[ProvinceQuery, Query()]):
     """
     API endpoint for retrieving the list of all provinces/cities.
+    Only the columns listed in 'fields' are selected (all columns if omitted).
+    """
+    columns = project_columns(PROVINCE_COLUMNS, query_params.fields)
+
+    def fetch_rows():
+        if READ_STORE_ENABLED:
+            return read_store_rows(session, "provinces", columns, query_params)
+        return paginate(session, select(*columns.values()).order_by(Province.id), query_params)
+
+    return coalesced_rows_response("provinces", columns, query_params, fetch_rows)
+
+@app.get("/api/v1/geo/provinces", response_model=List[ProvinceGeoRead])
+def get_provinces_by_location(*, session: Annotated[Session, Depends(get_session)],
+                              query_params: Annotated[GeoProvinceQuery, Query()]):
     """
-    provinces = session.exec(select(Province).offset(skip).limit(limit)).all()
-    return provinces
+    API endpoint resolving locations to provinces with the spatial index (see utils/spatial_index.py):
+    - ?lat=&lon=: Provinces whose bounding box contains the point (nearest center first).
+    - ?lat=&lon=&k=: The k provinces whose center is nearest to the point.
+    - ?bbox=min_lon,min_lat,max_lon,max_lat: Provinces whose bounding box intersects the viewport.
+    """
+    index = spatial_index(session)
+    if query_params.bbox is not None:
+        positions = index.intersects(*query_params.bbox_bounds())
+        distances = [None] * len(positions)
+    else:
+        if query_params.k is not None:
+            positions = index.nearest(query_params.lat, query_params.lon, query_params.k)
+        else:
+            positions = index.contains_point(query_params.lat, query_params.lon)
+        distances = index.distances_km(query_params.lat, query_params.lon, positions).tolist()
+
+    rows = [index.rows[position] + (distance,) for position, distance in zip(positions, distances)]
+    content = encode_rows((*index.columns, "distance_km"), rows)
+    return Response(content=content, media_type="application/json")
+
+@app.get("/api/v1/geo/region-columns", response_model=List[RegionMapColumnRead])
+def get_region_map_columns(*, session: Annotated[Session, Depends(get_session)],
+                           query_params: Annotated[RegionMapQuery, Query()]):
+    """
+    API endpoint returning the columns of the 3D region map for one year, metric and
+    set of commodities, ready to be passed to a PyDeck ColumnLayer
+    (position, elevation in meters, colour, formatted tooltip value).
+    The rows are precomputed at seed time (see utils/map_layer.py); only the
+    elevation is scaled here, so the tallest selected column has a fixed height.
+    """
+    def build_columns():
+        query = select(
+            RegionMapLayer.region_name, RegionMapLayer.commodity, RegionMapLayer.value, RegionMapLayer.value_label,
+            RegionMapLayer.longitude, RegionMapLayer.latitude,
+            RegionMapLayer.color_r, RegionMapLayer.color_g, RegionMapLayer.color_b
+        ).where(RegionMapLayer.year == query_params.year, RegionMapLayer.metric == query_params.metric)
+        if query_params.commodity:
+            query = query.where(RegionMapLayer.commodity.in_(query_params.commodity))
+        rows = session.exec(query.order_by(RegionMapLayer.id)).all()
+
+        elevations = scale_elevations([row.value for row in rows])
+        return orjson.dumps([
+            {
+                "region_name": row.region_name,
+                "commodity": row.commodity,
+                "value": row.value,
+                "value_label": row.value_label,
+                "position": [row.longitude, row.latitude],
+                "elevation": elevation,
+                "color": [row.color_r, row.color_g, row.color_b],
+            }
+            for row, elevation in zip(rows, elevations)
+        ])
+
+    content = coalesce("region-columns", query_params.model_dump(mode="json"), get_dataset_version(), build_columns)
+    return Response(content=content, media_type="application/json")
+
+# --- 5. DATASET VERSION AND DASHBOARD BUNDLE ENDPOINTS ---
+def etag_matches(request: Request, etag: str) -> bool:
+    """
+    Weak comparison of 'If-None-Match' with 'etag': the compression middleware
+    sends compressed responses with a weak ETag ('W/"..."'), which clients echo back.
+    """
+    values = request.headers.get("if-none-match", "").split(",")
+    return any(value.strip().removeprefix("W/") == etag for value in values)
+
+@app.get("/api/v1/version")
+def get_version(request: Request):
+    """
+    Cheap endpoint returning the current dataset revision (changes on every seed)
+    and the version of the prediction model. Clients key their caches on 'revision'
+    and only refetch data when it changes. A client sending 'If-None-Match' receives
+    '304 Not Modified' while nothing changed (the ETag covers both versions).
+    """
+    version, model_version = get_dataset_version(), read_latest_version()
+    headers = {"ETag": f'"{version}/{model_version}"', "Cache-Control": "no-cache"}
+    if etag_matches(request, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    content = orjson.dumps({"revision": version, "model_version": model_version})
+    return Response(content=content, media_type="application/json", headers=headers)
+
+@app.get("/api/v1/bundle")
+def get_dashboard_bundle(*, session: Annotated[Session, Depends(get_session)], request: Request):
+    """
+    API endpoint returning agriculture, provinces, climate and soil data in ONE response,
+    encoded as column arrays and tagged with the dataset version (see utils/bundle.py).
+    The payload is built once per seed and served from memory; clients sending
+    'If-None-Match' with the current ETag receive '304 Not Modified'.
+    """
+    version = get_dataset_version()
+    etag = f'"{version}"'
+    headers = {"ETag": etag, "X-Dataset-Version": version}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+
+    content = get_bundle(session, version, table_queries())
+    return Response(content=content, media_type="application/json", headers=headers)
+
+# --- 6. ANALYTICS API ENDPOINTS ---
+@app.get("/api/v1/analytics/agriculture-summary")
+def get_agriculture_summary(query_params: Annotated[AgricultureSummaryQuery, Query()]):
+    """
+    API endpoint returning one aggregated metric grouped by the requested dimensions
+    (e.g. ?group_by=year&group_by=commodity&metric=yield_ta_per_ha&agg=mean).
+    Missing metrics are imputed from the other two before aggregating.
+    The query runs on the engine selected by ANALYTICS_ENGINE (see utils/analytics_engine.py).
+    """
+    analytics = get_analytics_engine()
+
+    def run_summary():
+        df = analytics.aggregate_agriculture(query_params)
+        df = df.astype(object).where(df.notna(), None)
+        return orjson.dumps(df.to_dict(orient="records"))
+
+    params = query_params.model_dump(mode="json")
+    content = coalesce("agriculture-summary", params, get_dataset_version(), run_summary)
+    return Response(
+        content=content,
+        media_type="application/json",
+        headers={"X-Analytics-Engine": analytics.name}
+    )
+
+CLIMATE_ANOMALY_COLUMNS = schema_columns(ClimateAnomalyRead, ClimateAnomaly, {"province_name": Province.province_name})
+
+@app.get("/api/v1/analytics/climate-anomalies", response_model=List[ClimateAnomalyRead])
+def get_climate_anomalies(*, session: Annotated[Session, Depends(get_session)],
+                          # Filters (province_name, year range, variable), pagination and column projection
+                          query_params: Annotated[ClimateAnomalyQuery, Query()]):
+    """
+    API endpoint returning per-province climate baselines, anomalies, z-scores and
+    rolling means/trends for the 10 climate variables (one row per province, variable and year).
+    The statistics are precomputed at seed time (see utils/climate_statistics.py).
+    """
+    columns = project_columns(CLIMATE_ANOMALY_COLUMNS, query_params.fields)
+
+    def fetch_rows():
+        query = select(*columns.values()).select_from(ClimateAnomaly).join(Province, ClimateAnomaly.province_id == Province.id)
+        query = apply_year_filters(query, ClimateAnomaly.year, query_params)
+        if query_params.province_name:
+            query = query.where(Province.province_name.in_(query_params.province_name))
+        if query_params.variable:
+            query = query.where(ClimateAnomaly.variable.in_(query_params.variable))
+        return paginate(session, query.order_by(ClimateAnomaly.id), query_params)
+
+    return coalesced_rows_response("climate-anomalies", columns, query_params, fetch_rows)
+
+CLIMATE_NORMAL_COLUMNS = schema_columns(ClimateNormalRead, ClimateNormal, {"province_name": Province.province_name})
+
+def climate_normals_query(columns: dict):
+    """SELECT 'columns' of the climate normals (JOIN Province), in table order."""
+    return (select(*columns.values()).select_from(ClimateNormal)
+            .join(Province, ClimateNormal.province_id == Province.id).order_by(ClimateNormal.id))
+
+@app.get("/api/v1/analytics/climate-normals", response_model=List[ClimateNormalRead])
+def get_climate_normals_endpoint(*, session: Annotated[Session, Depends(get_session)],
+                                 # Filters (province_name, variable), pagination and column projection
+                                 query_params: Annotated[ClimateNormalQuery, Query()]):
+    """
+    API endpoint returning the climate normals of each province and climate variable:
+    mean, median, standard deviation, min/max, percentiles (p10, p25, p75, p90) and the
+    mean of the most recent years. The normals are precomputed at seed time
+    (see utils/climate_statistics.py).
+    """
+    columns = project_columns(CLIMATE_NORMAL_COLUMNS, query_params.fields)
+
+    def fetch_rows():
+        query = climate_normals_query(columns)
+        if query_params.province_name:
+            query = query.where(Province.province_name.in_(query_params.province_name))
+        if query_params.variable:
+            query = query.where(ClimateNormal.variable.in_(query_params.variable))
+        return paginate(session, query, query_params)
+
+    return coalesced_rows_response("climate-normals", columns, query_params, fetch_rows)
+
+FORECAST_COLUMNS = schema_columns(AgricultureForecastRead, AgricultureForecast)
+
+@app.get("/api/v1/analytics/forecasts", response_model=List[AgricultureForecastRead])
+def get_forecasts(*, session: Annotated[Session, Depends(get_session)],
+                  # Filters (series, metric, forecast year range), pagination and column projection
+                  query_params: Annotated[ForecastQuery, Query()]):
+    """
+    API endpoint returning the trend forecast, with its prediction interval, of every
+    (region, commodity, season, metric) series for each year after the dataset up to 2050.
+    The forecasts are precomputed at seed time (see utils/forecasting.py).
+    """
+    columns = project_columns(FORECAST_COLUMNS, query_params.fields)
+
+    def fetch_rows():
+        query = select(*columns.values()).select_from(AgricultureForecast)
+        if query_params.region_level:
+            query = query.where(AgricultureForecast.region_level == query_params.region_level)
+        if query_params.region_name:
+            query = query.where(AgricultureForecast.region_name.in_(query_params.region_name))
+        if query_params.commodity:
+            query = query.where(AgricultureForecast.commodity.in_(query_params.commodity))
+        if query_params.season:
+            query = query.where(AgricultureForecast.season.in_(query_params.season))
+        if query_params.metric:
+            query = query.where(AgricultureForecast.metric.in_(query_params.metric))
+        if query_params.year_from is not None:
+            query = query.where(AgricultureForecast.year >= query_params.year_from)
+        if query_params.year_to is not None:
+            query = query.where(AgricultureForecast.year <= query_params.year_to)
+        return paginate(session, query.order_by(AgricultureForecast.id), query_params)
+
+    return coalesced_rows_response("forecasts", columns, query_params, fetch_rows)
+
+# --- 7. PREDICTION API ENDPOINTS (POST) ---
+def fill_climate_features(session: Session, input_data: PredictionInput) -> tuple:
+    """
+    Fill the climate features missing from 'input_data' (omitted or null) from the
+    province's climate normals (statistic CLIMATE_FILL_STATISTIC, cached in memory
+    per dataset version).
+    Raises 422 if a missing feature has no normal to fill it (e.g. unknown province),
+    instead of predicting from the model's defaults.
+
+    Returns:
+        tuple: (completed input, {feature -> value used})
+    """
+    missing = [name for name in CLIMATE_FEATURES if getattr(input_data, name) is None]
+    if not missing:
+        return input_data, {}
+
+    normals = get_climate_normals(session, get_dataset_version(), list(CLIMATE_NORMAL_COLUMNS),
+                                  climate_normals_query(CLIMATE_NORMAL_COLUMNS))
+    province_normals = normals.get(input_data.province_name, {})
+    imputed_features = {
+        name: province_normals[name][CLIMATE_FILL_STATISTIC]
+        for name in missing
+        if province_normals.get(name, {}).get(CLIMATE_FILL_STATISTIC) is not None
+    }
+    unfilled = [name for name in missing if name not in imputed_features]
+    if unfilled:
+        raise HTTPException(
+            status_code=422,
+            detail=f"No climate normals for province '{input_data.province_name}' to fill {unfilled}; provide these features"
+        )
+    return input_data.model_copy(update=imputed_features), imputed_features
 
-# --- 5. PREDICTION API ENDPOINT (POST) ---
 @app.post("/api/v1/predict", response_model=PredictionOutput)
 def post_prediction(
     *, 
     session: Annotated[Session, Depends(get_session)],
-    input_data: PredictionInput
+    input_data: PredictionInput,
+    response: Response
 ):
     """
-    Prediction endpoint (CURRENTLY USING MOCK LOGIC).
-    Accepts 21 input features and returns predicted production and area.
-    
-    TODO: Replace the "MOCK LOGIC" section with actual ML model invocation
-          (e.g., model.predict(...)) when the model is ready.
+    Prediction endpoint.
+    Accepts 21 input features and returns predicted production, area and yield.
+    Climate features that are missing (omitted or null) are filled from the province's
+    climate normals and returned in 'imputed_features'.
+
+    Uses the latest model trained by 'train_model.py' (see utils/prediction_model.py);
+    the version is returned in the 'X-Model-Version' header. Until a model has been
+    trained, it falls back to the mock logic ('X-Model-Version: mock').
     """
-    predicted_area = 100 + (input_data.avg_temperature * 5)
-    
-    if input_data.commodity == "rice":
-        predicted_production = predicted_area * (80 + (input_data.precipitation / 10))
-    else:
-        predicted_production = predicted_area * (40 + (input_data.precipitation / 10))
-        
-    predicted_yield = (predicted_production / predicted_area) * 10
-    
-    
-    return PredictionOutput(
-        predicted_production=predicted_production,
-        predicted_area=predicted_area,
-        predicted_yield=predicted_yield
-    )
\ No newline at end of file
+    input_data, imputed_features = fill_climate_features(session, input_data)
+    predictions, model_version = score(pd.DataFrame([input_data.model_dump()]))
+    response.headers["X-Model-Version"] = model_version
+    return PredictionOutput(**predictions.iloc[0].to_dict(), imputed_features=imputed_features)
+
+@app.post("/api/v1/predict/sweep", response_model=PredictionSweepOutput)
+def post_prediction_sweep(
+    *,
+    session: Annotated[Session, Depends(get_session)],
+    sweep: PredictionSweepInput,
+    response: Response
+):
+    """
+    Sensitivity endpoint: varies 1 or 2 numeric features of a base input over evenly
+    spaced values and returns the dense response surface.
+    The Cartesian grid is built as one NumPy matrix and scored in ONE vectorized call.
+    Predictions are flattened in row-major order (the last axis varies fastest);
+    reshape them with 'shape'.
+    """
+    base, imputed_features = fill_climate_features(session, sweep.base)
+    axis_values = [np.linspace(axis.start, axis.stop, axis.steps) for axis in sweep.axes]
+    grid = np.stack(np.meshgrid(*axis_values, indexing="ij"), axis=-1).reshape(-1, len(axis_values))
+
+    df = pd.DataFrame({name: [value] * len(grid) for name, value in base.model_dump().items()})
+    for position, axis in enumerate(sweep.axes):
+        df[axis.feature.value] = grid[:, position]
+    predictions, model_version = score(df)
+
+    response.headers["X-Model-Version"] = model_version
+    return PredictionSweepOutput(
+        axes=[{"feature": axis.feature.value, "values": values.tolist()} for axis, values in zip(sweep.axes, axis_values)],
+        shape=[axis.steps for axis in sweep.axes],
+        predicted_production=predictions["predicted_production"].tolist(),
+        predicted_area=predictions["predicted_area"].tolist(),
+        predicted_yield=predictions["predicted_yield"].tolist(),
+        imputed_features=imputed_features
+    )
+
+@app.post("/api/v1/predict/simulate", response_model=PredictionSimulationOutput)
+def post_prediction_simulation(
+    *,
+    session: Annotated[Session, Depends(get_session)],
+    simulation: PredictionSimulationInput,
+    response: Response
+):
+    """
+    Monte Carlo endpoint: draws 'draws' climate scenarios from the province's historical
+    climate (block bootstrap or fitted multivariate normal, seeded RNG), scores them all
+    in ONE vectorized call and returns the P10/P50/P90, mean and standard deviation of
+    each prediction. Climate features given in 'base' are held fixed.
+    """
+    query = (select(Province.province_name, ClimateData.year,
+                    *[getattr(ClimateData, name) for name in CLIMATE_FEATURES])
+             .join(Province, ClimateData.province_id == Province.id))
+    history = get_climate_history(session, get_dataset_version(), query).get(simulation.base.province_name)
+    if history is None:
+        raise HTTPException(status_code=404, detail=f"No climate history for province '{simulation.base.province_name}'")
+
+    rng = np.random.default_rng(simulation.seed)
+    try:
+        scenarios = sample_climate(history, simulation.draws, simulation.method.value, rng, simulation.block_size)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=(
+            f"Province '{simulation.base.province_name}' has too incomplete a climate history "
+            f"for method '{simulation.method.value}': {e}"))
+    base = simulation.base.model_dump()
+    simulated_features = [name for name in CLIMATE_FEATURES if base[name] is None]
+
+    df = pd.DataFrame({name: np.full(simulation.draws, value, dtype=object if isinstance(value, str) else None)
+                       for name, value in base.items()})
+    for position, name in enumerate(CLIMATE_FEATURES):
+        if name in simulated_features:
+            df[name] = scenarios[:, position]
+    predictions, model_version = score(df)
+
+    quantiles = predictions.quantile([0.1, 0.5, 0.9])
+    response.headers["X-Model-Version"] = model_version
+    return PredictionSimulationOutput(
+        draws=simulation.draws,
+        method=simulation.method.value,
+        seed=simulation.seed,
+        simulated_features=simulated_features,
+        **{column: {
+            "p10": quantiles.loc[0.1, column], "p50": quantiles.loc[0.5, column], "p90": quantiles.loc[0.9, column],
+            "mean": predictions[column].mean(), "std": predictions[column].std()
+        } for column in predictions.columns}
+    )
@@ -14,10 +14,21 @@ Description:
     - SoilData: Fact table containing soil data by province.
     - AgricultureData: Primary fact table containing agricultural data
       (production, area, yield) by year, region/province, commodity, and season.
+    - DatasetVersion: Bookkeeping table with one row per seed run
+      (the latest 'revision' identifies the current dataset version).
+    - ClimateAnomaly: Derived table (precomputed at seed time) with per-province
+      climate baselines, anomalies, z-scores and rolling statistics.
+    - ClimateNormal: Derived table (precomputed at seed time) with per-province
+      climate normals (mean, median, percentiles, recent-years mean).
+    - RegionMapLayer: Derived table (precomputed at seed time) with the
+      ready-to-render columns of the 3D region map.
+    - AgricultureForecast: Derived table (precomputed at seed time) with the
+      trend forecasts and intervals of every agricultural series up to 2050.
 """
 
 from sqlmodel import SQLModel, Field
 from typing import Optional
+from datetime import datetime
 
 # --- 1. Province Table (Dimension Table) ---
 class Province(SQLModel, table=True):
@@ -109,4 +120,110 @@ class AgricultureData(SQLModel, table=True):
     province_id: Optional[int] = Field(
         default=None, 
         foreign_key="province.id"
-    )
\ No newline at end of file
+    )
+
+# --- 5. Dataset Version Table (Bookkeeping) ---
+class DatasetVersion(SQLModel, table=True):
+    """
+    Model for the 'dataset_version' table.
+    A new row is written by 'seed_db.py' at the end of every seed run.
+    The latest 'revision' is used to tag and invalidate in-memory caches.
+    """
+    __tablename__ = "dataset_version"
+    id: Optional[int] = Field(default=None, primary_key=True)
+    revision: str = Field(index=True)
+    seeded_at: datetime
+
+# --- 6. Derived Tables (Precomputed by 'seed_db.py') ---
+class ClimateAnomaly(SQLModel, table=True):
+    """
+    Model for the 'climate_anomaly' table.
+    One row per (province, climate variable, year), computed from 'climate_data'
+    by utils/climate_statistics.py.
+    """
+    __tablename__ = "climate_anomaly"
+    id: Optional[int] = Field(default=None, primary_key=True)
+    year: int = Field(index=True)
+    variable: str = Field(index=True) # Name of the ClimateData column (e.g. 'precipitation')
+
+    value: Optional[float] = None
+    baseline_mean: Optional[float] = None # Mean over the baseline period
+    baseline_std: Optional[float] = None # Standard deviation over the baseline period
+    anomaly: Optional[float] = None # value - baseline_mean
+    z_score: Optional[float] = None # anomaly / baseline_std
+    rolling_mean: Optional[float] = None # Mean over the trailing window of years
+    rolling_trend: Optional[float] = None # Least-squares slope (per year) over the trailing window
+
+    # Foreign key - connection to Province table
+    province_id: int = Field(foreign_key="province.id", index=True)
+
+class ClimateNormal(SQLModel, table=True):
+    """
+    Model for the 'climate_normal' table.
+    One row per (province, climate variable): statistics over all years of
+    'climate_data', computed by utils/climate_statistics.py.
+    """
+    __tablename__ = "climate_normal"
+    id: Optional[int] = Field(default=None, primary_key=True)
+    variable: str = Field(index=True) # Name of the ClimateData column (e.g. 'precipitation')
+    year_from: int # First year of the data
+    year_to: int # Last year of the data
+    recent_years: int # Number of years averaged in 'recent_mean'
+    n_years: int # Number of years with a value
+
+    mean: Optional[float] = None
+    median: Optional[float] = None
+    std: Optional[float] = None
+    min: Optional[float] = None
+    max: Optional[float] = None
+    p10: Optional[float] = None
+    p25: Optional[float] = None
+    p75: Optional[float] = None
+    p90: Optional[float] = None
+    recent_mean: Optional[float] = None # Mean of the last 'recent_years' years
+
+    # Foreign key - connection to Province table
+    province_id: int = Field(foreign_key="province.id", index=True)
+
+class RegionMapLayer(SQLModel, table=True):
+    """
+    Model for the 'region_map_layer' table.
+    One row per (year, metric, economic region, commodity): the columns of the
+    3D region map, computed from 'agriculture_data' by utils/map_layer.py.
+    """
+    __tablename__ = "region_map_layer"
+    id: Optional[int] = Field(default=None, primary_key=True)
+    year: int = Field(index=True)
+    metric: str = Field(index=True) # Name of the AgricultureData metric column
+    region_name: str
+    commodity: str = Field(index=True)
+
+    value: float # Imputed metric, summed over the region
+    value_label: str # Formatted value for the tooltip (e.g. '1,234.50')
+    longitude: float # Region center + per-commodity offset
+    latitude: float
+    color_r: int
+    color_g: int
+    color_b: int
+
+class AgricultureForecast(SQLModel, table=True):
+    """
+    Model for the 'agriculture_forecast' table.
+    One row per (series, forecast year), where a series is one
+    (region_level, region_name, commodity, season, metric) of 'agriculture_data'.
+    Computed by utils/forecasting.py (linear trend fitted on the historical years).
+    """
+    __tablename__ = "agriculture_forecast"
+    id: Optional[int] = Field(default=None, primary_key=True)
+    region_level: str = Field(index=True)
+    region_name: str = Field(index=True)
+    commodity: str = Field(index=True)
+    season: str
+    metric: str = Field(index=True) # Name of the AgricultureData metric column
+    year: int = Field(index=True)
+
+    forecast: float # Trend value (clipped at 0)
+    lower: float # Lower bound of the prediction interval (clipped at 0)
+    upper: float # Upper bound of the prediction interval
+    slope: float # Fitted trend, per year
+    n_points: int # Number of historical years used by the fit
@@ -12,12 +12,20 @@ Description:
 
     Defined classes:
     - ProvinceRead: Response schema for Province table.
+    - ProvinceGeoRead: Response schema for geo lookups (Province + 'distance_km').
     - ClimateDataRead: Response schema for Climate table (with JOIN, includes 'province_name').
     - SoilDataRead: Response schema for Soil table (with JOIN, includes 'province_name').
     - AgricultureDataRead: Response schema for Agriculture table.
+    - ClimateAnomalyRead: Response schema for the derived ClimateAnomaly table
+      (with JOIN, includes 'province_name').
+    - ClimateNormalRead: Response schema for the derived ClimateNormal table
+      (with JOIN, includes 'province_name').
+    - RegionMapColumnRead: Response schema for the 3D region map (ready-to-render
+      ColumnLayer rows, built from the derived RegionMapLayer table).
+    - AgricultureForecastRead: Response schema for the derived AgricultureForecast table.
 """
 from sqlmodel import SQLModel
-from typing import Optional
+from typing import List, Optional
 
 # --- 1. SCHEMAS FOR PROVINCE ---
 class ProvinceBase(SQLModel):
@@ -36,6 +44,14 @@ class ProvinceRead(ProvinceBase):
     """
     id: int
 
+class ProvinceGeoRead(ProvinceRead):
+    """
+    Response schema (Read) for the /geo/provinces API.
+    'distance_km' is the distance from the queried point to the province
+    center (None for viewport queries).
+    """
+    distance_km: Optional[float] = None
+
 # --- 2. SCHEMAS FOR AGRICULTURE DATA ---
 class AgricultureDataRead(SQLModel):
     """
@@ -90,3 +106,76 @@ class SoilDataRead(SQLModel):
     soil_nitrogen_content: Optional[float] = None
     soil_sand_ratio: Optional[float] = None
     soil_clay_ratio: Optional[float] = None
+
+# --- 5. SCHEMAS FOR DERIVED (PRECOMPUTED) DATA ---
+class ClimateAnomalyRead(SQLModel):
+    """
+    Response schema (Read) for climate anomalies and rolling statistics.
+    This schema includes 'province_name' (from JOIN)
+    and intentionally EXCLUDES 'province_id'.
+    """
+    id: int
+    year: int
+    province_name: str
+    variable: str
+    value: Optional[float] = None
+    baseline_mean: Optional[float] = None
+    baseline_std: Optional[float] = None
+    anomaly: Optional[float] = None
+    z_score: Optional[float] = None
+    rolling_mean: Optional[float] = None
+    rolling_trend: Optional[float] = None
+
+class ClimateNormalRead(SQLModel):
+    """
+    Response schema (Read) for the climate normals of one province and variable.
+    This schema includes 'province_name' (from JOIN)
+    and intentionally EXCLUDES 'province_id'.
+    """
+    id: int
+    province_name: str
+    variable: str
+    year_from: int
+    year_to: int
+    recent_years: int
+    n_years: int
+    mean: Optional[float] = None
+    median: Optional[float] = None
+    std: Optional[float] = None
+    min: Optional[float] = None
+    max: Optional[float] = None
+    p10: Optional[float] = None
+    p25: Optional[float] = None
+    p75: Optional[float] = None
+    p90: Optional[float] = None
+    recent_mean: Optional[float] = None
+
+class RegionMapColumnRead(SQLModel):
+    """
+    Response schema (Read) for one column of the 3D region map,
+    in the shape expected by a PyDeck ColumnLayer.
+    """
+    region_name: str
+    commodity: str
+    value: float
+    value_label: str
+    position: List[float] # [longitude, latitude]
+    elevation: float # Meters
+    color: List[int] # [r, g, b]
+
+class AgricultureForecastRead(SQLModel):
+    """
+    Response schema (Read) for the trend forecast of one series and year.
+    """
+    id: int
+    region_level: str
+    region_name: str
+    commodity: str
+    season: str
+    metric: str
+    year: int
+    forecast: float
+    lower: float
+    upper: float
+    slope: float
+    n_points: int
@@ -19,13 +19,31 @@ Description:
        populate 'province_id'.
     5. insert_climate_data(): Load climate data, using the lookup map above to
        populate 'province_id'.
-    6. insert_agriculture_data(): Load agriculture data, using the lookup map
+    6. insert_climate_anomalies(): Precompute climate baselines, anomalies,
+       z-scores and rolling statistics (into 'climate_anomaly' table).
+    7. insert_climate_normals(): Precompute per-province climate normals
+       (into 'climate_normal' table).
+    8. insert_agriculture_data(): Load agriculture data, using the lookup map
        above to populate 'province_id' (for 'province' level rows).
+    9. insert_region_map_layer(): Precompute the columns of the 3D region map
+       (into 'region_map_layer' table).
+    10. insert_agriculture_forecasts(): Precompute the trend forecasts of every
+       agricultural series up to 2050 (into 'agriculture_forecast' table).
+    11. insert_dataset_version(): Record a new dataset revision, which tells the
+       API (and the frontend) that cached data must be rebuilt.
+    12. export_analytics_snapshot(): Export the tables to Parquet for the
+       embedded DuckDB analytics engine (see utils/analytics_engine.py).
 """
 import pandas as pd
 from sqlmodel import Session, SQLModel
 from utils.connect_database import engine
-from model import Province, ClimateData, AgricultureData
+from utils.analytics_engine import export_snapshot, SNAPSHOT_DIR
+from utils.climate_statistics import compute_climate_anomalies, compute_climate_normals
+from utils.map_layer import compute_region_map_layer
+from utils.forecasting import compute_agriculture_forecasts
+from model import Province, ClimateData, AgricultureData, DatasetVersion
+from datetime import datetime, timezone
+import uuid
 import os
 
 # Define absolute path to the 'data' directory
@@ -105,6 +123,27 @@ def insert_climate_data(path: str):
     except Exception as e:
         print(f"Error inserting climate data: {e}")
 
+def insert_climate_anomalies():
+    """
+    Compute climate anomalies and rolling statistics from the loaded
+    'climate_data' table and store them in the 'climate_anomaly' table.
+    Must run after insert_climate_data().
+    """
+    try:
+        print("Inserting climate anomalies")
+        df_climate = pd.read_sql("SELECT * FROM climate_data", engine)
+        df_anomalies = compute_climate_anomalies(df_climate)
+
+        df_anomalies.to_sql(
+            name="climate_anomaly",
+            con=engine,
+            if_exists="append",
+            index=False
+        )
+        print("Inserted climate anomalies successfully")
+    except Exception as e:
+        print(f"Error inserting climate anomalies: {e}")
+
 def insert_soil_data(path: str):
     """
     Load data from 'soil.csv' into the 'soil_data' table.
@@ -128,6 +167,27 @@ def insert_soil_data(path: str):
     except Exception as e:
         print(f"Error inserting soil data: {e}")
 
+def insert_climate_normals():
+    """
+    Compute the per-province climate normals from the loaded 'climate_data'
+    table and store them in the 'climate_normal' table.
+    Must run after insert_climate_data().
+    """
+    try:
+        print("Inserting climate normals")
+        df_climate = pd.read_sql("SELECT * FROM climate_data", engine)
+        df_normals = compute_climate_normals(df_climate)
+
+        df_normals.to_sql(
+            name="climate_normal",
+            con=engine,
+            if_exists="append",
+            index=False
+        )
+        print("Inserted climate normals successfully")
+    except Exception as e:
+        print(f"Error inserting climate normals: {e}")
+
 def insert_agriculture_data(path: str):
     """
     Load data from 'agriculture.csv' into the 'agriculture_data' table.
@@ -157,6 +217,76 @@ def insert_agriculture_data(path: str):
     except Exception as e:
         print(f"Error inserting agriculture data: {e}")
 
+def insert_region_map_layer():
+    """
+    Compute the columns of the 3D region map from the loaded 'agriculture_data'
+    table and store them in the 'region_map_layer' table.
+    Must run after insert_agriculture_data().
+    """
+    try:
+        print("Inserting region map layer")
+        df_agriculture = pd.read_sql("SELECT * FROM agriculture_data", engine)
+        df_layer = compute_region_map_layer(df_agriculture)
+
+        df_layer.to_sql(
+            name="region_map_layer",
+            con=engine,
+            if_exists="append",
+            index=False
+        )
+        print("Inserted region map layer successfully")
+    except Exception as e:
+        print(f"Error inserting region map layer: {e}")
+
+def insert_agriculture_forecasts():
+    """
+    Fit a trend to every agricultural series of the loaded 'agriculture_data'
+    table and store the forecasts in the 'agriculture_forecast' table.
+    Must run after insert_agriculture_data().
+    """
+    try:
+        print("Inserting agriculture forecasts")
+        df_agriculture = pd.read_sql("SELECT * FROM agriculture_data", engine)
+        df_forecast = compute_agriculture_forecasts(df_agriculture)
+
+        df_forecast.to_sql(
+            name="agriculture_forecast",
+            con=engine,
+            if_exists="append",
+            index=False,
+            chunksize=10000
+        )
+        print(f"Inserted {len(df_forecast)} agriculture forecasts successfully")
+    except Exception as e:
+        print(f"Error inserting agriculture forecasts: {e}")
+
+def insert_dataset_version():
+    """
+    Record a new row in the 'dataset_version' table.
+    Must run LAST, once all data has been loaded.
+
+    Returns:
+        str: The new revision (e.g. '20250101T120000Z-1a2b3c4d').
+    """
+    seeded_at = datetime.now(timezone.utc)
+    revision = f"{seeded_at.strftime('%Y%m%dT%H%M%SZ')}-{uuid.uuid4().hex[:8]}"
+    with Session(engine) as session:
+        session.add(DatasetVersion(revision=revision, seeded_at=seeded_at))
+        session.commit()
+    print(f"Recorded dataset version {revision}")
+    return revision
+
+def export_analytics_snapshot(revision):
+    """
+    Export every table to Parquet files tagged with 'revision',
+    so the DuckDB analytics engine does not have to export them on its first query.
+    """
+    try:
+        export_snapshot(engine, revision, SNAPSHOT_DIR)
+        print(f"Exported analytics snapshot to {SNAPSHOT_DIR}")
+    except Exception as e:
+        print(f"Error exporting analytics snapshot: {e}")
+
 # MAIN
 if __name__ == "__main__":
     """
@@ -166,5 +296,11 @@ if __name__ == "__main__":
     reset_database()
     insert_provinces_data(os.path.join(DATA_DIR, "province.csv"))
     insert_climate_data(os.path.join(DATA_DIR, "climate.csv"))
+    insert_climate_anomalies()
+    insert_climate_normals()
     insert_agriculture_data(os.path.join(DATA_DIR, "agriculture.csv"))
-    insert_soil_data(os.path.join(DATA_DIR, "soil.csv"))
\ No newline at end of file
+    insert_region_map_layer()
+    insert_agriculture_forecasts()
+    insert_soil_data(os.path.join(DATA_DIR, "soil.csv"))
+    revision = insert_dataset_version()
+    export_analytics_snapshot(revision)
@@ -0,0 +1,55 @@
+"""
+File: backend/tests/test_climate_statistics.py
+Description:
+    Tests of the Monte Carlo climate sampling (utils/climate_statistics.py):
+    too incomplete histories are rejected, and bootstrap blocks never span a
+    year with a missing value.
+    Run from 'backend/': python -m pytest -q tests
+"""
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.climate_statistics import block_starts, sample_climate
+
+
+def history_with_gaps(years: int, missing: list) -> np.ndarray:
+    """A (years x 10) history whose row i holds the value i, with a NaN in the 'missing' rows."""
+    history = np.repeat(np.arange(years, dtype=np.float64)[:, np.newaxis], 10, axis=1)
+    history[missing, 0] = np.nan
+    return history
+
+
+@pytest.mark.parametrize("method, years, missing", [
+    ("normal", 3, [0, 1, 2]),
+    ("normal", 3, [0, 2]),
+    ("bootstrap", 2, []),                 # 1 block of 3 years at most
+    ("bootstrap", 8, [2, 5]),             # 4 complete years, no 3 of them consecutive
+])
+def test_sample_climate_rejects_incomplete_history(method, years, missing):
+    with pytest.raises(ValueError):
+        sample_climate(history_with_gaps(years, missing), 100, method, np.random.default_rng(0), 3)
+
+
+def test_block_starts_skip_blocks_with_missing_years():
+    assert block_starts(history_with_gaps(10, [3]), 3).tolist() == [0, 4, 5, 6, 7]
+
+
+@pytest.mark.parametrize("method", ["bootstrap", "normal"])
+def test_sample_climate_shape(method):
+    scenarios = sample_climate(history_with_gaps(12, [3, 8]), 100, method, np.random.default_rng(0), 3)
+    assert scenarios.shape == (100, 10)
+    assert not np.isnan(scenarios).any()
+
+
+def test_bootstrap_blocks_are_consecutive_complete_years():
+    history = history_with_gaps(12, [3, 8])
+    scenarios = sample_climate(history, 99, "bootstrap", np.random.default_rng(0), 3)
+    years = scenarios[:, 1].reshape(-1, 3)
+    # Every block is 3 consecutive years that do not contain a missing year
+    assert (np.diff(years, axis=1) == 1).all()
+    assert not np.isin(years, [3, 8]).any()
@@ -0,0 +1,48 @@
+"""
+File: backend/tests/test_query_profiler.py
+Description:
+    Tests of the slow-query profiler (utils/query_profiler.py): the EXPLAIN plan
+    of a slow shape is captured in the background with the statement's own
+    parameters, whatever the DBAPI parameter style (SQLite: qmark/positional).
+    Run from 'backend/': python -m pytest -q tests
+"""
+import os
+import sys
+
+import pytest
+from sqlalchemy import create_engine, text
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import query_profiler
+
+
+@pytest.fixture
+def sqlite_engine(tmp_path, monkeypatch):
+    monkeypatch.setattr(query_profiler, "SLOW_QUERY_THRESHOLD_MS", 0.0)
+    query_profiler.reset_query_stats()
+    engine = create_engine(f"sqlite:///{tmp_path / 'profiler.db'}")
+    with engine.begin() as connection:
+        connection.execute(text("CREATE TABLE item (id INTEGER PRIMARY KEY, name TEXT)"))
+        connection.execute(text("INSERT INTO item (name) VALUES ('rice'), ('maize')"))
+    query_profiler.install_query_profiler(engine)
+    yield engine
+    query_profiler.reset_query_stats()
+    engine.dispose()
+
+
+def wait_for_explains():
+    # The executor has a single thread: a no-op finishes after every queued EXPLAIN
+    query_profiler._get_explain_executor().submit(lambda: None).result(timeout=10)
+
+
+def test_explain_is_captured_with_positional_parameters(sqlite_engine):
+    with sqlite_engine.connect() as connection:
+        connection.execute(text("SELECT id, name FROM item WHERE name = :name"), {"name": "rice"}).all()
+    wait_for_explains()
+
+    entry = next(e for e in query_profiler.get_top_queries() if e["statement"].startswith("SELECT id, name FROM item"))
+    assert entry["slow_calls"] == 1
+    assert entry["explain"]
+    assert not any(line.startswith("EXPLAIN failed") for line in entry["explain"])
+    assert "rice" not in str(entry)
@@ -0,0 +1,24 @@
+"""
+File: backend/tests/test_serialization.py
+Description:
+    Tests of the row encoder of the statistics endpoints (utils/serialization.py).
+    Run from 'backend/': python -m pytest -q tests
+"""
+import os
+import sys
+
+import orjson
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.serialization import encode_rows
+
+
+@pytest.mark.parametrize("columns, rows, expected", [
+    (("id", "name"), [(1, "a, b"), (2, "c")], [{"id": 1, "name": "a, b"}, {"id": 2, "name": "c"}]),
+    (("id", "value"), [(1, None), (2, float("nan"))], [{"id": 1, "value": None}, {"id": 2, "value": None}]),
+    (("name",), ["x,y", "z"], [{"name": "x,y"}, {"name": "z"}]),
+])
+def test_encode_rows(columns, rows, expected):
+    assert orjson.loads(encode_rows(columns, rows)) == expected
@@ -0,0 +1,163 @@
+"""
+File: backend/train_model.py
+Description:
+    This is a standalone script that trains the model behind POST /api/v1/predict
+    (see utils/prediction_model.py) from the seeded database.
+
+    Like 'seed_db.py', it is NOT part of the API: it is run after every seed
+    (e.g. 'python seed_db.py && python train_model.py', as the 'db-seeder'
+    service of 'docker-compose.yml' does).
+
+    Execution workflow:
+    1. load_feature_matrix(): Build the 21 features + targets with ONE join query
+       (agriculture_data x province x climate_data x soil_data).
+    2. time_series_folds(): Expanding-window folds: each fold validates on a block
+       of TRAIN_CV_HORIZON consecutive years and trains on ALL earlier years
+       (never on the future).
+    3. cross_validate(): Evaluate every (hyperparameters, fold) pair of the grid
+       in parallel, in a process pool using every CPU core.
+    4. The best hyperparameters (lowest mean validation RMSE on the log targets)
+       are refitted on all rows.
+    5. publish_model(): Write the versioned artifact and its metrics
+       ('<MODEL_DIR>/<version>/'), then point LATEST at it.
+
+    Configuration (environment variables):
+    - TRAIN_WORKERS: Number of worker processes (default: number of CPU cores).
+    - TRAIN_CV_FOLDS: Number of validation folds (default 5).
+    - TRAIN_CV_HORIZON: Years per validation fold (default 3).
+    - TRAIN_ALPHAS: Comma-separated ridge penalties to search (default '0.1,1,10,100,1000').
+    - MODEL_DIR: Output directory (see utils/prediction_model.py).
+"""
+import itertools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from utils.analytics_engine import get_analytics_engine
+from utils.dataset_version import read_dataset_version
+from utils.prediction_model import MODEL_DIR, TARGETS, PredictionModel, publish_model, training_rows
+
+TRAIN_WORKERS = int(os.environ.get("TRAIN_WORKERS", str(os.cpu_count() or 1)))
+TRAIN_CV_FOLDS = int(os.environ.get("TRAIN_CV_FOLDS", "5"))
+TRAIN_CV_HORIZON = int(os.environ.get("TRAIN_CV_HORIZON", "3"))
+TRAIN_ALPHAS = [float(value) for value in os.environ.get("TRAIN_ALPHAS", "0.1,1,10,100,1000").split(",")]
+
+# Feature matrix of the current worker process (set once per worker, see _init_worker)
+_worker_features = None
+
+
+def load_feature_matrix() -> pd.DataFrame:
+    """The 21 features of 'PredictionInput' and the three targets, in one join query."""
+    return training_rows(get_analytics_engine().feature_matrix()).reset_index(drop=True)
+
+
+def time_series_folds(years: pd.Series, folds: int = TRAIN_CV_FOLDS, horizon: int = TRAIN_CV_HORIZON) -> list:
+    """
+    Expanding-window folds over the distinct years.
+
+    Returns:
+        list: [(train_until, valid_from, valid_to), ...] - train on year < train_until,
+              validate on valid_from <= year <= valid_to.
+    """
+    distinct = np.sort(years.unique())
+    folds = min(folds, (len(distinct) - 1) // horizon)
+    result = []
+    for fold in range(folds, 0, -1):
+        block = distinct[len(distinct) - fold * horizon:][:horizon]
+        result.append((int(block[0]), int(block[0]), int(block[-1])))
+    return result
+
+
+def evaluate(df_true: pd.DataFrame, predictions: pd.DataFrame) -> dict:
+    """RMSE, MAE and R2 of area, yield and production, plus the RMSE of the log targets."""
+    metrics = {}
+    log_errors = []
+    for target, column in [("area_thousand_ha", "predicted_area"), ("yield_ta_per_ha", "predicted_yield"),
+                           ("production_thousand_tonnes", "predicted_production")]:
+        actual = df_true[target].to_numpy(dtype=np.float64)
+        predicted = predictions[column].to_numpy(dtype=np.float64)
+        error = predicted - actual
+        total = ((actual - actual.mean()) ** 2).sum()
+        metrics[target] = {
+            "rmse": float(np.sqrt((error ** 2).mean())),
+            "mae": float(np.abs(error).mean()),
+            "r2": float(1 - (error ** 2).sum() / total) if total > 0 else None,
+        }
+        if target in TARGETS:
+            log_errors.append(np.log1p(predicted) - np.log1p(actual))
+    metrics["log_rmse"] = float(np.sqrt((np.concatenate(log_errors) ** 2).mean()))
+    return metrics
+
+
+def _init_worker(df: pd.DataFrame):
+    """Process pool initializer: the feature matrix is sent once per worker, not once per task."""
+    global _worker_features
+    _worker_features = df
+
+
+def _evaluate_task(task: tuple) -> tuple:
+    """Fit one hyperparameter combination on one fold and score it on the fold's validation years."""
+    params, (train_until, valid_from, valid_to) = task
+    df = _worker_features
+    train = df[df["year"] < train_until]
+    valid = df[(df["year"] >= valid_from) & (df["year"] <= valid_to)]
+    model = PredictionModel.fit(train, **params)
+    return params, valid_from, evaluate(valid, model.predict(valid))
+
+
+def cross_validate(df: pd.DataFrame, grid: list, folds: list, workers: int = TRAIN_WORKERS) -> pd.DataFrame:
+    """Evaluate every (params, fold) pair in a process pool; one row per pair."""
+    tasks = list(itertools.product(grid, folds))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(df,)) as pool:
+        results = list(pool.map(_evaluate_task, tasks, chunksize=max(1, len(tasks) // (workers * 4))))
+    return pd.DataFrame([
+        {**params, "valid_from": valid_from, "log_rmse": metrics["log_rmse"],
+         **{f"{target}_{name}": value for target in ("area_thousand_ha", "yield_ta_per_ha", "production_thousand_tonnes")
+            for name, value in metrics[target].items()}}
+        for params, valid_from, metrics in results
+    ])
+
+
+# MAIN
+if __name__ == "__main__":
+    """
+    This is the main function, only runs when this script
+    is called directly (e.g., 'python train_model.py').
+    """
+    started = time.perf_counter()
+    revision = read_dataset_version()
+    df = load_feature_matrix()
+    print(f"Loaded feature matrix: {len(df)} rows (dataset version {revision})")
+
+    grid = [{"alpha": alpha, "interactions": interactions, "series_effects": series_effects}
+            for alpha, interactions, series_effects in itertools.product(TRAIN_ALPHAS, [False, True], [False, True])]
+    folds = time_series_folds(df["year"])
+    print(f"Cross-validating {len(grid)} hyperparameter sets x {len(folds)} folds on {TRAIN_WORKERS} worker(s)")
+    df_cv = cross_validate(df, grid, folds)
+
+    df_scores = df_cv.drop(columns=["valid_from"]).groupby(["alpha", "interactions", "series_effects"], as_index=False).mean()
+    best = df_scores.sort_values("log_rmse").iloc[0]
+    params = {"alpha": float(best["alpha"]), "interactions": bool(best["interactions"]),
+              "series_effects": bool(best["series_effects"])}
+    print(f"Best hyperparameters: {params} (validation log RMSE {best['log_rmse']:.4f})")
+
+    model = PredictionModel.fit(df, **params)
+    version = f"{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')}-{revision}"
+    metrics = {
+        "version": version,
+        "dataset_version": revision,
+        "trained_at": datetime.now(timezone.utc).isoformat(),
+        "training_rows": len(df),
+        "params": params,
+        "folds": [{"train_until": fold[0], "valid_from": fold[1], "valid_to": fold[2]} for fold in folds],
+        "cross_validation": df_scores.to_dict(orient="records"),
+        "best_cross_validation": {key: (value.item() if hasattr(value, "item") else value) for key, value in best.items()},
+        "training": evaluate(df, model.predict(df)),
+        "duration_seconds": round(time.perf_counter() - started, 2),
+    }
+    path = publish_model(model, metrics, version, MODEL_DIR)
+    print(f"Saved model {version} to {path} in {metrics['duration_seconds']}s")
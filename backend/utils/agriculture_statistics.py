@@ -0,0 +1,29 @@
+"""
+File: backend/utils/agriculture_statistics.py
+Description:
+    This utility file holds the pandas helpers shared by the seed-time
+    computations on agricultural data (see 'seed_db.py').
+
+    - impute_agriculture_metrics(): Fill in a missing production, area or
+      yield from the other two, using the same rules as the dashboard:
+      yield (quintals/ha) = production (1000 tonnes) / area (1000 ha) * 10
+"""
+import pandas as pd
+
+AGRICULTURE_METRICS = ["production_thousand_tonnes", "area_thousand_ha", "yield_ta_per_ha"]
+
+
+def impute_agriculture_metrics(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Return a copy of 'df' where each missing metric is computed from the other two
+    (when possible). Every rule only uses the ORIGINAL values of the row.
+    """
+    df = df.copy()
+    production = pd.to_numeric(df["production_thousand_tonnes"], errors="coerce")
+    area = pd.to_numeric(df["area_thousand_ha"], errors="coerce")
+    yield_ = pd.to_numeric(df["yield_ta_per_ha"], errors="coerce")
+
+    df["yield_ta_per_ha"] = yield_.fillna((production / area * 10).where(area > 0))
+    df["production_thousand_tonnes"] = production.fillna(yield_ * area / 10)
+    df["area_thousand_ha"] = area.fillna((production / yield_ * 10).where(yield_ > 0))
+    return df
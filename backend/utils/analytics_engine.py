@@ -0,0 +1,255 @@
+"""
+File: backend/utils/analytics_engine.py
+Description:
+    This utility file runs the analytical queries of the API (group-bys,
+    rollups and the feature matrix used for model training).
+
+    Two interchangeable engines are provided, selected with the
+    ANALYTICS_ENGINE environment variable:
+    - "sql" (default): Runs the queries on PostgreSQL through SQLAlchemy.
+    - "duckdb": Runs the queries in-process with an embedded DuckDB connection
+      over a Parquet snapshot of the tables (vectorized execution, no database
+      round trip). The snapshot is exported by 'seed_db.py' and re-exported by
+      the API itself whenever it is missing or older than the current dataset version.
+
+    Both engines execute the SAME SQL text (written with ':name' parameters),
+    so results are identical whichever engine is enabled.
+
+    Configuration (environment variables):
+    - ANALYTICS_ENGINE: "sql" or "duckdb" (default "sql").
+    - ANALYTICS_SNAPSHOT_DIR: Directory of the Parquet snapshot (default 'backend/snapshot').
+"""
+import abc
+import os
+import re
+import tempfile
+import threading
+
+import pandas as pd
+from sqlalchemy import text
+
+ANALYTICS_ENGINE = os.environ.get("ANALYTICS_ENGINE", "sql").lower()
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SNAPSHOT_DIR = os.environ.get("ANALYTICS_SNAPSHOT_DIR", os.path.join(BASE_DIR, "snapshot"))
+SNAPSHOT_VERSION_FILE = "VERSION"
+SNAPSHOT_TABLES = ["province", "agriculture_data", "climate_data", "soil_data"]
+
+# --- 1. PARQUET SNAPSHOT ---
+def export_snapshot(engine, revision: str, directory: str = SNAPSHOT_DIR):
+    """
+    Export every table to '<directory>/<table>.parquet'.
+    Files are written to a unique temporary name (safe with several processes
+    exporting at once) and renamed, and the VERSION file is written last, so
+    readers never see a half-written snapshot as current.
+    """
+    os.makedirs(directory, exist_ok=True)
+    for table in SNAPSHOT_TABLES:
+        df = pd.read_sql(f"SELECT * FROM {table}", engine)
+        _write_replace(os.path.join(directory, f"{table}.parquet"), lambda f: df.to_parquet(f, index=False))
+    _write_replace(os.path.join(directory, SNAPSHOT_VERSION_FILE), lambda f: f.write(revision.encode()))
+
+
+def _write_replace(path: str, write):
+    """Call write(file) on a per-process temporary file next to 'path', then rename it to 'path'."""
+    with tempfile.NamedTemporaryFile(dir=os.path.dirname(path), prefix=os.path.basename(path) + ".",
+                                     suffix=".tmp", delete=False) as f:
+        try:
+            write(f)
+        except BaseException:
+            f.close()
+            os.unlink(f.name)
+            raise
+    os.replace(f.name, path)
+
+
+def read_snapshot_version(directory: str = SNAPSHOT_DIR):
+    """Return the revision of the snapshot in 'directory' (None if there is none)."""
+    try:
+        with open(os.path.join(directory, SNAPSHOT_VERSION_FILE)) as f:
+            return f.read().strip()
+    except FileNotFoundError:
+        return None
+
+# --- 2. SHARED SQL ---
+# Agriculture rows with missing metrics filled in, using the same rules as the dashboard:
+# yield (quintals/ha) = production (1000 tonnes) / area (1000 ha) * 10
+AGRICULTURE_IMPUTED_CTE = """
+WITH agriculture AS (
+    SELECT
+        id, year, commodity, season, region_level, region_name, province_id,
+        COALESCE(area_thousand_ha,
+                 CASE WHEN yield_ta_per_ha > 0 THEN production_thousand_tonnes / yield_ta_per_ha * 10 END
+        ) AS area_thousand_ha,
+        COALESCE(production_thousand_tonnes, yield_ta_per_ha * area_thousand_ha / 10) AS production_thousand_tonnes,
+        COALESCE(yield_ta_per_ha,
+                 CASE WHEN area_thousand_ha > 0 THEN production_thousand_tonnes / area_thousand_ha * 10 END
+        ) AS yield_ta_per_ha
+    FROM agriculture_data
+)
+"""
+
+AGGREGATE_SQL = {"sum": "SUM", "mean": "AVG", "min": "MIN", "max": "MAX", "count": "COUNT"}
+
+CLIMATE_FEATURES = [
+    "avg_temperature", "min_temperature", "max_temperature", "surface_temperature",
+    "wet_bulb_temperature", "precipitation", "solar_radiation", "relative_humidity",
+    "wind_speed", "surface_pressure",
+]
+SOIL_FEATURES = [
+    "surface_elevation", "avg_ndvi", "soil_ph_level", "soil_organic_carbon",
+    "soil_nitrogen_content", "soil_sand_ratio", "soil_clay_ratio",
+]
+
+# The 21 features of 'PredictionInput' plus the three targets, in ONE join
+FEATURE_MATRIX_SQL = AGRICULTURE_IMPUTED_CTE + f"""
+SELECT
+    p.province_name, a.year, a.commodity, a.season,
+    {", ".join(f"c.{name}" for name in CLIMATE_FEATURES)},
+    {", ".join(f"s.{name}" for name in SOIL_FEATURES)},
+    a.area_thousand_ha, a.production_thousand_tonnes, a.yield_ta_per_ha
+FROM agriculture a
+JOIN province p ON p.id = a.province_id
+JOIN climate_data c ON c.province_id = a.province_id AND c.year = a.year
+JOIN soil_data s ON s.province_id = a.province_id
+WHERE a.region_level = 'province'
+ORDER BY a.year, p.province_name, a.commodity, a.season
+"""
+
+
+def agriculture_where(filters) -> tuple:
+    """
+    Translate an AgricultureFilter into a SQL WHERE clause with ':name' parameters.
+
+    Returns:
+        tuple: (where_sql, params) - 'where_sql' is empty when there is no filter.
+    """
+    clauses, params = [], {}
+
+    def add_in(column, values):
+        names = [f"{column}_{i}" for i in range(len(values))]
+        clauses.append(f"{column} IN ({', '.join(':' + name for name in names)})")
+        params.update({name: getattr(value, "value", value) for name, value in zip(names, values)})
+
+    if filters.year:
+        clauses.append("year = :year")
+        params["year"] = int(filters.year)
+    if filters.year_from:
+        clauses.append("year >= :year_from")
+        params["year_from"] = int(filters.year_from)
+    if filters.year_to:
+        clauses.append("year <= :year_to")
+        params["year_to"] = int(filters.year_to)
+    if filters.commodity:
+        add_in("commodity", filters.commodity)
+    if filters.season:
+        add_in("season", filters.season)
+    if filters.region_name:
+        add_in("region_name", filters.region_name)
+    if filters.region_level:
+        clauses.append("region_level = :region_level")
+        params["region_level"] = filters.region_level.value
+
+    where_sql = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    return where_sql, params
+
+# --- 3. ENGINES ---
+class AnalyticsEngine(abc.ABC):
+    """
+    Base class: the analytical queries, written once.
+    Subclasses only implement 'query(sql, params)' (abstract: a subclass without it cannot be instantiated).
+    """
+    name = "base"
+
+    @abc.abstractmethod
+    def query(self, sql: str, params: dict = None) -> pd.DataFrame:
+        """Run 'sql' (named ':param' placeholders) and return the result as a DataFrame."""
+
+    def aggregate_agriculture(self, summary_query) -> pd.DataFrame:
+        """
+        GROUP BY the requested dimensions and aggregate one (imputed) metric.
+        'summary_query' is an AgricultureSummaryQuery (enum values are safe to inline).
+        """
+        dimensions = ", ".join(dict.fromkeys(dimension.value for dimension in summary_query.group_by))
+        metric = summary_query.metric.value
+        aggregate = AGGREGATE_SQL[summary_query.agg.value]
+        where_sql, params = agriculture_where(summary_query)
+        sql = AGRICULTURE_IMPUTED_CTE + f"""
+            SELECT {dimensions}, {aggregate}({metric}) AS {metric}
+            FROM agriculture
+            {where_sql}
+            GROUP BY {dimensions}
+            ORDER BY {dimensions}
+        """
+        return self.query(sql, params)
+
+    def feature_matrix(self) -> pd.DataFrame:
+        """Province-level agriculture rows joined with their climate (same year) and soil data."""
+        return self.query(FEATURE_MATRIX_SQL)
+
+
+class SQLAnalyticsEngine(AnalyticsEngine):
+    """Runs analytical queries on the PostgreSQL database."""
+    name = "sql"
+
+    def __init__(self, engine):
+        self.engine = engine
+
+    def query(self, sql: str, params: dict = None) -> pd.DataFrame:
+        with self.engine.connect() as connection:
+            return pd.read_sql(text(sql), connection, params=params or {})
+
+
+class DuckDBAnalyticsEngine(AnalyticsEngine):
+    """
+    Runs analytical queries in-process with DuckDB over the Parquet snapshot.
+    Each table name used in the SQL is a DuckDB view over '<table>.parquet'.
+    """
+    name = "duckdb"
+
+    def __init__(self, engine, directory: str = SNAPSHOT_DIR):
+        import duckdb  # Optional dependency, only needed when this engine is enabled
+
+        self.engine = engine
+        self.directory = directory
+        self.connection = duckdb.connect(":memory:")
+        self.version = None
+        self._lock = threading.Lock()
+
+    def refresh(self, version: str):
+        """Make sure the views point at a snapshot of 'version' (exporting it if needed)."""
+        with self._lock:
+            if self.version == version:
+                return
+            if read_snapshot_version(self.directory) != version:
+                export_snapshot(self.engine, version, self.directory)
+            for table in SNAPSHOT_TABLES:
+                path = os.path.join(self.directory, f"{table}.parquet").replace("'", "''")
+                self.connection.execute(f"CREATE OR REPLACE VIEW {table} AS SELECT * FROM read_parquet('{path}')")
+            self.version = version
+
+    def query(self, sql: str, params: dict = None) -> pd.DataFrame:
+        from utils.dataset_version import get_dataset_version
+
+        self.refresh(get_dataset_version())
+        # DuckDB uses '$name' for named parameters; a cursor is a thread-safe handle
+        duckdb_sql = re.sub(r"(?<!:):(\w+)", r"$\1", sql)
+        return self.connection.cursor().execute(duckdb_sql, params or {}).df()
+
+
+_engine_instance = None
+_engine_lock = threading.Lock()
+
+
+def get_analytics_engine() -> AnalyticsEngine:
+    """Return the (singleton) analytics engine selected by ANALYTICS_ENGINE."""
+    global _engine_instance
+    with _engine_lock:
+        if _engine_instance is None:
+            from utils.connect_database import engine
+
+            if ANALYTICS_ENGINE == "duckdb":
+                _engine_instance = DuckDBAnalyticsEngine(engine)
+            else:
+                _engine_instance = SQLAnalyticsEngine(engine)
+        return _engine_instance
@@ -0,0 +1,69 @@
+"""
+File: backend/utils/bundle.py
+Description:
+    This utility file builds the payload of the /api/v1/bundle endpoint:
+    every dataset the dashboard needs, in a single compact JSON document.
+
+    Each table is encoded as column arrays ({column -> [values]}) instead of
+    a list of objects, so keys such as 'production_thousand_tonnes' appear
+    once per table instead of once per row.
+
+    The payload is built once per dataset revision (i.e. once per seed) and
+    then served from memory.
+
+    Payload layout:
+        {
+          "version": "<dataset revision>",
+          "tables": {
+            "agriculture": {"id": [...], "year": [...], ...},
+            "provinces":   {...},
+            "climate":     {...},
+            "soil":        {...}
+          }
+        }
+"""
+import threading
+
+import orjson
+from sqlmodel import Session
+
+_lock = threading.Lock()
+_cache = {"version": None, "content": None}
+
+
+def encode_columnar(columns, rows) -> dict:
+    """Transpose row tuples into {column -> [values]}."""
+    columns = tuple(columns)
+    rows = list(rows)
+    if not rows:
+        return {name: [] for name in columns}
+    if len(columns) == 1:
+        # session.exec() returns single-column selects as scalars, not tuples
+        return {columns[0]: rows}
+    return {name: list(values) for name, values in zip(columns, zip(*rows))}
+
+
+def build_bundle(session: Session, version: str, queries: dict) -> bytes:
+    """
+    Run every query and encode the results as one JSON document.
+
+    Args:
+        session: Database session.
+        version: Dataset revision the payload is tagged with.
+        queries: {table_name -> (columns, select_query)} where 'columns' are
+                 the output names of the selected columns (in order).
+    """
+    tables = {
+        name: encode_columnar(columns, session.exec(query).all())
+        for name, (columns, query) in queries.items()
+    }
+    return orjson.dumps({"version": version, "tables": tables})
+
+
+def get_bundle(session: Session, version: str, queries: dict) -> bytes:
+    """Return the bundle for 'version', building it only if the revision changed."""
+    with _lock:
+        if _cache["version"] != version:
+            _cache["content"] = build_bundle(session, version, queries)
+            _cache["version"] = version
+        return _cache["content"]
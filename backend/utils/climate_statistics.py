@@ -0,0 +1,286 @@
+"""
+File: backend/utils/climate_statistics.py
+Description:
+    This utility file computes derived climate statistics at seed time
+    (see 'seed_db.py'), so the API only has to look them up.
+
+    The climate table is reshaped into a dense province x year x variable
+    NumPy cube, and every statistic is computed for all provinces and all
+    10 climate variables at once (no per-province loop):
+    - Baseline: Per-province mean and standard deviation of each variable
+      over the baseline period.
+    - Anomaly and z-score: Deviation of each year from its baseline.
+    - Rolling mean and rolling trend: Mean and least-squares slope (per year)
+      over a trailing window of years, computed with cumulative sums.
+    - Normals: Per-province mean, median, standard deviation, min/max,
+      percentiles and the mean of the most recent CLIMATE_RECENT_YEARS years.
+
+    The normals are also cached in memory by the API (get_climate_normals()),
+    where they fill the climate features missing from a prediction request.
+    The API also caches each province's climate history (get_climate_history())
+    to draw climate scenarios for Monte Carlo simulations (sample_climate()):
+    - "bootstrap": Moving-block bootstrap of the historical years (keeps the
+      joint distribution of the 10 variables and short-range persistence).
+    - "normal": Multivariate normal fitted to the historical years.
+
+    Configuration (environment variables):
+    - CLIMATE_BASELINE_FROM / CLIMATE_BASELINE_TO: Baseline period (default: all years).
+    - CLIMATE_ROLLING_WINDOW: Rolling window in years (default 5).
+    - CLIMATE_RECENT_YEARS: Number of recent years of the 'recent_mean' normal (default 10).
+    - CLIMATE_FILL_STATISTIC: Normal used to fill missing prediction features (default 'recent_mean';
+      one of CLIMATE_FILL_STATISTICS, checked at import).
+"""
+import os
+import threading
+import warnings
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+
+CLIMATE_VARIABLES = [
+    "avg_temperature", "min_temperature", "max_temperature", "surface_temperature",
+    "wet_bulb_temperature", "precipitation", "solar_radiation", "relative_humidity",
+    "wind_speed", "surface_pressure",
+]
+
+CLIMATE_BASELINE_FROM = os.environ.get("CLIMATE_BASELINE_FROM")
+CLIMATE_BASELINE_TO = os.environ.get("CLIMATE_BASELINE_TO")
+CLIMATE_ROLLING_WINDOW = int(os.environ.get("CLIMATE_ROLLING_WINDOW", "5"))
+CLIMATE_RECENT_YEARS = int(os.environ.get("CLIMATE_RECENT_YEARS", "10"))
+CLIMATE_FILL_STATISTIC = os.environ.get("CLIMATE_FILL_STATISTIC", "recent_mean")
+
+CLIMATE_PERCENTILES = [10, 25, 75, 90]
+
+# Normals (columns of 'climate_normal') usable as a fill value: every statistic except 'std'
+CLIMATE_FILL_STATISTICS = ["mean", "median", "min", "max", *[f"p{q}" for q in CLIMATE_PERCENTILES], "recent_mean"]
+if CLIMATE_FILL_STATISTIC not in CLIMATE_FILL_STATISTICS:
+    raise ValueError(f"CLIMATE_FILL_STATISTIC must be one of {CLIMATE_FILL_STATISTICS}, got '{CLIMATE_FILL_STATISTIC}'")
+
+_lock = threading.Lock()
+_normals = {"version": None, "normals": None}
+_history = {"version": None, "history": None}
+
+
+def climate_cube(df_climate: pd.DataFrame) -> tuple:
+    """
+    Reshape climate rows into a dense (province, year, variable) array.
+    Missing (province, year) combinations become NaN.
+
+    Returns:
+        tuple: (cube, province_ids, years)
+    """
+    province_ids = np.sort(df_climate["province_id"].unique())
+    years = np.arange(df_climate["year"].min(), df_climate["year"].max() + 1)
+    full_index = pd.MultiIndex.from_product([province_ids, years], names=["province_id", "year"])
+    values = (
+        df_climate.set_index(["province_id", "year"])[CLIMATE_VARIABLES]
+        .reindex(full_index)
+        .to_numpy(dtype=np.float64)
+    )
+    return values.reshape(len(province_ids), len(years), len(CLIMATE_VARIABLES)), province_ids, years
+
+
+def trailing_window_sum(values: np.ndarray, window: int) -> np.ndarray:
+    """
+    Sum of the trailing 'window' entries along the year axis (axis 1).
+    Entry 'i' covers years [i - window + 1, i]; the first 'window - 1' entries are NaN.
+    """
+    cumulative = np.cumsum(values, axis=1)
+    result = np.full(values.shape, np.nan)
+    result[:, window - 1:] = cumulative[:, window - 1:]
+    result[:, window:] -= cumulative[:, :-window]
+    return result
+
+
+def compute_climate_anomalies(df_climate: pd.DataFrame,
+                              window: int = CLIMATE_ROLLING_WINDOW,
+                              baseline_from=CLIMATE_BASELINE_FROM,
+                              baseline_to=CLIMATE_BASELINE_TO) -> pd.DataFrame:
+    """
+    Compute baselines, anomalies, z-scores and rolling statistics for every
+    (province, year, variable), in one vectorized pass over the climate cube.
+
+    Args:
+        df_climate: Climate rows with 'province_id', 'year' and the 10 climate variables.
+
+    Returns:
+        pd.DataFrame: One row per (province_id, variable, year) with a value.
+    """
+    cube, province_ids, years = climate_cube(df_climate)
+    valid = ~np.isnan(cube)
+
+    # 1. Baseline (per province and variable)
+    in_baseline = np.ones(len(years), dtype=bool)
+    if baseline_from is not None:
+        in_baseline &= years >= int(baseline_from)
+    if baseline_to is not None:
+        in_baseline &= years <= int(baseline_to)
+    with warnings.catch_warnings():
+        # Provinces with no value in the baseline period get a NaN baseline
+        warnings.simplefilter("ignore", RuntimeWarning)
+        baseline_mean = np.nanmean(cube[:, in_baseline, :], axis=1, keepdims=True)
+        baseline_std = np.nanstd(cube[:, in_baseline, :], axis=1, ddof=1, keepdims=True)
+
+    # 2. Anomaly and z-score
+    anomaly = cube - baseline_mean
+    with np.errstate(divide="ignore", invalid="ignore"):
+        z_score = np.where(baseline_std > 0, anomaly / baseline_std, np.nan)
+
+    # 3. Rolling mean and least-squares trend over a trailing window (full windows only)
+    t = (years - years[0]).astype(np.float64)[np.newaxis, :, np.newaxis]
+    x = np.where(valid, cube, 0.0)
+    n = trailing_window_sum(valid.astype(np.float64), window)
+    sum_x = trailing_window_sum(x, window)
+    sum_t = trailing_window_sum(np.where(valid, t, 0.0), window)
+    sum_tt = trailing_window_sum(np.where(valid, t * t, 0.0), window)
+    sum_tx = trailing_window_sum(t * x, window)
+    full_window = n == window
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rolling_mean = np.where(full_window, sum_x / n, np.nan)
+        rolling_trend = np.where(
+            full_window & (window > 1),
+            (n * sum_tx - sum_t * sum_x) / (n * sum_tt - sum_t * sum_t),
+            np.nan
+        )
+
+    # 4. Long format: (province, variable, year)
+    shape = cube.shape
+    columns = {
+        "value": cube,
+        "baseline_mean": np.broadcast_to(baseline_mean, shape),
+        "baseline_std": np.broadcast_to(baseline_std, shape),
+        "anomaly": anomaly,
+        "z_score": z_score,
+        "rolling_mean": rolling_mean,
+        "rolling_trend": rolling_trend,
+    }
+    order = (0, 2, 1)  # province, variable, year
+    df = pd.DataFrame({
+        "province_id": np.repeat(province_ids, len(CLIMATE_VARIABLES) * len(years)),
+        "variable": np.tile(np.repeat(CLIMATE_VARIABLES, len(years)), len(province_ids)),
+        "year": np.tile(years, len(province_ids) * len(CLIMATE_VARIABLES)),
+        **{name: np.transpose(values, order).ravel() for name, values in columns.items()},
+    })
+    return df[np.transpose(valid, order).ravel()].reset_index(drop=True)
+
+
+def compute_climate_normals(df_climate: pd.DataFrame, recent_years: int = CLIMATE_RECENT_YEARS) -> pd.DataFrame:
+    """
+    Compute the climate normals of every (province, variable) over all years,
+    in one vectorized pass over the climate cube.
+
+    Returns:
+        pd.DataFrame: One row per (province_id, variable) with at least one value.
+    """
+    cube, province_ids, years = climate_cube(df_climate)
+    valid = ~np.isnan(cube)
+    recent = years > years[-1] - recent_years
+
+    with warnings.catch_warnings():
+        # (province, variable) pairs without any value get NaN statistics (and are dropped below)
+        warnings.simplefilter("ignore", RuntimeWarning)
+        percentiles = np.nanpercentile(cube, [50] + CLIMATE_PERCENTILES, axis=1)
+        columns = {
+            "mean": np.nanmean(cube, axis=1),
+            "median": percentiles[0],
+            "std": np.nanstd(cube, axis=1, ddof=1),
+            "min": np.nanmin(cube, axis=1),
+            "max": np.nanmax(cube, axis=1),
+            **{f"p{q}": percentiles[i + 1] for i, q in enumerate(CLIMATE_PERCENTILES)},
+            "recent_mean": np.nanmean(cube[:, recent, :], axis=1),
+            "n_years": valid.sum(axis=1),
+        }
+
+    df = pd.DataFrame({
+        "province_id": np.repeat(province_ids, len(CLIMATE_VARIABLES)),
+        "variable": np.tile(CLIMATE_VARIABLES, len(province_ids)),
+        "year_from": int(years[0]),
+        "year_to": int(years[-1]),
+        "recent_years": recent_years,
+        **{name: values.ravel() for name, values in columns.items()},
+    })
+    return df[df["n_years"] > 0].reset_index(drop=True)
+
+
+# --- REQUEST TIME ---
+def get_climate_normals(session, version: str, columns, query) -> dict:
+    """
+    Return {province_name -> {variable -> {statistic -> value}}} for 'version',
+    reloading the 'climate_normal' table only if the revision changed.
+    'query' must select 'columns' (including 'province_name' and 'variable').
+    """
+    with _lock:
+        if _normals["version"] != version:
+            normals = defaultdict(dict)
+            for row in session.exec(query).all():
+                record = dict(zip(columns, row))
+                normals[record["province_name"]][record["variable"]] = record
+            _normals["normals"] = dict(normals)
+            _normals["version"] = version
+        return _normals["normals"]
+
+
+def get_climate_history(session, version: str, query) -> dict:
+    """
+    Return {province_name -> (years, 10 variables) array} for 'version',
+    reloading from the database only if the revision changed.
+    Row i is year 'first year + i': a year absent from the table is a row of NaN,
+    so consecutive rows are always consecutive years (see sample_climate).
+    'query' must select 'province_name', 'year' and the CLIMATE_VARIABLES (in this order).
+    """
+    with _lock:
+        if _history["version"] != version:
+            df = pd.DataFrame(session.exec(query).all(), columns=["province_name", "year"] + CLIMATE_VARIABLES)
+            _history["history"] = {
+                province_name: (group.set_index("year")[CLIMATE_VARIABLES]
+                                .reindex(range(group["year"].min(), group["year"].max() + 1))
+                                .to_numpy(dtype=np.float64))
+                for province_name, group in df.groupby("province_name")
+            }
+            _history["version"] = version
+        return _history["history"]
+
+
+def complete_years(history: np.ndarray) -> np.ndarray:
+    """The historical years (rows) of one province without any missing value."""
+    return history[~np.isnan(history).any(axis=1)]
+
+
+def block_starts(history: np.ndarray, block_size: int) -> np.ndarray:
+    """
+    Start rows of every block of 'block_size' consecutive years of 'history'
+    that are all complete (a block never spans a year with a missing value).
+    """
+    complete = (~np.isnan(history).any(axis=1)).astype(np.int64)
+    if len(complete) < block_size:
+        return np.empty(0, dtype=np.int64)
+    window = np.convolve(complete, np.ones(block_size, dtype=np.int64), mode="valid")
+    return np.flatnonzero(window == block_size)
+
+
+def sample_climate(history: np.ndarray, draws: int, method: str, rng: np.random.Generator,
+                   block_size: int = 3) -> np.ndarray:
+    """
+    Draw 'draws' climate vectors (draws x 10 variables) from the historical years of one province
+    ('history' rows are consecutive years, see get_climate_history).
+    - normal: multivariate normal fitted on the complete years (at least 2 required).
+    - bootstrap: moving-block bootstrap over the original year index; only blocks of
+      consecutive complete years are drawn (at least 2 distinct blocks required).
+    Raises ValueError (with the reason) when the history is too incomplete.
+    """
+    if method == "normal":
+        years = complete_years(history)
+        if len(years) < 2:
+            raise ValueError(f"{len(years)} complete climate year(s), at least 2 required")
+        return rng.multivariate_normal(years.mean(axis=0), np.cov(years, rowvar=False), size=draws)
+
+    # Moving-block bootstrap: concatenate random blocks of consecutive complete years
+    starts = block_starts(history, block_size)
+    if len(starts) < 2:
+        raise ValueError(f"{len(starts)} block(s) of {block_size} consecutive complete climate years, "
+                         f"at least 2 required")
+    blocks = -(-draws // block_size)
+    chosen = rng.choice(starts, size=blocks)
+    indices = (chosen[:, np.newaxis] + np.arange(block_size)).ravel()[:draws]
+    return history[indices]
@@ -0,0 +1,303 @@
+"""
+File: backend/utils/column_store.py
+Description:
+    This utility file implements an optional in-process read store for the
+    statistics endpoints. The whole dataset is only a few megabytes, so it can
+    be held in memory and filtered without a database round trip.
+
+    - Each table is held as NumPy column arrays (rows sorted by 'id').
+    - Text columns (commodity, season, region_name, region_level, province_name)
+      are dictionary-encoded: an int32 code per row plus the list of distinct values.
+    - Every distinct value of a dictionary-encoded column gets a bitmap index
+      (a boolean array with one entry per row).
+    - A query (AgricultureQuery, ClimateQuery, ...) is answered by OR-ing the
+      bitmaps of the requested values of each column, AND-ing the columns
+      together and comparing the 'year' array against the year range.
+
+    The database stays the source of truth: the store is loaded at startup and
+    reloaded whenever the dataset version changes (i.e. after each reseed).
+
+    In multi-worker mode (see 'gunicorn.conf.py'), the store is saved once as
+    '.npy' files under SHARED_STORE_DIR (e.g. on /dev/shm) and every worker
+    memory-maps the same files instead of holding its own copy.
+
+    Configuration (environment variables):
+    - READ_STORE: Set to "1" to serve the statistics endpoints from memory (default "0").
+    - SHARED_STORE_DIR: Directory of the shared snapshot (default "": each process
+      keeps a private copy).
+"""
+import json
+import os
+import shutil
+import threading
+import uuid
+
+import numpy as np
+from sqlmodel import Session
+
+READ_STORE_ENABLED = os.environ.get("READ_STORE", "0") != "0"
+SHARED_STORE_DIR = os.environ.get("SHARED_STORE_DIR", "")
+
+# Columns that are dictionary-encoded and get bitmap indexes
+DICTIONARY_COLUMNS = ("commodity", "season", "region_name", "region_level", "province_name")
+
+_lock = threading.Lock()
+_store = {"version": None, "tables": None}
+
+# --- 1. COLUMNS ---
+class DictionaryColumn:
+    """
+    A text column stored as int32 codes, with one bitmap per distinct value.
+    Row 'i' of 'bitmaps' is the bitmap of 'categories[i]'.
+    """
+    kind = "dictionary"
+
+    def __init__(self, codes: np.ndarray, categories: list, bitmaps: np.ndarray):
+        self.codes = codes
+        self.categories = np.array(categories, dtype=object)
+        self.bitmaps = bitmaps
+        self.positions = {value: position for position, value in enumerate(categories)}
+
+    @classmethod
+    def from_values(cls, values: list):
+        lookup = {}
+        codes = np.fromiter(
+            (lookup.setdefault(value, len(lookup)) for value in values),
+            dtype=np.int32, count=len(values)
+        )
+        bitmaps = codes[np.newaxis, :] == np.arange(len(lookup), dtype=np.int32)[:, np.newaxis]
+        return cls(codes, list(lookup), bitmaps)
+
+    def bitmap(self, values: list) -> np.ndarray:
+        """Rows matching ANY of 'values' (OR of their bitmaps)."""
+        result = np.zeros(len(self.codes), dtype=bool)
+        for value in values:
+            position = self.positions.get(value)
+            if position is not None:
+                result |= self.bitmaps[position]
+        return result
+
+    def take(self, indices: np.ndarray) -> list:
+        return self.categories[self.codes[indices]].tolist()
+
+    def arrays(self) -> dict:
+        return {"codes": self.codes, "bitmaps": self.bitmaps}
+
+    def metadata(self) -> dict:
+        return {"categories": self.categories.tolist()}
+
+    @classmethod
+    def from_arrays(cls, arrays: dict, metadata: dict):
+        return cls(arrays["codes"], metadata["categories"], arrays["bitmaps"])
+
+
+class NumericColumn:
+    """A numeric column; NULLs are tracked in a separate mask."""
+    kind = "numeric"
+
+    def __init__(self, values: np.ndarray, nulls: np.ndarray = None):
+        self.values = values
+        self.nulls = nulls
+
+    @classmethod
+    def from_values(cls, values: list):
+        nulls = np.fromiter((value is None for value in values), dtype=bool, count=len(values))
+        is_integer = all(isinstance(value, int) for value in values if value is not None)
+        dtype = np.int64 if is_integer else np.float64
+        array = np.array([0 if value is None else value for value in values], dtype=dtype)
+        return cls(array, nulls if nulls.any() else None)
+
+    def take(self, indices: np.ndarray) -> list:
+        values = self.values[indices].tolist()
+        if self.nulls is not None:
+            for position in np.flatnonzero(self.nulls[indices]):
+                values[position] = None
+        return values
+
+    def arrays(self) -> dict:
+        return {"values": self.values} if self.nulls is None else {"values": self.values, "nulls": self.nulls}
+
+    def metadata(self) -> dict:
+        return {}
+
+    @classmethod
+    def from_arrays(cls, arrays: dict, metadata: dict):
+        return cls(arrays["values"], arrays.get("nulls"))
+
+
+COLUMN_KINDS = {column.kind: column for column in (DictionaryColumn, NumericColumn)}
+
+# --- 2. TABLE ---
+class ColumnTable:
+    """One table of the read store: {column name -> column}, in output order."""
+
+    def __init__(self, columns: dict, size: int):
+        self.columns = columns
+        self.size = size
+
+    @classmethod
+    def from_rows(cls, columns, rows: list):
+        columns = tuple(columns)
+        if len(columns) == 1:
+            rows = [(value,) for value in rows]
+        values_by_column = list(zip(*rows)) if rows else [() for _ in columns]
+        return cls({
+            name: (DictionaryColumn if name in DICTIONARY_COLUMNS else NumericColumn).from_values(list(values))
+            for name, values in zip(columns, values_by_column)
+        }, len(rows))
+
+    def filter(self, equals: dict, year_range: tuple) -> np.ndarray:
+        """
+        Return the indices of the matching rows (in 'id' order).
+
+        Args:
+            equals: {column -> list of accepted values} for dictionary-encoded columns.
+            year_range: (low, high) inclusive bounds on 'year', either may be None.
+        """
+        mask = np.ones(self.size, dtype=bool)
+        for name, values in equals.items():
+            mask &= self.columns[name].bitmap(values)
+        low, high = year_range
+        if low is not None or high is not None:
+            years = self.columns["year"].values
+            if low is not None:
+                mask &= years >= low
+            if high is not None:
+                mask &= years <= high
+        return np.flatnonzero(mask)
+
+    def rows(self, names, indices: np.ndarray) -> list:
+        """
+        Materialize the selected rows, like session.exec(select(...)).all():
+        tuples for several columns, scalars for a single column.
+        """
+        values = [self.columns[name].take(indices) for name in names]
+        if len(values) == 1:
+            return values[0]
+        return list(zip(*values))
+
+    def save(self, directory: str):
+        """Write every array to '<column>.<array>.npy' plus a 'table.json' manifest."""
+        os.makedirs(directory, exist_ok=True)
+        manifest = {"size": self.size, "columns": []}
+        for name, column in self.columns.items():
+            arrays = column.arrays()
+            for array_name, array in arrays.items():
+                np.save(os.path.join(directory, f"{name}.{array_name}.npy"), np.asarray(array))
+            manifest["columns"].append({
+                "name": name, "kind": column.kind, "arrays": list(arrays), **column.metadata()
+            })
+        with open(os.path.join(directory, "table.json"), "w") as f:
+            json.dump(manifest, f)
+
+    @classmethod
+    def load(cls, directory: str):
+        """
+        Open a table written by save(). Arrays are memory-mapped (read-only), so
+        every process opening the same files shares one copy in the page cache.
+        """
+        with open(os.path.join(directory, "table.json")) as f:
+            manifest = json.load(f)
+        columns = {}
+        for entry in manifest["columns"]:
+            arrays = {
+                array_name: np.load(os.path.join(directory, f"{entry['name']}.{array_name}.npy"), mmap_mode="r")
+                for array_name in entry["arrays"]
+            }
+            columns[entry["name"]] = COLUMN_KINDS[entry["kind"]].from_arrays(arrays, entry)
+        return cls(columns, manifest["size"])
+
+# --- 3. QUERY TRANSLATION ---
+def filter_conditions(query_params) -> tuple:
+    """
+    Translate a query class (AgricultureQuery, ClimateQuery, SoilQuery, ...)
+    into the (equals, year_range) arguments of ColumnTable.filter().
+    """
+    equals = {}
+    for name in DICTIONARY_COLUMNS:
+        value = getattr(query_params, name, None)
+        if value:
+            values = value if isinstance(value, list) else [value]
+            equals[name] = [getattr(item, "value", item) for item in values]
+
+    low = getattr(query_params, "year_from", None)
+    high = getattr(query_params, "year_to", None)
+    year = getattr(query_params, "year", None)
+    if year is not None:
+        low = year if low is None else max(low, year)
+        high = year if high is None else min(high, year)
+    to_int = lambda value: None if value is None else int(value)
+    return equals, (to_int(low), to_int(high))
+
+
+def read_rows(table: ColumnTable, names, query_params) -> tuple:
+    """
+    Filter a table with 'query_params', then apply 'skip'/'limit' and project 'names'.
+
+    Returns:
+        tuple: (rows, total) - 'total' is the number of matching rows before 'skip'/'limit'.
+    """
+    indices = table.filter(*filter_conditions(query_params))
+    stop = None if query_params.limit is None else query_params.skip + query_params.limit
+    return table.rows(names, indices[query_params.skip:stop]), len(indices)
+
+# --- 4. SHARED SNAPSHOT (MULTI-WORKER MODE) ---
+def shared_snapshot_path(version: str, directory: str = SHARED_STORE_DIR) -> str:
+    return os.path.join(directory, version)
+
+
+def export_shared_store(tables: dict, version: str, directory: str = SHARED_STORE_DIR):
+    """
+    Save every table under '<directory>/<version>/'.
+    The snapshot is written to a temporary directory and renamed, so other
+    processes only ever see a complete snapshot. Older versions are removed.
+    """
+    target = shared_snapshot_path(version, directory)
+    if os.path.isdir(target):
+        return
+    staging = os.path.join(directory, f".staging-{uuid.uuid4().hex}")
+    for name, table in tables.items():
+        table.save(os.path.join(staging, name))
+    try:
+        os.rename(staging, target)
+    except OSError:
+        # Another process published the same version first
+        shutil.rmtree(staging, ignore_errors=True)
+    for entry in os.listdir(directory):
+        if entry != version and not entry.startswith(".staging-"):
+            shutil.rmtree(os.path.join(directory, entry), ignore_errors=True)
+
+
+def load_shared_store(version: str, directory: str = SHARED_STORE_DIR):
+    """Open the memory-mapped snapshot of 'version' (None if it was not published yet)."""
+    target = shared_snapshot_path(version, directory)
+    if not os.path.isdir(target):
+        return None
+    return {name: ColumnTable.load(os.path.join(target, name)) for name in os.listdir(target)}
+
+# --- 5. STORE LIFECYCLE ---
+def load_store(session: Session, queries: dict) -> dict:
+    """Run every query and build {table_name -> ColumnTable}."""
+    return {
+        name: ColumnTable.from_rows(columns, session.exec(query).all())
+        for name, (columns, query) in queries.items()
+    }
+
+
+def get_read_store(session: Session, version: str, queries: dict) -> dict:
+    """
+    Return the store for 'version', reloading it only if the revision changed.
+    In multi-worker mode (SHARED_STORE_DIR set), the store is opened from the shared
+    snapshot, and built from the database (then published) only if it is missing.
+    """
+    with _lock:
+        if _store["version"] != version:
+            tables = load_shared_store(version) if SHARED_STORE_DIR else None
+            if tables is None:
+                tables = load_store(session, queries)
+                if SHARED_STORE_DIR:
+                    export_shared_store(tables, version)
+                    tables = load_shared_store(version)
+            _store["tables"] = tables
+            _store["version"] = version
+        return _store["tables"]
@@ -0,0 +1,156 @@
+"""
+File: backend/utils/compression.py
+Description:
+    This utility file provides an ASGI middleware that compresses API responses
+    (the statistics payloads are large, verbose JSON with repeated keys).
+
+    It performs the following tasks:
+    1. Negotiates the encoding from the client's 'Accept-Encoding' header
+       (q-values are respected; ties prefer zstd > br > gzip).
+    2. Compresses complete response bodies larger than a size threshold. Bodies
+       larger than COMPRESSION_THREAD_MIN_SIZE are compressed in a worker thread,
+       so a multi-megabyte payload does not block the event loop.
+    3. Turns a strong 'ETag' into a weak one ('W/"..."') on compressed responses
+       (the bytes differ from the uncompressed representation).
+    4. Leaves streaming responses, already-encoded responses and small bodies untouched.
+
+    'brotli' and 'zstandard' are optional: when a package is not installed,
+    that encoding is simply never offered and the middleware falls back to gzip.
+
+    Configuration (environment variables):
+    - COMPRESSION_MIN_SIZE: Minimum body size in bytes to compress (default 1024).
+    - COMPRESSION_THREAD_MIN_SIZE: Body size in bytes from which compression runs in a thread (default 65536).
+    - COMPRESSION_GZIP_LEVEL: gzip level 1-9 (default 6).
+    - COMPRESSION_BROTLI_QUALITY: brotli quality 0-11 (default 5).
+    - COMPRESSION_ZSTD_LEVEL: zstd level 1-22 (default 3).
+"""
+import gzip
+import os
+
+import anyio.to_thread
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+COMPRESSION_MIN_SIZE = int(os.environ.get("COMPRESSION_MIN_SIZE", "1024"))
+COMPRESSION_THREAD_MIN_SIZE = int(os.environ.get("COMPRESSION_THREAD_MIN_SIZE", "65536"))
+COMPRESSION_GZIP_LEVEL = int(os.environ.get("COMPRESSION_GZIP_LEVEL", "6"))
+COMPRESSION_BROTLI_QUALITY = int(os.environ.get("COMPRESSION_BROTLI_QUALITY", "5"))
+COMPRESSION_ZSTD_LEVEL = int(os.environ.get("COMPRESSION_ZSTD_LEVEL", "3"))
+
+# Server-side preference order (best ratio/speed first), limited to installed codecs
+SUPPORTED_ENCODINGS = [
+    encoding for encoding, available in (
+        ("zstd", zstandard is not None),
+        ("br", brotli is not None),
+        ("gzip", True),
+    ) if available
+]
+
+
+def negotiate_encoding(accept_encoding: str):
+    """
+    Pick the response encoding for an 'Accept-Encoding' header value.
+
+    Returns:
+        str | None: 'zstd', 'br', 'gzip' or None (send the body uncompressed).
+    """
+    accepted = {}
+    for item in accept_encoding.split(","):
+        parts = [part.strip() for part in item.split(";")]
+        name = parts[0].lower()
+        if not name:
+            continue
+        q = 1.0
+        for param in parts[1:]:
+            if param.startswith("q="):
+                try:
+                    q = float(param[2:])
+                except ValueError:
+                    q = 0.0
+        accepted[name] = q
+
+    best, best_q = None, 0.0
+    for encoding in SUPPORTED_ENCODINGS:
+        q = accepted.get(encoding, accepted.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def compress_body(body: bytes, encoding: str) -> bytes:
+    """Compress a response body with the negotiated encoding."""
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(level=COMPRESSION_ZSTD_LEVEL).compress(body)
+    if encoding == "br":
+        return brotli.compress(body, quality=COMPRESSION_BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=COMPRESSION_GZIP_LEVEL)
+
+
+class CompressionMiddleware:
+    """
+    ASGI middleware compressing complete (non-streaming) HTTP responses.
+    Usage: app.add_middleware(CompressionMiddleware)
+    """
+    def __init__(self, app, minimum_size: int = COMPRESSION_MIN_SIZE,
+                 thread_minimum_size: int = COMPRESSION_THREAD_MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.thread_minimum_size = thread_minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start_message, passthrough
+            if message["type"] == "http.response.start":
+                # Hold the headers until we know the body size
+                start_message = message
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            headers = MutableHeaders(raw=start_message["headers"])
+            if (message.get("more_body", False)
+                    or len(body) < self.minimum_size
+                    or "content-encoding" in headers):
+                # Streaming, small or already-encoded body: send as-is
+                passthrough = True
+                await send(start_message)
+                await send(message)
+                return
+
+            if len(body) >= self.thread_minimum_size:
+                compressed = await anyio.to_thread.run_sync(compress_body, body, encoding)
+            else:
+                compressed = compress_body(body, encoding)
+            etag = headers.get("etag")
+            if etag and not etag.startswith("W/"):
+                headers["ETag"] = f"W/{etag}"
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(compressed))
+            headers.add_vary_header("Accept-Encoding")
+            await send(start_message)
+            await send({"type": "http.response.body", "body": compressed, "more_body": False})
+
+        await self.app(scope, receive, send_wrapper)
@@ -12,9 +12,12 @@ Description:
     3. Creates a single SQLAlchemy 'engine' for the entire application.
     4. Provides 'get_session' function (Dependency Injection) so FastAPI
        can "borrow" a session connection for each API request.
+    5. Installs the query profiler (utils/query_profiler.py) on the engine
+       so that slow statements are logged together with their EXPLAIN plan.
 """
 import os
 from sqlmodel import create_engine, Session, SQLModel
+from utils.query_profiler import install_query_profiler
 
 # --- SYNCHRONIZE DEFAULT VALUES ---
 DB_USER_DEFAULT = "vietnamagriculture"
@@ -40,6 +43,9 @@ URL_DB = f"postgresql://{DB_USER}:{DB_PASS}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
 # Create engine from dynamic URL
 engine = create_engine(URL_DB, echo=True)
 
+# Time every statement executed through this engine
+install_query_profiler(engine)
+
 def get_session():
     """
     Dependency Injection (DI) function for FastAPI.
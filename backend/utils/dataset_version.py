@@ -0,0 +1,49 @@
+"""
+File: backend/utils/dataset_version.py
+Description:
+    This utility file tells the API which dataset revision is currently loaded.
+
+    'seed_db.py' writes a new row to the 'dataset_version' table at the end of
+    every seed run. In-memory caches (e.g. the /bundle payload) are tagged with
+    this revision and rebuilt when it changes.
+
+    To keep the check cheap, the revision is read from the database at most
+    once every DATASET_VERSION_TTL seconds (default 5).
+"""
+import os
+import threading
+import time
+
+from sqlmodel import Session, select
+
+from model import DatasetVersion
+from utils.connect_database import engine
+
+DATASET_VERSION_TTL = float(os.environ.get("DATASET_VERSION_TTL", "5"))
+
+# Revision reported when the database was seeded before versioning existed
+UNVERSIONED = "unversioned"
+
+_lock = threading.Lock()
+_cached_revision = None
+_checked_at = 0.0
+
+
+def read_dataset_version() -> str:
+    """Read the latest revision from the database (no caching)."""
+    with Session(engine) as session:
+        revision = session.exec(
+            select(DatasetVersion.revision).order_by(DatasetVersion.id.desc()).limit(1)
+        ).first()
+    return revision or UNVERSIONED
+
+
+def get_dataset_version() -> str:
+    """Return the current dataset revision, refreshed at most every DATASET_VERSION_TTL seconds."""
+    global _cached_revision, _checked_at
+    with _lock:
+        now = time.monotonic()
+        if _cached_revision is None or now - _checked_at >= DATASET_VERSION_TTL:
+            _cached_revision = read_dataset_version()
+            _checked_at = now
+        return _cached_revision
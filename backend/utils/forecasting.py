@@ -0,0 +1,124 @@
+"""
+File: backend/utils/forecasting.py
+Description:
+    This utility file computes, at seed time, baseline trend forecasts for
+    EVERY agricultural series up to FORECAST_HORIZON (default 2050).
+
+    A series is one (region_level, region_name, commodity, season, metric),
+    for the 3 metrics (production, area, yield; missing values imputed first)
+    and every region level (province, region, country).
+    Seasons are separate series, so no seasonal dummies are needed.
+
+    Each series gets a linear trend  y = intercept + slope * t  fitted by least
+    squares. All series are fitted together: the series are stacked into one
+    (series x year) matrix with NaN for missing years, the per-series 2x2
+    normal equations are built with masked sums, and ONE batched
+    np.linalg.solve call solves them all (no Python loop per series).
+
+    The interval is the usual OLS prediction interval (normal approximation):
+        forecast +/- z * sigma * sqrt(1 + 1/n + (t - mean_t)^2 / Sxx)
+    Forecasts and bounds are clipped at 0 (the metrics cannot be negative).
+
+    Configuration (environment variables, read at seed time):
+    - FORECAST_HORIZON: Last forecast year (default 2050).
+    - FORECAST_MIN_POINTS: Minimum number of observed years to fit a series (default 5).
+    - FORECAST_INTERVAL_Z: z-value of the interval (default 1.96, i.e. ~95%).
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+from utils.agriculture_statistics import AGRICULTURE_METRICS, impute_agriculture_metrics
+
+FORECAST_HORIZON = int(os.environ.get("FORECAST_HORIZON", "2050"))
+FORECAST_MIN_POINTS = int(os.environ.get("FORECAST_MIN_POINTS", "5"))
+FORECAST_INTERVAL_Z = float(os.environ.get("FORECAST_INTERVAL_Z", "1.96"))
+
+SERIES_KEYS = ["region_level", "region_name", "commodity", "season", "metric"]
+
+
+def series_matrix(df_agriculture: pd.DataFrame) -> tuple:
+    """
+    Stack every series into a (series, year) matrix (NaN for missing years).
+
+    Returns:
+        tuple: (keys, years, values) - 'keys' is a DataFrame with one row per series.
+    """
+    df = impute_agriculture_metrics(df_agriculture)
+    df_long = df.melt(
+        id_vars=["region_level", "region_name", "commodity", "season", "year"],
+        value_vars=AGRICULTURE_METRICS, var_name="metric", value_name="value"
+    ).dropna(subset=["value"])
+    # Several rows of one series and year (should not happen) are summed
+    matrix = df_long.pivot_table(index=SERIES_KEYS, columns="year", values="value", aggfunc="sum")
+    years = np.arange(matrix.columns.min(), matrix.columns.max() + 1)
+    matrix = matrix.reindex(columns=years)
+    return matrix.index.to_frame(index=False), years, matrix.to_numpy(dtype=np.float64)
+
+
+def fit_linear_trends(years: np.ndarray, values: np.ndarray, min_points: int = FORECAST_MIN_POINTS) -> dict:
+    """
+    Fit y = intercept + slope * t for every row of 'values' with ONE batched solve.
+    Rows with fewer than 'min_points' observations (or a single distinct year) get NaN.
+    """
+    observed = ~np.isnan(values)
+    y = np.where(observed, values, 0.0)
+    t = (years - years[0]).astype(np.float64)[np.newaxis, :]
+    w = observed.astype(np.float64)
+
+    n = w.sum(axis=1)
+    sum_t = (w * t).sum(axis=1)
+    sum_tt = (w * t * t).sum(axis=1)
+    sum_y = y.sum(axis=1)
+    sum_ty = (t * y).sum(axis=1)
+
+    # Normal equations, one 2x2 system per series: [[n, St], [St, Stt]] @ [a, b] = [Sy, Sty]
+    sxx = sum_tt - sum_t ** 2 / np.maximum(n, 1)
+    fitted = (n >= max(min_points, 3)) & (sxx > 0)
+    lhs = np.stack([np.stack([n, sum_t], axis=-1), np.stack([sum_t, sum_tt], axis=-1)], axis=-2)
+    rhs = np.stack([sum_y, sum_ty], axis=-1)
+    coefficients = np.full((len(values), 2), np.nan)
+    coefficients[fitted] = np.linalg.solve(lhs[fitted], rhs[fitted][..., np.newaxis])[..., 0]
+    intercept, slope = coefficients[:, 0], coefficients[:, 1]
+
+    residuals = np.where(observed, values - (intercept[:, np.newaxis] + slope[:, np.newaxis] * t), 0.0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sigma = np.sqrt((residuals ** 2).sum(axis=1) / (n - 2))
+        t_mean = sum_t / n
+    return {
+        "intercept": intercept, "slope": slope, "sigma": sigma,
+        "n": n, "t_mean": t_mean, "sxx": sxx, "fitted": fitted,
+    }
+
+
+def compute_agriculture_forecasts(df_agriculture: pd.DataFrame,
+                                  horizon: int = FORECAST_HORIZON,
+                                  z: float = FORECAST_INTERVAL_Z) -> pd.DataFrame:
+    """
+    Forecast every series from the year after the last year of the dataset up to 'horizon'.
+
+    Returns:
+        pd.DataFrame: One row per (series, forecast year) with 'forecast', 'lower', 'upper'.
+    """
+    keys, years, values = series_matrix(df_agriculture)
+    fit = fit_linear_trends(years, values)
+
+    future_years = np.arange(years[-1] + 1, horizon + 1)
+    t_future = (future_years - years[0]).astype(np.float64)[np.newaxis, :]
+    forecast = fit["intercept"][:, np.newaxis] + fit["slope"][:, np.newaxis] * t_future
+    with np.errstate(divide="ignore", invalid="ignore"):
+        spread = z * fit["sigma"][:, np.newaxis] * np.sqrt(
+            1 + 1 / fit["n"][:, np.newaxis]
+            + (t_future - fit["t_mean"][:, np.newaxis]) ** 2 / fit["sxx"][:, np.newaxis]
+        )
+
+    series = np.flatnonzero(fit["fitted"])
+    df = keys.iloc[np.repeat(series, len(future_years))].reset_index(drop=True)
+    df["year"] = np.tile(future_years, len(series))
+    df["forecast"] = np.clip(forecast[series].ravel(), 0, None)
+    df["lower"] = np.clip((forecast - spread)[series].ravel(), 0, None)
+    df["upper"] = np.clip((forecast + spread)[series].ravel(), 0, None)
+    df["slope"] = np.repeat(fit["slope"][series], len(future_years))
+    df["n_points"] = np.repeat(fit["n"][series], len(future_years)).astype(int)
+    return df
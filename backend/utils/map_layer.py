@@ -0,0 +1,87 @@
+"""
+File: backend/utils/map_layer.py
+Description:
+    This utility file precomputes, at seed time, the rows of the 3D region map
+    of the "Geographic Analysis" page (a PyDeck ColumnLayer):
+    one column per (year, metric, economic region, commodity).
+
+    For each row it stores everything the page needs to render it:
+    - The (imputed) metric summed over the region's rows.
+    - The column position: the region's center, shifted by a fixed per-commodity
+      offset ("jitter") so the columns of one region do not overlap.
+    - The commodity colour and the formatted tooltip value.
+
+    Only the elevation depends on the request (it is scaled so the tallest
+    selected column is MAP_MAX_COLUMN_HEIGHT meters), see scale_elevations().
+"""
+import pandas as pd
+
+from utils.agriculture_statistics import AGRICULTURE_METRICS, impute_agriculture_metrics
+
+# Tallest column of a map, in meters
+MAP_MAX_COLUMN_HEIGHT = 500000
+
+# --- 1. CENTER COORDINATES FOR REGIONS ---
+REGION_COORDS = {
+    "Dong bang song Hong": {"lon": 105.9700701, "lat": 20.9038458},
+    "Trung du va mien nui phia Bac": {"lon": 104.6583622, "lat": 21.5824578},
+    "Bac Trung Bo va Duyen hai mien Trung": {"lon": 105.9709102, "lat": 17.9481570},
+    "Tay Nguyen": {"lon": 108.2376892, "lat": 13.0653077},
+    "Dong Nam Bo": {"lon": 106.9122119, "lat": 11.2193217},
+    "Dong bang song Cuu Long": {"lon": 105.5996987, "lat": 10.0718802}
+}
+
+# --- 2. JITTER MAP AND COLOR SCHEME ---
+COMMODITY_VISUALS = {
+    "rice":         {'off_lon': 0.0,  'off_lat': 0.0,  'color': [0, 128, 255]},
+    "maize":        {'off_lon': 0.3,  'off_lat': 0.0,  'color': [255, 255, 0]},
+    "cassava":      {'off_lon': -0.3, 'off_lat': 0.0,  'color': [139, 69, 19]},
+    "sweet_potato": {'off_lon': 0.0,  'off_lat': 0.3,  'color': [255, 165, 0]},
+    "sugarcane":    {'off_lon': 0.3,  'off_lat': 0.3,  'color': [0, 255, 0]},
+    "groundnut":    {'off_lon': -0.3, 'off_lat': -0.3, 'color': [255, 0, 0]}
+}
+DEFAULT_VISUAL = {'off_lon': 0.0, 'off_lat': 0.0, 'color': [128, 128, 128]}
+
+
+# --- 3. PRECOMPUTATION (SEED TIME) ---
+def compute_region_map_layer(df_agriculture: pd.DataFrame) -> pd.DataFrame:
+    """
+    Build the rows of the 'region_map_layer' table from the agriculture rows.
+    Only regions with known coordinates and strictly positive values are kept.
+    """
+    df = impute_agriculture_metrics(df_agriculture[df_agriculture["region_level"] == "region"])
+    df = df[df["region_name"].isin(REGION_COORDS.keys())]
+
+    df_long = (
+        df.groupby(["year", "region_name", "commodity"])[AGRICULTURE_METRICS].sum()
+        .reset_index()
+        .melt(id_vars=["year", "region_name", "commodity"], var_name="metric", value_name="value")
+    )
+    df_long = df_long[df_long["value"] > 0]
+
+    regions = pd.DataFrame.from_dict(REGION_COORDS, orient="index").rename_axis("region_name").reset_index()
+    visuals = pd.DataFrame([
+        {"commodity": commodity, "off_lon": visual["off_lon"], "off_lat": visual["off_lat"],
+         "color_r": visual["color"][0], "color_g": visual["color"][1], "color_b": visual["color"][2]}
+        for commodity, visual in COMMODITY_VISUALS.items()
+    ])
+    df_long = df_long.merge(regions, on="region_name", how="inner").merge(visuals, on="commodity", how="left")
+    for column in ("off_lon", "off_lat"):
+        df_long[column] = df_long[column].fillna(DEFAULT_VISUAL[column])
+    for column, default in zip(("color_r", "color_g", "color_b"), DEFAULT_VISUAL["color"]):
+        df_long[column] = df_long[column].fillna(default).astype(int)
+
+    df_long["longitude"] = df_long["lon"] + df_long["off_lon"]
+    df_long["latitude"] = df_long["lat"] + df_long["off_lat"]
+    df_long["value_label"] = df_long["value"].map("{:,.2f}".format)
+
+    columns = ["year", "metric", "region_name", "commodity", "value", "value_label",
+               "longitude", "latitude", "color_r", "color_g", "color_b"]
+    return df_long[columns].sort_values(["year", "metric", "region_name", "commodity"]).reset_index(drop=True)
+
+
+# --- 4. REQUEST TIME ---
+def scale_elevations(values: list) -> list:
+    """Column heights in meters, scaled so the largest value is MAP_MAX_COLUMN_HEIGHT."""
+    max_value = max(values, default=0) or 1
+    return [value * MAP_MAX_COLUMN_HEIGHT / max_value for value in values]
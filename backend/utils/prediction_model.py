@@ -0,0 +1,217 @@
+"""
+File: backend/utils/prediction_model.py
+Description:
+    This utility file defines the yield/area model behind POST /api/v1/predict,
+    shared by the offline training command ('train_model.py') and the API.
+
+    - Features: the 21 fields of 'PredictionInput'. Numeric features (year,
+      10 climate, 7 soil) are standardized (missing values become the training
+      mean); province, commodity and season are one-hot encoded. Optionally,
+      every numeric feature is crossed with the commodity ('interactions'),
+      so each crop gets its own climate/soil response, and each
+      (province, commodity, season) series gets its own level ('series_effects').
+    - Targets: log(1 + area) and log(1 + yield), fitted together with ONE
+      ridge regression (closed-form NumPy solve). Production is derived as
+      yield * area / 10, consistent with the dashboard.
+    - Artifacts: one versioned directory per training run under MODEL_DIR
+      (one '.npy' file per array, 'model.json' encoding/hyperparameters, 'metrics.json').
+      The LATEST file, written last, names the current version. The arrays are
+      opened memory-mapped (read-only), so every worker process of the
+      multi-worker mode shares the same pages instead of holding its own copy.
+
+    Scoring is vectorized: score() scores any number of rows at once, with the
+    current model or, until one is trained, with the original mock formula.
+
+    Configuration (environment variables):
+    - MODEL_DIR: Directory of the model artifacts (default 'backend/models').
+"""
+import json
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from utils.analytics_engine import CLIMATE_FEATURES, SOIL_FEATURES
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODEL_DIR = os.environ.get("MODEL_DIR", os.path.join(BASE_DIR, "models"))
+MODEL_LATEST_FILE = "LATEST"
+
+MODEL_ARRAYS = ["means", "stds", "coef", "intercept"]
+
+NUMERIC_FEATURES = ["year"] + CLIMATE_FEATURES + SOIL_FEATURES
+CATEGORICAL_FEATURES = ["province_name", "commodity", "season"]
+TARGETS = ["area_thousand_ha", "yield_ta_per_ha"]
+
+_lock = threading.Lock()
+_model = {"version": None, "model": None}
+
+
+# --- 1. MODEL ---
+class PredictionModel:
+    """Ridge regression on the encoded 21 features, predicting log(1 + area) and log(1 + yield)."""
+
+    def __init__(self, params: dict, means: np.ndarray, stds: np.ndarray, categories: dict,
+                 coef: np.ndarray, intercept: np.ndarray, version: str = None):
+        self.params = params  # {'alpha': float, 'interactions': bool, 'series_effects': bool}
+        self.means, self.stds = means, stds
+        self.categories = categories  # {feature -> list of known values}
+        self.coef, self.intercept = coef, intercept
+        self.version = version
+
+    @classmethod
+    def fit(cls, df: pd.DataFrame, alpha: float, interactions: bool, series_effects: bool) -> "PredictionModel":
+        """Fit on rows of the feature matrix (rows with a missing or non-positive target are ignored)."""
+        df = training_rows(df)
+        numeric = df[NUMERIC_FEATURES].to_numpy(dtype=np.float64)
+        means = np.nanmean(numeric, axis=0)
+        stds = np.nanstd(numeric, axis=0)
+        stds[~(stds > 0)] = 1.0
+        categories = {name: sorted(df[name].dropna().unique().tolist()) for name in CATEGORICAL_FEATURES}
+        if series_effects:
+            categories["series"] = sorted(series_keys(df).unique().tolist())
+        params = {"alpha": float(alpha), "interactions": bool(interactions), "series_effects": bool(series_effects)}
+        model = cls(params, means, stds, categories, None, None)
+
+        x = model.design_matrix(df)
+        y = np.log1p(df[TARGETS].to_numpy(dtype=np.float64))
+        x_mean, y_mean = x.mean(axis=0), y.mean(axis=0)
+        xc = x - x_mean
+        # Ridge normal equations; the intercept is not penalized (centered data)
+        gram = xc.T @ xc
+        gram[np.diag_indices_from(gram)] += alpha
+        model.coef = np.linalg.solve(gram, xc.T @ (y - y_mean))
+        model.intercept = y_mean - x_mean @ model.coef
+        return model
+
+    def design_matrix(self, df: pd.DataFrame) -> np.ndarray:
+        """Encode the 21 features of 'df' into the model's design matrix (one row per input row)."""
+        numeric = (df[NUMERIC_FEATURES].to_numpy(dtype=np.float64) - self.means) / self.stds
+        numeric = np.nan_to_num(numeric, nan=0.0)
+        blocks = [numeric]
+        one_hot = {}
+        for name in self.categories:
+            # Unknown values (not seen in training) get an all-zero encoding
+            values = series_keys(df) if name == "series" else df[name]
+            codes = pd.Categorical(values, categories=self.categories[name]).codes
+            encoded = np.zeros((len(df), len(self.categories[name])))
+            known = codes >= 0
+            encoded[np.flatnonzero(known), codes[known]] = 1.0
+            one_hot[name] = encoded
+            blocks.append(encoded)
+        if self.params["interactions"]:
+            crossed = one_hot["commodity"][:, :, np.newaxis] * numeric[:, np.newaxis, :]
+            blocks.append(crossed.reshape(len(df), -1))
+        return np.hstack(blocks)
+
+    def predict(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Predicted area, yield and production for every row of 'df' (one vectorized pass)."""
+        log_predictions = self.design_matrix(df) @ self.coef + self.intercept
+        area, yield_ = np.clip(np.expm1(log_predictions), 0, None).T
+        return pd.DataFrame({
+            "predicted_area": area,
+            "predicted_yield": yield_,
+            "predicted_production": yield_ * area / 10,
+        }, index=df.index)
+
+    # --- 2. ARTIFACTS ---
+    def save(self, directory: str, metrics: dict):
+        """Write the arrays, the encoding/hyperparameters and the metrics into 'directory'."""
+        os.makedirs(directory, exist_ok=True)
+        for name in MODEL_ARRAYS:
+            np.save(os.path.join(directory, f"{name}.npy"), getattr(self, name))
+        with open(os.path.join(directory, "model.json"), "w") as f:
+            json.dump({
+                "params": self.params,
+                "categories": self.categories,
+                "numeric_features": NUMERIC_FEATURES,
+                "targets": TARGETS,
+            }, f, indent=2)
+        with open(os.path.join(directory, "metrics.json"), "w") as f:
+            json.dump(metrics, f, indent=2)
+
+    @classmethod
+    def load(cls, directory: str, version: str = None) -> "PredictionModel":
+        """Load an artifact; the arrays are memory-mapped read-only (shared by all processes)."""
+        if os.path.exists(os.path.join(directory, "model.npz")):
+            # Artifacts written before the arrays were split into '.npy' files (cannot be memory-mapped)
+            arrays = dict(np.load(os.path.join(directory, "model.npz")))
+        else:
+            arrays = {name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r") for name in MODEL_ARRAYS}
+        with open(os.path.join(directory, "model.json")) as f:
+            spec = json.load(f)
+        return cls(spec["params"], arrays["means"], arrays["stds"], spec["categories"],
+                   arrays["coef"], arrays["intercept"], version)
+
+
+def series_keys(df: pd.DataFrame) -> pd.Series:
+    """'province|commodity|season' key of every row (the level of a series)."""
+    return df["province_name"].astype(str) + "|" + df["commodity"].astype(str) + "|" + df["season"].astype(str)
+
+
+def training_rows(df: pd.DataFrame) -> pd.DataFrame:
+    """Rows of the feature matrix usable as training examples (both targets known and positive)."""
+    return df[(df[TARGETS] > 0).all(axis=1)]
+
+
+def publish_model(model: PredictionModel, metrics: dict, version: str, directory: str = MODEL_DIR) -> str:
+    """
+    Save 'model' as '<directory>/<version>/' and make it the current model.
+    The LATEST file is replaced last, so the API never loads a half-written artifact.
+    """
+    path = os.path.join(directory, version)
+    model.save(path, metrics)
+    latest = os.path.join(directory, MODEL_LATEST_FILE)
+    with open(latest + ".tmp", "w") as f:
+        f.write(version)
+    os.replace(latest + ".tmp", latest)
+    return path
+
+
+def read_latest_version(directory: str = MODEL_DIR):
+    """Return the version named by the LATEST file (None if no model was trained yet)."""
+    try:
+        with open(os.path.join(directory, MODEL_LATEST_FILE)) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def get_prediction_model(directory: str = MODEL_DIR):
+    """Return the current model (reloaded only when LATEST changes), or None if there is none."""
+    version = read_latest_version(directory)
+    with _lock:
+        if version is None:
+            return None
+        if _model["version"] != version:
+            _model["model"] = PredictionModel.load(os.path.join(directory, version), version)
+            _model["version"] = version
+        return _model["model"]
+
+
+# --- 3. SCORING ---
+def mock_predict(df: pd.DataFrame) -> pd.DataFrame:
+    """The placeholder (MOCK) formula used before any model is trained, vectorized."""
+    temperature = df["avg_temperature"].astype(np.float64).fillna(0.0)
+    precipitation = df["precipitation"].astype(np.float64).fillna(0.0)
+    area = 100 + temperature * 5
+    production = area * (np.where(df["commodity"] == "rice", 80, 40) + precipitation / 10)
+    return pd.DataFrame({
+        "predicted_area": area,
+        "predicted_yield": production / area * 10,
+        "predicted_production": production,
+    }, index=df.index)
+
+
+def score(df: pd.DataFrame) -> tuple:
+    """
+    Score every row of 'df' (the 21 features) in one vectorized call.
+
+    Returns:
+        tuple: (predictions, model_version) - 'model_version' is 'mock' when no model is trained.
+    """
+    model = get_prediction_model()
+    if model is None:
+        return mock_predict(df), "mock"
+    return model.predict(df), model.version
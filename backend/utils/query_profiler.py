@@ -0,0 +1,186 @@
+"""
+File: backend/utils/query_profiler.py
+Description:
+    This utility file times every SQL statement executed by the engine
+    and keeps a small in-memory profile of the most expensive query "shapes".
+
+    It performs the following tasks:
+    1. Hooks SQLAlchemy's 'before_cursor_execute' / 'after_cursor_execute'
+       events to measure the duration of each statement.
+    2. Normalizes each statement into a "shape" (bound parameters are already
+       placeholders; IN-lists of any length are collapsed) so that the same
+       query with different filter values is grouped together.
+    3. Logs statements slower than SLOW_QUERY_THRESHOLD_MS (the bound parameter
+       values only at DEBUG level) and captures the EXPLAIN plan of the first slow
+       statement of each shape. The EXPLAIN runs on a single background thread,
+       on its own DBAPI connection with the statement's original parameters, so
+       it never delays or aborts the request; the plan is logged when it is ready.
+    4. Exposes 'get_top_queries()' for the /debug/slow-queries endpoint
+       ('explain' is [] while the plan is being captured).
+
+    Configuration (environment variables):
+    - SLOW_QUERY_ENDPOINT: Set to "1" to enable the /debug/slow-queries endpoint (default "0": 404).
+    - SLOW_QUERY_THRESHOLD_MS: Threshold in milliseconds (default 200).
+    - SLOW_QUERY_TOP_N: Number of shapes returned by get_top_queries (default 20).
+    - SLOW_QUERY_EXPLAIN: Set to "0" to disable EXPLAIN capture (default "1").
+"""
+import hashlib
+import logging
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+SLOW_QUERY_ENDPOINT = os.environ.get("SLOW_QUERY_ENDPOINT", "0") == "1"
+SLOW_QUERY_THRESHOLD_MS = float(os.environ.get("SLOW_QUERY_THRESHOLD_MS", "200"))
+SLOW_QUERY_TOP_N = int(os.environ.get("SLOW_QUERY_TOP_N", "20"))
+SLOW_QUERY_EXPLAIN = os.environ.get("SLOW_QUERY_EXPLAIN", "1") != "0"
+
+# Upper bound on the number of distinct shapes kept in memory
+MAX_TRACKED_SHAPES = 500
+
+# Matches "(%(p_1)s, %(p_2)s, ...)", "(%s, %s, ...)" and "(?, ?, ...)" lists,
+# including driver casts such as "%(p_1)s::VARCHAR"
+_PLACEHOLDER = r"(?:%\(\w+\)s|%s|\?)(?:::\w+)?"
+_PLACEHOLDER_LIST = re.compile(rf"\(\s*{_PLACEHOLDER}(?:\s*,\s*{_PLACEHOLDER})*\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+# Constants in EXPLAIN output (the bound values): quoted literals and numbers after
+# a comparison operator ("rows=5370" / "cost=..." have no space and are kept)
+_PLAN_LITERAL = re.compile(r"'(?:[^']|'')*'|(?<=[=<>] )-?\d+(?:\.\d+)?\b")
+
+_lock = threading.Lock()
+_stats = {}
+_explain_executor = None
+
+
+def normalize_statement(statement: str) -> str:
+    """Reduce a SQL statement to its shape (whitespace and IN-list length removed)."""
+    shape = _WHITESPACE.sub(" ", statement).strip()
+    return _PLACEHOLDER_LIST.sub("(...)", shape)
+
+
+def _shape_key(shape: str) -> str:
+    return hashlib.sha1(shape.encode("utf-8")).hexdigest()[:12]
+
+
+def _capture_explain(engine, statement, parameters):
+    """
+    Run EXPLAIN for a statement on a separate DBAPI connection.
+    The statement is re-executed through a raw cursor with the parameters it was
+    executed with, so every DBAPI parameter style works (and no cursor event fires).
+    """
+    prefix = "EXPLAIN QUERY PLAN" if engine.dialect.name == "sqlite" else "EXPLAIN"
+    connection = engine.raw_connection()
+    try:
+        cursor = connection.cursor()
+        cursor.execute(f"{prefix} {statement}", parameters)
+        rows = cursor.fetchall()
+        cursor.close()
+        # The plan is exposed by the endpoint: mask the bound values it contains
+        # (the last column is the plan text: PostgreSQL's only column, SQLite's 'detail')
+        return [_PLAN_LITERAL.sub("?", str(row[-1])) for row in rows]
+    except Exception as e:
+        return [f"EXPLAIN failed: {type(e).__name__}"]
+    finally:
+        connection.rollback()
+        connection.close()
+
+
+def _explain_in_background(engine, key, statement, parameters):
+    """Capture the EXPLAIN plan of a slow shape, store it and log it (runs on the executor)."""
+    plan = _capture_explain(engine, statement, parameters)
+    with _lock:
+        if key in _stats:
+            _stats[key]["explain"] = plan
+    logger.warning("EXPLAIN of slow query shape %s:\n%s", key, "\n".join(plan))
+
+
+def _get_explain_executor() -> ThreadPoolExecutor:
+    """The single background thread running the EXPLAINs (created on first use)."""
+    global _explain_executor
+    with _lock:
+        if _explain_executor is None:
+            _explain_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="slow-query-explain")
+        return _explain_executor
+
+
+def _record(engine, statement, parameters, elapsed_ms):
+    shape = normalize_statement(statement)
+    key = _shape_key(shape)
+    is_slow = elapsed_ms >= SLOW_QUERY_THRESHOLD_MS
+
+    with _lock:
+        entry = _stats.get(key)
+        if entry is None:
+            if len(_stats) >= MAX_TRACKED_SHAPES:
+                # Evict the cheapest shape to keep memory bounded
+                cheapest = min(_stats, key=lambda k: _stats[k]["total_ms"])
+                del _stats[cheapest]
+            entry = _stats[key] = {
+                "shape_id": key,
+                "statement": shape,
+                "calls": 0,
+                "slow_calls": 0,
+                "total_ms": 0.0,
+                "max_ms": 0.0,
+                "explain": None,
+            }
+        entry["calls"] += 1
+        entry["total_ms"] += elapsed_ms
+        entry["max_ms"] = max(entry["max_ms"], elapsed_ms)
+        needs_explain = False
+        if is_slow:
+            entry["slow_calls"] += 1
+            # Reserve the EXPLAIN slot so it is captured only once per shape
+            if SLOW_QUERY_EXPLAIN and entry["explain"] is None and shape.upper().startswith("SELECT"):
+                entry["explain"] = []
+                needs_explain = True
+
+    if not is_slow:
+        return
+
+    logger.warning("Slow query (%.1f ms, shape %s): %s", elapsed_ms, key, shape)
+    # Bound values may be sensitive: only logged when DEBUG is enabled for this logger
+    logger.debug("Slow query parameters (shape %s): %r", key, parameters)
+    if needs_explain:
+        _get_explain_executor().submit(_explain_in_background, engine, key, statement, parameters)
+
+
+def install_query_profiler(engine):
+    """Attach the timing event listeners to the given SQLAlchemy engine."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        start_times = conn.info.get("query_start_time")
+        if not start_times:
+            return
+        elapsed_ms = (time.perf_counter() - start_times.pop()) * 1000
+        # Skip bulk inserts (e.g. seeding)
+        if executemany:
+            return
+        _record(conn.engine, statement, parameters, elapsed_ms)
+
+
+def get_top_queries(limit: int = SLOW_QUERY_TOP_N) -> list:
+    """Return the 'limit' most expensive query shapes (by total time)."""
+    with _lock:
+        entries = [dict(entry) for entry in _stats.values()]
+    for entry in entries:
+        entry["mean_ms"] = entry["total_ms"] / entry["calls"] if entry["calls"] else 0.0
+    entries.sort(key=lambda e: e["total_ms"], reverse=True)
+    return entries[:limit]
+
+
+def reset_query_stats():
+    """Clear all collected statistics."""
+    with _lock:
+        _stats.clear()
@@ -0,0 +1,70 @@
+"""
+File: backend/utils/serialization.py
+Description:
+    This utility file provides the "fast path" used by the statistics
+    endpoints to turn database rows into a JSON response.
+
+    Instead of loading ORM objects, calling 'model_dump()' per row and letting
+    FastAPI re-validate every dict against the 'response_model', the endpoints
+    select only the needed columns as plain row tuples and this module encodes
+    them straight into JSON bytes with 'orjson'.
+
+    The Read schemas in 'schemas.py' remain the documented API contract:
+    'schema_columns()' derives the selected columns (and their order) from them,
+    and 'project_columns()' narrows them to the 'fields' requested by the client.
+"""
+from typing import Iterable, List, Optional, Sequence
+
+import orjson
+from fastapi import HTTPException
+
+
+def schema_columns(schema, model, overrides: dict = None) -> dict:
+    """
+    Map every field of a Read schema to the database column that provides it.
+
+    Args:
+        schema: The Read schema (e.g. AgricultureDataRead) defining the output fields.
+        model: The table model the fields are read from by default.
+        overrides: Optional {field_name -> column} for fields coming from a JOIN
+                   (e.g. {'province_name': Province.province_name}).
+
+    Returns:
+        dict: An ordered mapping {field_name -> column}.
+    """
+    overrides = overrides or {}
+    return {
+        name: overrides[name] if name in overrides else getattr(model, name)
+        for name in schema.model_fields
+    }
+
+
+def project_columns(columns: dict, fields: Optional[List[str]]) -> dict:
+    """
+    Narrow a {field_name -> column} mapping to the fields requested by the client.
+    Accepts both repeated (?fields=a&fields=b) and comma-separated (?fields=a,b) values.
+
+    Raises:
+        HTTPException (422): If a requested field is not part of the Read schema.
+    """
+    if not fields:
+        return columns
+    requested = {name.strip() for item in fields for name in item.split(",") if name.strip()}
+    unknown = sorted(requested - columns.keys())
+    if unknown:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Unknown field(s): {', '.join(unknown)}. Allowed fields: {', '.join(columns)}."
+        )
+    # Keep the schema's field order
+    return {name: column for name, column in columns.items() if name in requested}
+
+
+def encode_rows(columns: Sequence[str], rows: Iterable[tuple]) -> bytes:
+    """Encode row tuples as a JSON array of objects keyed by 'columns'."""
+    columns = tuple(columns)
+    if len(columns) == 1:
+        # session.exec() returns single-column selects as scalars, not tuples
+        name = columns[0]
+        return orjson.dumps([{name: value} for value in rows])
+    return orjson.dumps([dict(zip(columns, row)) for row in rows])
@@ -0,0 +1,110 @@
+"""
+File: backend/utils/single_flight.py
+Description:
+    This utility file implements request coalescing ("single-flight").
+
+    When several identical requests arrive at the same time (e.g. many
+    Streamlit sessions whose caches expire together), only the first one
+    (the "leader") runs the database query. The others wait for it and
+    share its result instead of sending the same query to PostgreSQL.
+
+    Requests are identical when they have the same key:
+        route + normalized query parameters + dataset version
+    so a reseed never lets a request receive data from the previous version.
+
+    Counters (per route) are exposed through the /debug/coalescing endpoint:
+    - executed: Requests that ran the query themselves.
+    - coalesced: Requests that waited on an in-flight query and reused its result.
+
+    Configuration (environment variables):
+    - SINGLE_FLIGHT: Set to "0" to disable coalescing (default "1").
+"""
+import os
+import threading
+from collections import defaultdict
+from typing import Callable
+
+import orjson
+
+SINGLE_FLIGHT_ENABLED = os.environ.get("SINGLE_FLIGHT", "1") != "0"
+
+
+def request_key(route: str, params: dict, version: str) -> bytes:
+    """
+    Build the coalescing key of a request.
+    List values are sorted, since e.g. ?commodity=rice&commodity=maize and
+    ?commodity=maize&commodity=rice select the same rows.
+    """
+    normalized = {
+        name: sorted(value, key=str) if isinstance(value, list) else value
+        for name, value in params.items()
+    }
+    return orjson.dumps([route, normalized, version], option=orjson.OPT_SORT_KEYS)
+
+
+class _Call:
+    """One in-flight execution, shared by the leader and its followers."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Runs at most one call per key at a time; concurrent callers share its result."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._stats = defaultdict(lambda: {"executed": 0, "coalesced": 0})
+
+    def do(self, key: bytes, fn: Callable, route: str = "other"):
+        """
+        Return fn(), or the result of the identical call already in flight.
+        If the leader raises, every follower re-raises the same exception.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            is_leader = call is None
+            if is_leader:
+                call = self._calls[key] = _Call()
+            self._stats[route]["executed" if is_leader else "coalesced"] += 1
+
+        if not is_leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                "in_flight": len(self._calls),
+                "routes": {route: dict(counters) for route, counters in self._stats.items()},
+            }
+
+    def reset_stats(self):
+        with self._lock:
+            self._stats.clear()
+
+
+single_flight = SingleFlight()
+
+
+def coalesce(route: str, params: dict, version: str, fn: Callable):
+    """Run 'fn' through the shared SingleFlight instance (or directly if disabled)."""
+    if not SINGLE_FLIGHT_ENABLED:
+        return fn()
+    return single_flight.do(request_key(route, params, version), fn, route)
@@ -0,0 +1,126 @@
+"""
+File: backend/utils/spatial_index.py
+Description:
+    This utility file implements a spatial index over the province bounding
+    boxes ('latitude_min/max', 'longitude_min/max' of the 'province' table),
+    used by the /api/v1/geo/provinces endpoint.
+
+    The index is a uniform grid: the map is cut into square cells of
+    SPATIAL_GRID_CELL_DEG degrees and every cell lists the provinces whose
+    bounding box overlaps it. A query only tests the provinces listed in the
+    cells it touches (with vectorized NumPy comparisons):
+    - Point lookup: Provinces whose bounding box contains (lat, lon).
+    - Viewport (bbox) lookup: Provinces whose bounding box intersects the viewport.
+    - k-nearest: Provinces whose center is closest to (lat, lon) (great-circle
+      distance, computed for all centers at once).
+
+    The index is built at startup and rebuilt whenever the dataset version changes.
+
+    Configuration (environment variables):
+    - SPATIAL_GRID_CELL_DEG: Size of a grid cell in degrees (default 0.5).
+"""
+import math
+import os
+import threading
+from collections import defaultdict
+
+import numpy as np
+from sqlmodel import Session
+
+SPATIAL_GRID_CELL_DEG = float(os.environ.get("SPATIAL_GRID_CELL_DEG", "0.5"))
+EARTH_RADIUS_KM = 6371.0
+
+_lock = threading.Lock()
+_index = {"version": None, "index": None}
+
+
+class ProvinceGridIndex:
+    """Uniform grid over province bounding boxes."""
+
+    def __init__(self, columns, rows: list, cell_size: float = SPATIAL_GRID_CELL_DEG):
+        self.columns = tuple(columns)
+        self.rows = rows
+        self.cell_size = cell_size
+        values = {name: np.array([row[i] for row in rows], dtype=np.float64)
+                  for i, name in enumerate(self.columns) if name.startswith(("latitude", "longitude"))}
+        self.lat_min, self.lat_max = values["latitude_min"], values["latitude_max"]
+        self.lon_min, self.lon_max = values["longitude_min"], values["longitude_max"]
+        self.lat_center, self.lon_center = values["latitude_center"], values["longitude_center"]
+
+        # cell (row, col) -> indices of the provinces whose bounding box overlaps it
+        cells = defaultdict(list)
+        has_bbox = ~np.isnan(self.lat_min + self.lat_max + self.lon_min + self.lon_max)
+        for position in np.flatnonzero(has_bbox):
+            for cell in self._cells(self.lat_min[position], self.lon_min[position],
+                                    self.lat_max[position], self.lon_max[position]):
+                cells[cell].append(position)
+        self.cells = {cell: np.array(positions, dtype=np.int64) for cell, positions in cells.items()}
+        # Extent covered by the grid (viewport queries are clamped to it)
+        self.extent = (
+            (self.lat_min[has_bbox].min(), self.lon_min[has_bbox].min(),
+             self.lat_max[has_bbox].max(), self.lon_max[has_bbox].max())
+            if has_bbox.any() else None
+        )
+
+    def _cell(self, lat: float, lon: float) -> tuple:
+        return math.floor(lat / self.cell_size), math.floor(lon / self.cell_size)
+
+    def _cells(self, lat_min, lon_min, lat_max, lon_max):
+        row_min, col_min = self._cell(lat_min, lon_min)
+        row_max, col_max = self._cell(lat_max, lon_max)
+        for row in range(row_min, row_max + 1):
+            for col in range(col_min, col_max + 1):
+                yield row, col
+
+    def distances_km(self, lat: float, lon: float, positions: np.ndarray) -> np.ndarray:
+        """Great-circle (haversine) distance from (lat, lon) to the centers of 'positions'."""
+        lat1, lon1 = np.radians(lat), np.radians(lon)
+        lat2, lon2 = np.radians(self.lat_center[positions]), np.radians(self.lon_center[positions])
+        a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+        return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+    def contains_point(self, lat: float, lon: float) -> np.ndarray:
+        """Positions of the provinces whose bounding box contains the point (nearest center first)."""
+        candidates = self.cells.get(self._cell(lat, lon))
+        if candidates is None:
+            return np.array([], dtype=np.int64)
+        inside = ((self.lat_min[candidates] <= lat) & (lat <= self.lat_max[candidates])
+                  & (self.lon_min[candidates] <= lon) & (lon <= self.lon_max[candidates]))
+        matches = candidates[inside]
+        return matches[np.argsort(self.distances_km(lat, lon, matches), kind="stable")]
+
+    def intersects(self, lon_min: float, lat_min: float, lon_max: float, lat_max: float) -> np.ndarray:
+        """Positions of the provinces whose bounding box intersects the viewport (in row order)."""
+        if self.extent is None:
+            return np.array([], dtype=np.int64)
+        # Only enumerate the cells of the part of the viewport covered by the grid
+        lat_min, lon_min = max(lat_min, self.extent[0]), max(lon_min, self.extent[1])
+        lat_max, lon_max = min(lat_max, self.extent[2]), min(lon_max, self.extent[3])
+        if lat_min > lat_max or lon_min > lon_max:
+            return np.array([], dtype=np.int64)
+        found = [self.cells[cell] for cell in self._cells(lat_min, lon_min, lat_max, lon_max) if cell in self.cells]
+        if not found:
+            return np.array([], dtype=np.int64)
+        candidates = np.unique(np.concatenate(found))
+        overlap = ((self.lat_min[candidates] <= lat_max) & (lat_min <= self.lat_max[candidates])
+                   & (self.lon_min[candidates] <= lon_max) & (lon_min <= self.lon_max[candidates]))
+        return candidates[overlap]
+
+    def nearest(self, lat: float, lon: float, k: int) -> np.ndarray:
+        """Positions of the 'k' provinces whose center is closest to the point (nearest first)."""
+        distances = self.distances_km(lat, lon, np.arange(len(self.rows)))
+        distances = np.where(np.isnan(distances), np.inf, distances)
+        k = min(k, len(distances))
+        if k <= 0:
+            return np.array([], dtype=np.int64)
+        closest = np.argpartition(distances, k - 1)[:k]
+        return closest[np.argsort(distances[closest], kind="stable")]
+
+
+def get_spatial_index(session: Session, version: str, columns, query) -> ProvinceGridIndex:
+    """Return the index for 'version', rebuilding it from the 'province' table only if the revision changed."""
+    with _lock:
+        if _index["version"] != version:
+            _index["index"] = ProvinceGridIndex(columns, [tuple(row) for row in session.exec(query).all()])
+            _index["version"] = version
+        return _index["index"]
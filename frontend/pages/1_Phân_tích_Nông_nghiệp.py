@@ -14,10 +14,32 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 
-from utils.load_data import load_master_data
+from utils.load_data import load_master_data, load_all_data_from_api
+from utils.data_index import load_master_indexes
+from utils.derived_views import derived_view, impute_agriculture_metrics, render_view_stats
 
 # --- 1. RETRIEVE DATA ---
 df_agri_master, df_provinces_master, df_regions_master, df_climate_master, df_soil_master = load_master_data()
+agri_index, climate_index = load_master_indexes()
+
+# Derived views, memoized per selection and dataset version (see utils/derived_views.py):
+# changing an unrelated widget (metric, chart type) reuses them.
+@derived_view()
+def page1_snapshot_view(_agri_index, level, region, commodity, season, year):
+    """Tab 1: indexed slice of one year ("Tất cả" = no filter), with missing metrics imputed."""
+    all_or = lambda value: None if value == "Tất cả" else value
+    df = _agri_index.query(
+        region_level=level, region_name=all_or(region),
+        commodity=all_or(commodity), season=all_or(season), year=year,
+    )
+    return impute_agriculture_metrics(df)
+
+@derived_view()
+def page1_trend_view(_df_slice, slice_params, color_col, metric_col):
+    """Tab 2: the API slice ('slice_params') with yield imputed, summed by year and 'color_col'."""
+    df = impute_agriculture_metrics(_df_slice, yield_only=True)
+    df = df.dropna(subset=[color_col])
+    return df.groupby(['year', color_col])[metric_col].sum().reset_index()
 
 # --- 2. CREATE 2 TABS: OVERVIEW AND IN-DEPTH ---
 st.title("📊 Phân tích Số liệu Nông nghiệp")
@@ -58,46 +80,21 @@ with tab1:
                 value=max_year, step=1, key="p1_year"
             )
         with col4:
-            commodity_list = ["Tất cả"] + sorted(df_agri_master['commodity'].unique())
+            commodity_list = ["Tất cả"] + df_agri_master['commodity'].cat.categories.tolist()
             selected_commodity = st.selectbox("Nông sản:", commodity_list, index=0, key="p1_commodity")
         with col5:
-            season_list = ["Tất cả"] + sorted(df_agri_master['season'].dropna().unique())
+            season_list = ["Tất cả"] + df_agri_master['season'].cat.categories.tolist()
             selected_season = st.selectbox("Mùa vụ:", season_list, index=0, key="p1_season")
 
-    # FILTER DATA FOR TAB 1
-    df_page1 = df_agri_master.copy()
-    df_page1 = df_page1[df_page1['year'] == selected_year]
-    if selected_level != "Tất cả":
-        df_page1 = df_page1[df_page1['region_level'] == selected_level]
-    if selected_region != "Tất cả":
-        df_page1 = df_page1[df_page1['region_name'] == selected_region]
-    if selected_commodity != "Tất cả":
-        df_page1 = df_page1[df_page1['commodity'] == selected_commodity]
-    if selected_season != "Tất cả":
-        df_page1 = df_page1[df_page1['season'] == selected_season]
+    # FILTER DATA FOR TAB 1 (indexed slice + null handling, memoized per selection)
+    df_page1 = page1_snapshot_view(agri_index, selected_level, selected_region, selected_commodity, selected_season, selected_year)
 
     # DISPLAY TAB 1 CONTENT
     if not df_page1.empty:
         st.markdown("---")
         st.subheader(f"Chỉ số KPI cho năm {selected_year}")     
         
-        # --- Handle Null Values ---
-        """
-        Some records are missing one of three metrics: production, area, yield.
-        Apply formula to calculate missing metric when possible.
-        yield (quintals/ha) = production (1000 tonnes) / area (1000 ha) * 10
-        """
-        df_page1['production_thousand_tonnes'] = pd.to_numeric(df_page1['production_thousand_tonnes'], errors='coerce')
-        df_page1['area_thousand_ha'] = pd.to_numeric(df_page1['area_thousand_ha'], errors='coerce')
-        df_page1['yield_ta_per_ha'] = pd.to_numeric(df_page1['yield_ta_per_ha'], errors='coerce')
-        mask_yield = df_page1['yield_ta_per_ha'].isnull() & df_page1['production_thousand_tonnes'].notnull() & df_page1['area_thousand_ha'].notnull() & (df_page1['area_thousand_ha'] > 0)
-        df_page1.loc[mask_yield, 'yield_ta_per_ha'] = (df_page1['production_thousand_tonnes'] / df_page1['area_thousand_ha']) * 10
-        mask_prod = df_page1['production_thousand_tonnes'].isnull() & df_page1['yield_ta_per_ha'].notnull() & df_page1['area_thousand_ha'].notnull()
-        df_page1.loc[mask_prod, 'production_thousand_tonnes'] = (df_page1['yield_ta_per_ha'] * df_page1['area_thousand_ha']) / 10
-        mask_area = df_page1['area_thousand_ha'].isnull() & df_page1['yield_ta_per_ha'].notnull() & df_page1['production_thousand_tonnes'].notnull() & (df_page1['yield_ta_per_ha'] > 0)
-        df_page1.loc[mask_area, 'area_thousand_ha'] = (df_page1['production_thousand_tonnes'] / df_page1['yield_ta_per_ha']) * 10
-        
-        # --- Calculate KPIs (after handling nulls) ---
+        # --- Calculate KPIs (nulls already handled by page1_snapshot_view) ---
         total_production = df_page1['production_thousand_tonnes'].sum()
         total_area = df_page1['area_thousand_ha'].sum()
         avg_yield = (total_production / total_area) * 10 if total_area > 0 else 0
@@ -219,9 +216,9 @@ with tab2:
         # Filter for selecting commodity type and season data (Commodity/Season)
         with col2:
             st.markdown("#### 2. Lọc theo Dữ liệu")
-            options = sorted(df_agri_master['commodity'].unique())
+            options = df_agri_master['commodity'].cat.categories.tolist()
             selected_commodities = st.multiselect("Chọn Nông sản:", options=options, default=options, key="p2_multi_commodity")
-            options = sorted(df_agri_master['season'].dropna().unique())
+            options = df_agri_master['season'].cat.categories.tolist()
             selected_seasons = st.multiselect("Chọn Mùa vụ:", options=options, default=options, key="p2_multi_season")
             st.info("Lọc theo mùa (trừ 'annual') chủ yếu áp dụng cho 'rice'.", icon="ℹ️")
 
@@ -238,33 +235,31 @@ with tab2:
             selected_unit = units[selected_metric_col]
             
     # -- FILTER DATA FOR TAB 2 --
-    df_page2 = df_agri_master.copy()
-    df_page2 = df_page2[(df_page2['year'] >= selected_year_range[0]) & (df_page2['year'] <= selected_year_range[1])]
-    df_page2 = df_page2[df_page2['region_level'] == selected_level_p2]
+    # Filters are pushed down to the API (year range -> BETWEEN, multi-selects -> IN),
+    # so only the slice plotted below is fetched.
+    slice_params = {
+        "year_from": selected_year_range[0],
+        "year_to": selected_year_range[1],
+        "region_level": selected_level_p2,
+        "fields": "year,region_name,commodity,season,area_thousand_ha,yield_ta_per_ha,production_thousand_tonnes",
+    }
     if selected_regions:
-        df_page2 = df_page2[df_page2['region_name'].isin(selected_regions)]
+        slice_params["region_name"] = selected_regions
     if selected_provinces:
-        df_page2 = df_page2[df_page2['region_name'].isin(selected_provinces)]
+        slice_params["region_name"] = selected_provinces
     if selected_commodities:
-        df_page2 = df_page2[df_page2['commodity'].isin(selected_commodities)]
+        slice_params["commodity"] = selected_commodities
     if selected_seasons:
-        df_page2 = df_page2[df_page2['season'].isin(selected_seasons)]
+        slice_params["season"] = selected_seasons
+    df_page2 = load_all_data_from_api("statistics/agriculture-data", slice_params)
 
     # -- DISPLAY TAB 2 CONTENT --
     if not df_page2.empty:
-        # --- Handle Null values (similar to tab 1) ---
-        df_page2['production_thousand_tonnes'] = pd.to_numeric(df_page2['production_thousand_tonnes'], errors='coerce')
-        df_page2['area_thousand_ha'] = pd.to_numeric(df_page2['area_thousand_ha'], errors='coerce')
-        df_page2['yield_ta_per_ha'] = pd.to_numeric(df_page2['yield_ta_per_ha'], errors='coerce')
-        mask_yield = df_page2['yield_ta_per_ha'].isnull() & df_page2['production_thousand_tonnes'].notnull() & df_page2['area_thousand_ha'].notnull() & (df_page2['area_thousand_ha'] > 0)
-        df_page2.loc[mask_yield, 'yield_ta_per_ha'] = (df_page2['production_thousand_tonnes'] / df_page2['area_thousand_ha']) * 10
-        
         st.markdown("---")
         st.subheader(f"So sánh {selected_metric_label} (So sánh theo: {selected_color_label})")
         
-        # Group data by 'year' and 'color_col'
-        df_trend = df_page2.dropna(subset=[color_col])
-        df_trend = df_trend.groupby(['year', color_col])[selected_metric_col].sum().reset_index()
+        # Handle Null values (yield) and group data by 'year' and 'color_col' (memoized per selection)
+        df_trend = page1_trend_view(df_page2, slice_params, color_col, selected_metric_col)
         
         if df_trend.empty:
             st.warning("Không tìm thấy dữ liệu sau khi nhóm. Hãy thử thay đổi bộ lọc.")
@@ -284,4 +279,7 @@ with tab2:
             fig_area = px.area(df_trend, x='year', y=selected_metric_col, color=color_col, groupnorm='percent', title=f"Sự thay đổi Cơ cấu {selected_metric_label} qua các năm", labels={'year': 'Năm', selected_metric_col: f'Cơ cấu {selected_metric_label} (%)', color_col: selected_color_label})
             st.plotly_chart(fig_area, use_container_width=True)
     else:
-        st.warning("Không tìm thấy dữ liệu cho bộ lọc này.")
\ No newline at end of file
+        st.warning("Không tìm thấy dữ liệu cho bộ lọc này.")
+
+# --- CACHE STATISTICS (sidebar) ---
+render_view_stats(page1_snapshot_view, page1_trend_view)
\ No newline at end of file
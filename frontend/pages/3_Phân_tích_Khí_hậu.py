@@ -6,7 +6,8 @@ Description:
     1. Retrieving data.
     2. Displaying 2 tabs: "Climate Trends" and "Correlation (with Agriculture)".
     3. "Trends" tab: Allows users to select 1 Province and 1 year range,
-       then displays charts (Line, Bar) for all climate metrics.
+       then displays charts (Line, Bar) for all climate metrics, plus the
+       deviation from normal (z-score) and moving average of a selected metric.
     4. "Correlation" tab: Allows users to select Province, Commodity, Agricultural Metric
        and Climate Metric to analyze relationships (dual-axis and scatter plot).
 """
@@ -16,10 +17,49 @@ import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 
-from utils.load_data import load_master_data
+from utils.load_data import load_master_data, load_all_data_from_api
+from utils.data_index import load_master_indexes
+from utils.derived_views import derived_view, impute_agriculture_metrics, render_view_stats
 
 # --- 1. RETRIEVE DATA ---
 df_agri_master, df_provinces_master, df_regions_master, df_climate_master, df_soil_master = load_master_data()
+agri_index, climate_index = load_master_indexes()
+
+# Derived view, memoized per selection and dataset version (see utils/derived_views.py):
+# the climate metric only picks a column of the result, so changing it reuses the view.
+@derived_view()
+def page3_correlation_view(_agri_index, _climate_index, province, commodity, year_range, agri_col):
+    """Tab 2: the province's climate rows joined with its yearly agriculture total ('agri_col')."""
+    # 1. Filter Climate data (indexed slice, one province: already sorted by year)
+    df_climate = _climate_index.query(province_name=province, year_from=year_range[0], year_to=year_range[1])
+
+    # 2. Filter Agriculture data (indexed slice) and handle nulls
+    df_agri = _agri_index.query(
+        region_level='province', region_name=province,
+        commodity=None if commodity == "Tất cả" else commodity,
+        year_from=year_range[0], year_to=year_range[1]
+    )
+    df_agri = impute_agriculture_metrics(df_agri, yield_only=True)
+
+    # Group agriculture data by year
+    df_agri_trend = df_agri.groupby('year')[agri_col].sum().reset_index()
+
+    # 3. Merge both datasets
+    return pd.merge(df_climate, df_agri_trend, on='year', how='inner')
+
+# Climate metrics (label -> column), shared by both tabs
+climate_metric_options = {
+    "Nhiệt độ Trung bình": "avg_temperature",
+    "Nhiệt độ thấp nhất": "min_temperature",
+    "Nhiệt độ cao nhất": "max_temperature",
+    "Nhiệt độ bề mặt": "surface_temperature",
+    "Nhiệt độ bầu ướt": "wet_bulb_temperature",
+    "Lượng mưa": "precipitation",
+    "Bức xạ Mặt trời": "solar_radiation",
+    "Độ ẩm": "relative_humidity",
+    "Sức gió": "wind_speed",
+    "Áp suất Bề mặt": "surface_pressure"
+}
 
 # --- 2. PAGE 4 CONTENT: CLIMATE ---
 st.title("☀️ Phân tích Khí hậu")
@@ -38,7 +78,7 @@ with tab1:
     with st.container(border=True):
         col1, col2 = st.columns(2)
         with col1:
-            province_list_tab1 = sorted(df_climate_master['province_name'].unique())
+            province_list_tab1 = df_climate_master['province_name'].cat.categories.tolist()
             selected_province_tab1 = st.selectbox(
                 "Chọn Tỉnh:", options=province_list_tab1,
                 index=0, key="p4_tab1_province"
@@ -51,14 +91,15 @@ with tab1:
                 value=(min_year, max_year), step=1, key="p4_tab1_years"
             )
     
-    # FILTER DATA FOR TAB 1
-    df_climate_tab1 = df_climate_master[
-        (df_climate_master['province_name'] == selected_province_tab1) &
-        (df_climate_master['year'] >= selected_year_range_tab1[0]) &
-        (df_climate_master['year'] <= selected_year_range_tab1[1])
-    ].sort_values(by='year')
+    # FILTER DATA FOR TAB 1 (pushed down to the API: one province, BETWEEN year range)
+    df_climate_tab1 = load_all_data_from_api("statistics/climate-data", {
+        "province_name": selected_province_tab1,
+        "year_from": selected_year_range_tab1[0],
+        "year_to": selected_year_range_tab1[1],
+    })
 
     if not df_climate_tab1.empty:
+        df_climate_tab1 = df_climate_tab1.sort_values(by='year')
         st.markdown("---")
         
         # Chart 1: Temperature
@@ -132,6 +173,64 @@ with tab1:
                 markers=True, color_discrete_sequence=['purple']
             )
             st.plotly_chart(fig_pressure, use_container_width=True)
+
+        # Chart 7: Deviation from normal & moving average (precomputed by the backend)
+        st.markdown("---")
+        st.subheader(f"Độ lệch so với mức bình thường tại {selected_province_tab1}")
+        selected_anomaly_label = st.selectbox(
+            "Chọn chỉ số Khí hậu:",
+            options=list(climate_metric_options.keys()),
+            key="p4_tab1_anomaly_metric"
+        )
+        selected_anomaly_col = climate_metric_options[selected_anomaly_label]
+
+        df_anomaly_tab1 = load_all_data_from_api("analytics/climate-anomalies", {
+            "province_name": selected_province_tab1,
+            "variable": selected_anomaly_col,
+            "year_from": selected_year_range_tab1[0],
+            "year_to": selected_year_range_tab1[1],
+        })
+
+        if not df_anomaly_tab1.empty:
+            df_anomaly_tab1 = df_anomaly_tab1.sort_values(by='year')
+            col_chart6, col_chart7 = st.columns(2)
+            with col_chart6:
+                fig_rolling = go.Figure()
+                fig_rolling.add_trace(go.Scatter(
+                    x=df_anomaly_tab1['year'], y=df_anomaly_tab1['value'],
+                    name=selected_anomaly_label, mode='lines+markers'
+                ))
+                fig_rolling.add_trace(go.Scatter(
+                    x=df_anomaly_tab1['year'], y=df_anomaly_tab1['rolling_mean'],
+                    name="Trung bình trượt", mode='lines', line=dict(width=3)
+                ))
+                fig_rolling.add_hline(
+                    y=df_anomaly_tab1['baseline_mean'].iloc[0], line_dash="dash",
+                    annotation_text="Mức bình thường"
+                )
+                fig_rolling.update_layout(
+                    title=f"{selected_anomaly_label}: giá trị & trung bình trượt",
+                    xaxis_title="Năm", yaxis_title=selected_anomaly_label
+                )
+                st.plotly_chart(fig_rolling, use_container_width=True)
+            with col_chart7:
+                df_anomaly_tab1['Chiều lệch'] = df_anomaly_tab1['z_score'].ge(0).map(
+                    {True: "Cao hơn bình thường", False: "Thấp hơn bình thường"}
+                )
+                fig_zscore = px.bar(
+                    df_anomaly_tab1, x='year', y='z_score', color='Chiều lệch',
+                    title=f"{selected_anomaly_label}: độ lệch chuẩn hóa (z-score)",
+                    labels={'year': 'Năm', 'z_score': 'Z-score'},
+                    color_discrete_map={"Cao hơn bình thường": "indianred", "Thấp hơn bình thường": "steelblue"}
+                )
+                st.plotly_chart(fig_zscore, use_container_width=True)
+
+            latest_trend = df_anomaly_tab1['rolling_trend'].dropna()
+            if not latest_trend.empty:
+                st.metric(
+                    "Xu hướng gần đây (mỗi thập kỷ)",
+                    f"{latest_trend.iloc[-1] * 10:+.3f}"
+                )
     else:
         st.warning("Không tìm thấy dữ liệu khí hậu cho lựa chọn này.")
 
@@ -147,13 +246,13 @@ with tab2:
         
         # Select Province and Commodity
         with col1:
-            province_list_tab2 = sorted(df_climate_master['province_name'].unique())
+            province_list_tab2 = df_climate_master['province_name'].cat.categories.tolist()
             selected_province_tab2 = st.selectbox(
                 "Chọn Tỉnh:", options=province_list_tab2,
                 index=0, key="p4_tab2_province"
             )
             
-            commodity_list_tab2 = ["Tất cả"] + sorted(df_agri_master['commodity'].unique())
+            commodity_list_tab2 = ["Tất cả"] + df_agri_master['commodity'].cat.categories.tolist()
             selected_commodity_tab2 = st.selectbox(
                 "Chọn Nông sản (để tính tổng):",
                 options=commodity_list_tab2, index=0, key="p4_tab2_commodity"
@@ -182,18 +281,6 @@ with tab2:
 
         # Select Climate Metric
         with col3:
-            climate_metric_options = {
-                "Nhiệt độ Trung bình": "avg_temperature",
-                "Nhiệt độ thấp nhất": "min_temperature",
-                "Nhiệt độ cao nhất": "max_temperature",
-                "Nhiệt độ bề mặt": "surface_temperature",
-                "Nhiệt độ bầu ướt": "wet_bulb_temperature",
-                "Lượng mưa": "precipitation",
-                "Bức xạ Mặt trời": "solar_radiation",
-                "Độ ẩm": "relative_humidity",
-                "Sức gió": "wind_speed",
-                "Áp suất Bề mặt": "surface_pressure"
-            }
             selected_climate_label = st.selectbox(
                 "Chọn chỉ số Khí hậu:",
                 options=list(climate_metric_options.keys()),
@@ -201,37 +288,11 @@ with tab2:
             )
             selected_climate_col = climate_metric_options[selected_climate_label]
 
-    # --- FILTER DATA FOR TAB 2 ---
-    
-    # 1. Filter Climate data
-    df_climate_tab2 = df_climate_master[
-        (df_climate_master['province_name'] == selected_province_tab2) &
-        (df_climate_master['year'] >= selected_year_range_tab2[0]) &
-        (df_climate_master['year'] <= selected_year_range_tab2[1])
-    ].sort_values(by='year')
-
-    # 2. Filter Agriculture data
-    df_agri_tab2 = df_agri_master[
-        (df_agri_master['region_name'] == selected_province_tab2) &
-        (df_agri_master['region_level'] == 'province') &
-        (df_agri_master['year'] >= selected_year_range_tab2[0]) &
-        (df_agri_master['year'] <= selected_year_range_tab2[1])
-    ]
-    if selected_commodity_tab2 != "Tất cả":
-        df_agri_tab2 = df_agri_tab2[df_agri_tab2['commodity'] == selected_commodity_tab2]
-    
-    # (Handle nulls)
-    df_agri_tab2['production_thousand_tonnes'] = pd.to_numeric(df_agri_tab2['production_thousand_tonnes'], errors='coerce')
-    df_agri_tab2['area_thousand_ha'] = pd.to_numeric(df_agri_tab2['area_thousand_ha'], errors='coerce')
-    df_agri_tab2['yield_ta_per_ha'] = pd.to_numeric(df_agri_tab2['yield_ta_per_ha'], errors='coerce')
-    mask_yield = df_agri_tab2['yield_ta_per_ha'].isnull() & df_agri_tab2['production_thousand_tonnes'].notnull() & df_agri_tab2['area_thousand_ha'].notnull() & (df_agri_tab2['area_thousand_ha'] > 0)
-    df_agri_tab2.loc[mask_yield, 'yield_ta_per_ha'] = (df_agri_tab2['production_thousand_tonnes'] / df_agri_tab2['area_thousand_ha']) * 10
-
-    # Group agriculture data by year
-    df_agri_trend_tab2 = df_agri_tab2.groupby('year')[selected_agri_col].sum().reset_index()
-
-    # 3. Merge both datasets
-    df_corr = pd.merge(df_climate_tab2, df_agri_trend_tab2, on='year', how='inner')
+    # --- FILTER DATA FOR TAB 2 (filter -> impute -> group -> merge, memoized per selection) ---
+    df_corr = page3_correlation_view(
+        agri_index, climate_index, selected_province_tab2, selected_commodity_tab2,
+        selected_year_range_tab2, selected_agri_col
+    )
     
     # CREATE DYNAMIC TITLE
     if selected_commodity_tab2 == "Tất cả":
@@ -278,4 +339,7 @@ with tab2:
         st.plotly_chart(fig_scatter, use_container_width=True)
         
     else:
-        st.warning("Không tìm thấy dữ liệu nông nghiệp và khí hậu trùng khớp cho lựa chọn này.")
\ No newline at end of file
+        st.warning("Không tìm thấy dữ liệu nông nghiệp và khí hậu trùng khớp cho lựa chọn này.")
+
+# --- CACHE STATISTICS (sidebar) ---
+render_view_stats(page3_correlation_view)
\ No newline at end of file
@@ -18,9 +18,28 @@ import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 
 from utils.load_data import load_master_data
+from utils.data_index import load_master_indexes
+from utils.derived_views import derived_view, impute_agriculture_metrics, render_view_stats
 
 # --- 1. RETRIEVE DATA ---
 df_agri_master, df_provinces_master, df_regions_master, df_climate_master, df_soil_master = load_master_data()
+agri_index, climate_index = load_master_indexes()
+
+# Derived view, memoized per selection and dataset version (see utils/derived_views.py):
+# the soil metric only picks a column of the result, so changing it reuses the view.
+@derived_view()
+def page4_correlation_view(_agri_index, _df_soil, commodity, agri_col):
+    """Tab 2: soil data of each province joined with its agricultural metric averaged over years."""
+    # 1. Filter Agriculture data (only province level; indexed slice, see utils/data_index.py)
+    df_agri = _agri_index.query(region_level='province', commodity=None if commodity == "Tất cả" else commodity)
+    df_agri = impute_agriculture_metrics(df_agri, yield_only=True)
+
+    # CALCULATE AVERAGE AGRICULTURE DATA OVER YEARS
+    # observed=True: only the provinces present in the slice (not every category)
+    df_agri_avg = df_agri.groupby('region_name', observed=True)[agri_col].mean().reset_index()
+
+    # 2. Merge with Soil Data
+    return pd.merge(_df_soil, df_agri_avg, left_on='province_name', right_on='region_name', how='inner')
 
 # --- 2. PAGE 4 CONTENT: SOIL ---
 st.title("🌱 Phân tích Thổ nhưỡng (Đất)")
@@ -113,39 +132,15 @@ with tab2:
 
         # Filter commodity
         with col3:
-            commodity_list_tab2 = ["Tất cả"] + sorted(df_agri_master['commodity'].unique())
+            commodity_list_tab2 = ["Tất cả"] + df_agri_master['commodity'].cat.categories.tolist()
             selected_commodity_tab2 = st.selectbox(
                 "Lọc theo Nông sản:",
                 options=commodity_list_tab2, index=0,
                 key="p5_tab2_commodity"
             )
             
-    # --- FILTER AND PREPARE CORRELATION DATA ---
-    
-    # 1. Filter Agriculture data (only province level)
-    df_agri_corr = df_agri_master[df_agri_master['region_level'] == 'province']
-    
-    if selected_commodity_tab2 != "Tất cả":
-        df_agri_corr = df_agri_corr[df_agri_corr['commodity'] == selected_commodity_tab2]
-    
-    # (Handle nulls)
-    df_agri_corr['production_thousand_tonnes'] = pd.to_numeric(df_agri_corr['production_thousand_tonnes'], errors='coerce')
-    df_agri_corr['area_thousand_ha'] = pd.to_numeric(df_agri_corr['area_thousand_ha'], errors='coerce')
-    df_agri_corr['yield_ta_per_ha'] = pd.to_numeric(df_agri_corr['yield_ta_per_ha'], errors='coerce')
-    mask_yield = df_agri_corr['yield_ta_per_ha'].isnull() & df_agri_corr['production_thousand_tonnes'].notnull() & df_agri_corr['area_thousand_ha'].notnull() & (df_agri_corr['area_thousand_ha'] > 0)
-    df_agri_corr.loc[mask_yield, 'yield_ta_per_ha'] = (df_agri_corr['production_thousand_tonnes'] / df_agri_corr['area_thousand_ha']) * 10
-    
-    # CALCULATE AVERAGE AGRICULTURE DATA OVER YEARS
-    df_agri_avg = df_agri_corr.groupby('region_name')[selected_agri_col_t2].mean().reset_index()
-
-    # 2. Merge with Soil Data
-    df_corr = pd.merge(
-        df_soil_master,
-        df_agri_avg,
-        left_on='province_name',
-        right_on='region_name',
-        how='inner'
-    )
+    # --- FILTER AND PREPARE CORRELATION DATA (filter -> impute -> average -> merge, memoized per selection) ---
+    df_corr = page4_correlation_view(agri_index, df_soil_master, selected_commodity_tab2, selected_agri_col_t2)
 
     # --- DISPLAY TAB 2 CONTENT ---
     if not df_corr.empty:
@@ -169,4 +164,7 @@ with tab2:
         st.plotly_chart(fig_scatter, use_container_width=True)
         
     else:
-        st.warning("Không tìm thấy dữ liệu trùng khớp cho lựa chọn này.")
\ No newline at end of file
+        st.warning("Không tìm thấy dữ liệu trùng khớp cho lựa chọn này.")
+
+# --- CACHE STATISTICS (sidebar) ---
+render_view_stats(page4_correlation_view)
\ No newline at end of file
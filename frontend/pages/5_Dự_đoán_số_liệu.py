@@ -4,35 +4,43 @@ Description:
     This is the "Prediction" page of the application.
     This page is responsible for:
     1. Retrieving master data that has been pre-loaded from st.session_state
-       (especially df_soil_master and df_climate_master to get fixed values
-       and historical averages).
-    2. Displaying a form (st.form) for user input.
-    3. Clear separation:
+       (especially df_soil_master to get fixed values).
+    2. Displaying the baseline trend forecast (precomputed by the API up to 2050)
+       of the selected province, commodity and season.
+    3. Displaying a form (st.form) for user input.
+    4. Clear separation:
         - Basic factors (Province, Commodity) - OUTSIDE form for
           automatic updating of fixed information.
         - Soil information (Fixed, read-only) - OUTSIDE form.
         - Climate factors (Forecast, user input) - INSIDE form.
-    4. When "Predict" is clicked, the logic will:
+    5. When "Predict" is clicked, the logic will:
         - Collect all 21 features (inputs).
-        - "Impute" climate values left blank by user (set to 0)
-          with historical average values for that province.
+        - Send climate values left blank by user (set to 0) as null:
+          the API fills them from the province's climate normals
+          (precomputed at seed time) and returns the values it used.
         - Send a POST request to the /predict API.
         - Display results (Production, Area, Yield) returned from API.
+        - Send a POST request to /predict/simulate and display the P10/P50/P90
+          of production under climate uncertainty.
+    6. Sensitivity analysis: one POST to /predict/sweep returns the predictions
+       over a grid of 2 climate features, drawn as a heatmap.
 """
-import os
 import streamlit as st
 import pandas as pd
-import requests
-from utils.load_data import load_master_data
+import numpy as np
+import plotly.graph_objects as go
+from utils.api_client import api_post
+from utils.load_data import load_master_data, load_all_data_from_api, load_data_from_api
+from utils.data_index import load_master_indexes
 
 # --- 1. RETRIEVE DATA ---
 df_agri_master, df_provinces_master, df_regions_master, df_climate_master, df_soil_master = load_master_data()
-API_BASE_URL = os.environ.get("API_BASE_URL", "http://localhost:8000/api/v1")
+agri_index, climate_index = load_master_indexes()
 
 # --- 2. PAGE 5 CONTENT: PREDICTION ---
 st.title("🔮 Trang Dự đoán Sản lượng")
 st.markdown("Nhập các thông số dự kiến để nhận dự đoán về Sản lượng, Diện tích và Năng suất.")
-st.info("Trang này hiện đang chạy với logic 'giả' (mock). Mô hình ML thật có thể được tích hợp vào API sau.")
+st.info("Dự đoán được tính bởi mô hình hồi quy (Ridge) huấn luyện trên dữ liệu lịch sử. Nếu API chưa có mô hình, kết quả dùng logic 'giả' (mock).")
 
 # --- 3. BASIC FILTERS ---
 st.header("Yếu tố Cơ bản (Bắt buộc)")
@@ -83,12 +91,75 @@ if not soil_data.empty:
 else:
     st.warning(f"Không tìm thấy dữ liệu thổ nhưỡng cho tỉnh {selected_province}.")
 
-# --- 5. INPUT FORM ---
+# --- 5. BASELINE TREND FORECAST ---
+st.markdown("---")
+st.subheader("Dự báo Xu hướng (Cơ sở)")
+st.caption("Xu hướng tuyến tính của chuỗi lịch sử, kéo dài đến năm 2050 (khoảng dự báo ~95%). Không phụ thuộc vào các yếu tố khí hậu nhập bên dưới.")
+
+forecast_metric_options = {
+    'production_thousand_tonnes': 'Sản lượng (Nghìn Tấn)',
+    'area_thousand_ha': 'Diện tích (Nghìn Ha)',
+    'yield_ta_per_ha': 'Năng suất (Tạ/Ha)'
+}
+selected_forecast_metric = st.selectbox(
+    "Chọn chỉ số:", options=list(forecast_metric_options.keys()),
+    format_func=lambda x: forecast_metric_options[x], key="pred_forecast_metric"
+)
+
+df_forecast = load_all_data_from_api("analytics/forecasts", {
+    "region_level": "province",
+    "region_name": selected_province,
+    "commodity": selected_commodity,
+    "season": selected_season,
+    "metric": selected_forecast_metric
+})
+
+if df_forecast.empty:
+    st.warning("Không đủ dữ liệu lịch sử để dự báo xu hướng cho lựa chọn này.")
+else:
+    # One series (indexed slice, already sorted by year)
+    df_history = agri_index.query(
+        region_level='province', region_name=selected_province,
+        commodity=selected_commodity, season=selected_season
+    ).dropna(subset=[selected_forecast_metric])
+
+    fig_forecast = go.Figure()
+    fig_forecast.add_trace(go.Scatter(
+        x=pd.concat([df_forecast['year'], df_forecast['year'][::-1]]),
+        y=pd.concat([df_forecast['upper'], df_forecast['lower'][::-1]]),
+        fill='toself', fillcolor='rgba(255, 127, 14, 0.2)', line=dict(width=0),
+        hoverinfo='skip', name='Khoảng dự báo'
+    ))
+    fig_forecast.add_trace(go.Scatter(
+        x=df_history['year'], y=df_history[selected_forecast_metric],
+        mode='lines+markers', name='Lịch sử'
+    ))
+    fig_forecast.add_trace(go.Scatter(
+        x=df_forecast['year'], y=df_forecast['forecast'],
+        mode='lines', line=dict(dash='dash'), name='Xu hướng'
+    ))
+    fig_forecast.add_vline(x=selected_year, line_dash="dot", line_color="gray")
+    fig_forecast.update_layout(
+        xaxis_title="Năm", yaxis_title=forecast_metric_options[selected_forecast_metric],
+        hovermode="x unified"
+    )
+    st.plotly_chart(fig_forecast, use_container_width=True)
+
+    selected_year_forecast = df_forecast[df_forecast['year'] == selected_year]
+    if not selected_year_forecast.empty:
+        row = selected_year_forecast.iloc[0]
+        st.metric(
+            f"Xu hướng năm {selected_year}",
+            f"{row['forecast']:,.2f}",
+            help=f"Khoảng dự báo: {row['lower']:,.2f} - {row['upper']:,.2f}"
+        )
+
+# --- 6. INPUT FORM ---
 with st.form(key="prediction_form"):
     
     st.markdown("---")
     st.header("Yếu tố Khí hậu (Dự báo)")
-    st.markdown("Nhập các giá trị dự báo. Nếu để `0`, hệ thống sẽ dùng giá trị trung bình lịch sử của tỉnh đó.")
+    st.markdown("Nhập các giá trị dự báo. Nếu để `0`, hệ thống sẽ dùng giá trị chuẩn khí hậu của tỉnh đó (trung bình các năm gần nhất).")
     
     c_col1, c_col2, c_col3 = st.columns(3)
     with c_col1:
@@ -108,7 +179,44 @@ with st.form(key="prediction_form"):
     # Submit button
     submitted = st.form_submit_button("Dự đoán")
 
-# --- 6. PROCESSING LOGIC WHEN BUTTON IS CLICKED ---
+# --- 7. PROCESSING LOGIC WHEN BUTTON IS CLICKED ---
+def build_input_data():
+    """
+    Package the 21 features (payload) from the filters, the form and the soil data.
+    Climate values left at 0 are sent as null (filled by the API from the climate normals).
+    """
+    def get_value(pred_val):
+        # 0 means "left blank": sent as null, the API fills it from the climate normals
+        return pred_val if pred_val != 0.0 else None
+
+    return {
+        "province_name": selected_province,
+        "year": selected_year,
+        "commodity": selected_commodity,
+        "season": selected_season,
+
+        # Get from form widget
+        "avg_temperature": get_value(pred_avg_temp),
+        "min_temperature": get_value(pred_min_temp),
+        "max_temperature": get_value(pred_max_temp),
+        "surface_temperature": get_value(pred_surf_temp),
+        "wet_bulb_temperature": get_value(pred_wet_bulb),
+        "precipitation": get_value(pred_precip),
+        "solar_radiation": get_value(pred_solar),
+        "relative_humidity": get_value(pred_humid),
+        "wind_speed": get_value(pred_wind),
+        "surface_pressure": get_value(pred_pressure),
+        
+        # Get from soil_data_row
+        "surface_elevation": soil_data_row.get('surface_elevation', 0.0),
+        "avg_ndvi": soil_data_row.get('avg_ndvi', 0.0),
+        "soil_ph_level": soil_data_row.get('soil_ph_level', 0.0),
+        "soil_organic_carbon": soil_data_row.get('soil_organic_carbon', 0.0),
+        "soil_nitrogen_content": soil_data_row.get('soil_nitrogen_content', 0.0),
+        "soil_sand_ratio": soil_data_row.get('soil_sand_ratio', 0.0),
+        "soil_clay_ratio": soil_data_row.get('soil_clay_ratio', 0.0)
+    }
+
 if submitted:
     with st.spinner("Đang xử lý dự đoán..."):
         
@@ -116,47 +224,11 @@ if submitted:
             st.error(f"Không thể dự đoán vì thiếu dữ liệu thổ nhưỡng cho {selected_province}.")
             st.stop()
         
-        # Retrieve historical averages for the province
-        hist_climate = df_climate_master[df_climate_master['province_name'] == selected_province].mean(numeric_only=True)
-        
-        def get_value(pred_val, hist_val_key):
-            # Check if hist_val_key doesn't exist
-            if hist_val_key not in hist_climate or pd.isna(hist_climate[hist_val_key]):
-                return pred_val if pred_val != 0.0 else 0.0
-            return pred_val if pred_val != 0.0 else hist_climate[hist_val_key]
-
-        # Package 21 features (Payload)
-        input_data = {
-            "province_name": selected_province,
-            "year": selected_year,
-            "commodity": selected_commodity,
-            "season": selected_season,
-
-            # Get from form widget
-            "avg_temperature": get_value(pred_avg_temp, 'avg_temperature'),
-            "min_temperature": get_value(pred_min_temp, 'min_temperature'),
-            "max_temperature": get_value(pred_max_temp, 'max_temperature'),
-            "surface_temperature": get_value(pred_surf_temp, 'surface_temperature'),
-            "wet_bulb_temperature": get_value(pred_wet_bulb, 'wet_bulb_temperature'),
-            "precipitation": get_value(pred_precip, 'precipitation'),
-            "solar_radiation": get_value(pred_solar, 'solar_radiation'),
-            "relative_humidity": get_value(pred_humid, 'relative_humidity'),
-            "wind_speed": get_value(pred_wind, 'wind_speed'),
-            "surface_pressure": get_value(pred_pressure, 'surface_pressure'),
-            
-            # Get from soil_data_row
-            "surface_elevation": soil_data_row.get('surface_elevation', 0.0),
-            "avg_ndvi": soil_data_row.get('avg_ndvi', 0.0),
-            "soil_ph_level": soil_data_row.get('soil_ph_level', 0.0),
-            "soil_organic_carbon": soil_data_row.get('soil_organic_carbon', 0.0),
-            "soil_nitrogen_content": soil_data_row.get('soil_nitrogen_content', 0.0),
-            "soil_sand_ratio": soil_data_row.get('soil_sand_ratio', 0.0),
-            "soil_clay_ratio": soil_data_row.get('soil_clay_ratio', 0.0)
-        }
-        
+        input_data = build_input_data()
+
         # Call API
         try:
-            response = requests.post(f"{API_BASE_URL}/predict", json=input_data)
+            response = api_post("predict", json=input_data)
             
             if response.status_code == 200:
                 results = response.json()
@@ -177,11 +249,115 @@ if submitted:
                     f"{results['predicted_yield']:,.2f} Tạ/Ha"
                 )
                 
+                # Risk under climate uncertainty (Monte Carlo over the province's climate history)
+                sim_response = api_post("predict/simulate", json={
+                    "base": input_data, "draws": 10000, "method": "bootstrap", "seed": 0
+                })
+                if sim_response.status_code == 200:
+                    simulation = sim_response.json()
+                    st.subheader("Rủi ro do Biến động Khí hậu")
+                    st.caption(
+                        f"{simulation['draws']:,} kịch bản khí hậu lấy từ lịch sử của tỉnh "
+                        f"({len(simulation['simulated_features'])} yếu tố để trống được mô phỏng)."
+                    )
+                    risk_col1, risk_col2, risk_col3 = st.columns(3)
+                    production = simulation['predicted_production']
+                    risk_col1.metric("Sản lượng P10 (bi quan)", f"{production['p10']:,.0f} Nghìn Tấn")
+                    risk_col2.metric("Sản lượng P50 (trung vị)", f"{production['p50']:,.0f} Nghìn Tấn")
+                    risk_col3.metric("Sản lượng P90 (lạc quan)", f"{production['p90']:,.0f} Nghìn Tấn")
+
+                imputed_features = results.get('imputed_features', {})
+                if imputed_features:
+                    st.caption(f"Đã dùng chuẩn khí hậu của tỉnh cho {len(imputed_features)} yếu tố để trống.")
+
                 with st.expander("Xem chi tiết Dữ liệu đầu vào (đã xử lý)"):
-                    st.json(input_data)
+                    st.json({**input_data, **imputed_features})
 
             else:
                 st.error(f"Lỗi từ API: {response.status_code} - {response.text}")
                 
         except Exception as e:
-            st.error(f"Lỗi kết nối đến API: {e}")
\ No newline at end of file
+            st.error(f"Lỗi kết nối đến API: {e}")
+
+# --- 8. SENSITIVITY ANALYSIS (RESPONSE SURFACE) ---
+st.markdown("---")
+st.subheader("Phân tích Độ nhạy")
+st.caption("Dự đoán trên một lưới giá trị của 2 yếu tố khí hậu, trong khoảng lịch sử của tỉnh. Các yếu tố khác giữ như trên. Toàn bộ lưới được tính trong một lần gọi API.")
+
+sweep_feature_options = {
+    'avg_temperature': 'Nhiệt độ TB (°C)',
+    'min_temperature': 'Nhiệt độ Min (°C)',
+    'max_temperature': 'Nhiệt độ Max (°C)',
+    'surface_temperature': 'Nhiệt độ Bề mặt (°C)',
+    'wet_bulb_temperature': 'Nhiệt độ Bầu ướt (°C)',
+    'precipitation': 'Lượng mưa (mm)',
+    'solar_radiation': 'Bức xạ (kW-hr/m^2/day)',
+    'relative_humidity': 'Độ ẩm (%)',
+    'wind_speed': 'Sức gió (m/s)',
+    'surface_pressure': 'Áp suất (kPa)'
+}
+prediction_columns = {
+    'production_thousand_tonnes': 'predicted_production',
+    'area_thousand_ha': 'predicted_area',
+    'yield_ta_per_ha': 'predicted_yield'
+}
+
+s_col1, s_col2, s_col3 = st.columns(3)
+with s_col1:
+    sweep_x = st.selectbox(
+        "Trục X:", options=list(sweep_feature_options.keys()),
+        format_func=lambda x: sweep_feature_options[x], index=0, key="pred_sweep_x"
+    )
+with s_col2:
+    sweep_y_options = [name for name in sweep_feature_options if name != sweep_x]
+    sweep_y = st.selectbox(
+        "Trục Y:", options=sweep_y_options, format_func=lambda x: sweep_feature_options[x],
+        index=sweep_y_options.index('precipitation') if 'precipitation' in sweep_y_options else 0,
+        key="pred_sweep_y"
+    )
+with s_col3:
+    sweep_metric = st.selectbox(
+        "Chỉ số:", options=list(forecast_metric_options.keys()),
+        format_func=lambda x: forecast_metric_options[x], index=2, key="pred_sweep_metric"
+    )
+
+if st.button("Phân tích độ nhạy", key="pred_sweep_button"):
+    if soil_data.empty:
+        st.error(f"Không thể phân tích vì thiếu dữ liệu thổ nhưỡng cho {selected_province}.")
+        st.stop()
+
+    df_normals = load_data_from_api("analytics/climate-normals", {
+        "province_name": selected_province, "variable": [sweep_x, sweep_y]
+    })
+    if df_normals.empty:
+        st.warning(f"Không có chuẩn khí hậu cho tỉnh {selected_province}.")
+        st.stop()
+    normals = df_normals.set_index('variable')
+
+    sweep_body = {
+        "base": build_input_data(),
+        "axes": [
+            {"feature": name, "start": normals.loc[name, 'min'], "stop": normals.loc[name, 'max'], "steps": 25}
+            for name in (sweep_x, sweep_y)
+        ]
+    }
+    with st.spinner("Đang tính bề mặt phản hồi..."):
+        try:
+            response = api_post("predict/sweep", json=sweep_body)
+            if response.status_code == 200:
+                surface = response.json()
+                values = np.array(surface[prediction_columns[sweep_metric]]).reshape(surface['shape'])
+                fig_sweep = go.Figure(go.Heatmap(
+                    x=surface['axes'][0]['values'], y=surface['axes'][1]['values'],
+                    z=values.T, colorscale='Viridis',
+                    colorbar=dict(title=forecast_metric_options[sweep_metric])
+                ))
+                fig_sweep.update_layout(
+                    xaxis_title=sweep_feature_options[sweep_x], yaxis_title=sweep_feature_options[sweep_y],
+                    title=f"{forecast_metric_options[sweep_metric]} - {selected_province} ({selected_commodity}, {selected_season}, {selected_year})"
+                )
+                st.plotly_chart(fig_sweep, use_container_width=True)
+            else:
+                st.error(f"Lỗi từ API: {response.status_code} - {response.text}")
+        except Exception as e:
+            st.error(f"Lỗi kết nối đến API: {e}")
@@ -0,0 +1,104 @@
+"""
+File: frontend/utils/api_client.py
+Description:
+    This is the SHARED HTTP client used for every call from the Streamlit
+    application to the backend API (the loaders in utils/load_data.py and
+    the POST requests of the prediction page).
+
+    One requests.Session is created per process and reused by every page,
+    rerun and thread:
+    - Connection pooling / keep-alive: repeated calls reuse open TCP
+      connections instead of paying the connection setup every time.
+    - Timeouts: every request has a connect and a read timeout.
+    - Retries: connection errors and 502/503/504 responses are retried
+      a few times with exponential backoff.
+    - Compression: every encoding urllib3 can decode is advertised
+      (gzip, deflate, and br/zstd when 'brotli'/'backports.zstd' are installed).
+    - Latency logging: each request is logged with its status, duration and
+      size; requests slower than API_SLOW_REQUEST_MS are logged as warnings.
+
+    Configuration (environment variables):
+    - API_BASE_URL: Base URL of the API (default 'http://localhost:8000/api/v1').
+    - API_CONNECT_TIMEOUT / API_READ_TIMEOUT: Timeouts in seconds (default 3.05 / 60).
+    - API_RETRIES: Retries per request (default 3).
+    - API_POOL_SIZE: Maximum pooled connections to the API (default 32).
+    - API_SLOW_REQUEST_MS: Warning threshold in milliseconds (default 1000).
+    - API_LOG_LEVEL: Level of the latency log (default 'INFO'; 'WARNING' keeps only slow/failed requests).
+"""
+
+import logging
+import os
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util import Retry, make_headers
+
+# --- 1. CONFIGURATION ---
+# Read API URL from environment variable, use localhost if not available
+API_BASE_URL = os.environ.get("API_BASE_URL", "http://localhost:8000/api/v1")
+
+API_CONNECT_TIMEOUT = float(os.environ.get("API_CONNECT_TIMEOUT", "3.05"))
+API_READ_TIMEOUT = float(os.environ.get("API_READ_TIMEOUT", "60"))
+API_RETRIES = int(os.environ.get("API_RETRIES", "3"))
+API_POOL_SIZE = int(os.environ.get("API_POOL_SIZE", "32"))
+API_SLOW_REQUEST_MS = float(os.environ.get("API_SLOW_REQUEST_MS", "1000"))
+
+# Advertise every encoding urllib3 can decode. Responses are decompressed transparently.
+ACCEPT_ENCODING = make_headers(accept_encoding=True)["accept-encoding"]
+
+logger = logging.getLogger(__name__)
+if not logger.handlers:
+    _handler = logging.StreamHandler()
+    _handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s [api] %(message)s"))
+    logger.addHandler(_handler)
+    logger.setLevel(os.environ.get("API_LOG_LEVEL", "INFO").upper())
+    logger.propagate = False
+
+# --- 2. SHARED SESSION ---
+def create_session() -> requests.Session:
+    """Build the pooled session (keep-alive, retries, compression)."""
+    retry = Retry(
+        total=API_RETRIES,
+        backoff_factor=0.3,
+        status_forcelist=(502, 503, 504),
+        # The POST endpoints (/predict...) only compute, so retrying them is safe
+        allowed_methods=frozenset({"GET", "POST"}),
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=API_POOL_SIZE, max_retries=retry)
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers["Accept-Encoding"] = ACCEPT_ENCODING
+    return session
+
+# Created once per process (modules are imported once, not on every Streamlit rerun)
+session = create_session()
+
+# --- 3. REQUEST FUNCTIONS ---
+def request(method: str, endpoint: str, timeout=None, **kwargs) -> requests.Response:
+    """
+    Send one request to '<API_BASE_URL>/<endpoint>' with the shared session and log its latency.
+    'timeout' defaults to (API_CONNECT_TIMEOUT, API_READ_TIMEOUT).
+    """
+    url = f"{API_BASE_URL}/{endpoint.lstrip('/')}"
+    started = time.perf_counter()
+    try:
+        response = session.request(method, url, timeout=timeout or (API_CONNECT_TIMEOUT, API_READ_TIMEOUT), **kwargs)
+    except requests.RequestException as e:
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        logger.warning("%s %s failed after %.0f ms: %s", method, endpoint, elapsed_ms, e)
+        raise
+
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    level = logging.WARNING if elapsed_ms >= API_SLOW_REQUEST_MS else logging.INFO
+    logger.log(level, "%s %s -> %s in %.0f ms (%s bytes)", method, response.url.removeprefix(API_BASE_URL),
+               response.status_code, elapsed_ms, response.headers.get("Content-Length", "?"))
+    return response
+
+def api_get(endpoint: str, params: dict = None, **kwargs) -> requests.Response:
+    return request("GET", endpoint, params=params, **kwargs)
+
+def api_post(endpoint: str, json: dict = None, **kwargs) -> requests.Response:
+    return request("POST", endpoint, json=json, **kwargs)
@@ -0,0 +1,94 @@
+"""
+File: frontend/utils/data_index.py
+Description:
+    This is the INDEXED data-access layer over the master DataFrames
+    (see utils/load_data.py). Pages call its query helpers instead of
+    scanning the full tables with boolean masks on every rerun.
+
+    Each table is sorted ONCE per dataset version by its keys and 'year':
+    - agriculture: (region_level, region_name, commodity, season, year)
+    - climate: (province_name, year)
+    Every series (one combination of keys) is then a contiguous block of rows,
+    found through a nested dict {key1 -> {key2 -> ... (start, stop)}}, and
+    its year range is located with a binary search (np.searchsorted).
+    A query therefore costs O(matching series * log n + result rows),
+    independent of the table size.
+
+    The indexes are built with st.cache_resource (shared by all sessions,
+    never copied): the returned slices are new DataFrames and may be modified.
+"""
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from utils.load_data import _load_master_data, get_dataset_version
+
+AGRICULTURE_INDEX_KEYS = ["region_level", "region_name", "commodity", "season"]
+CLIMATE_INDEX_KEYS = ["province_name"]
+
+# --- 1. PARTITION INDEX ---
+class PartitionIndex:
+    """A DataFrame sorted by (keys..., year), partitioned into one row range per series."""
+
+    def __init__(self, df: pd.DataFrame, keys: list):
+        self.keys = keys
+        self.frame = df.sort_values(keys + ["year"], kind="stable").reset_index(drop=True)
+        self.years = self.frame["year"].to_numpy()
+
+        # Nested dict over the keys; the leaves are (start, stop) row ranges
+        self.tree = {}
+        groups = self.frame.groupby(keys, observed=True, sort=False).indices
+        for key, positions in groups.items():
+            key = key if isinstance(key, tuple) else (key,)
+            node = self.tree
+            for value in key[:-1]:
+                node = node.setdefault(value, {})
+            node[key[-1]] = (int(positions[0]), int(positions[-1]) + 1)
+
+    def query(self, year=None, year_from=None, year_to=None, **filters) -> pd.DataFrame:
+        """
+        Return the rows matching every filter.
+
+        Args:
+            year / year_from / year_to: Exact year or inclusive year range (bounds may be omitted).
+            **filters: One argument per key: None (any value), a value, or a list of values.
+        """
+        unknown = set(filters) - set(self.keys)
+        if unknown:
+            raise ValueError(f"Unknown index keys: {sorted(unknown)}")
+
+        nodes = [self.tree]
+        for key in self.keys:
+            value = filters.get(key)
+            if value is None:
+                nodes = [child for node in nodes for child in node.values()]
+            else:
+                values = value if isinstance(value, (list, tuple, set)) else [value]
+                nodes = [node[item] for node in nodes for item in values if item in node]
+
+        if year is not None:
+            year_from, year_to = year, year
+        ranges = []
+        for start, stop in nodes:
+            years = self.years[start:stop]
+            low = start if year_from is None else start + int(np.searchsorted(years, year_from, side="left"))
+            high = stop if year_to is None else start + int(np.searchsorted(years, year_to, side="right"))
+            if low < high:
+                ranges.append(np.arange(low, high))
+
+        positions = np.concatenate(ranges) if ranges else np.empty(0, dtype=np.int64)
+        return self.frame.iloc[positions]
+
+# --- 2. INDEXES PER DATASET VERSION ---
+@st.cache_resource(max_entries=2, show_spinner=False)
+def _load_master_indexes(dataset_version: str) -> tuple:
+    df_agri, df_provinces, df_regions, df_climate, df_soil = _load_master_data(dataset_version)
+    return PartitionIndex(df_agri, AGRICULTURE_INDEX_KEYS), PartitionIndex(df_climate, CLIMATE_INDEX_KEYS)
+
+def load_master_indexes() -> tuple:
+    """
+    Return (agriculture_index, climate_index) for the current dataset version,
+    built once per version from the master data (see load_master_data).
+    """
+    return _load_master_indexes(get_dataset_version())
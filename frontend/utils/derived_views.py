@@ -0,0 +1,160 @@
+"""
+File: frontend/utils/derived_views.py
+Description:
+    This utility file memoizes the DERIVED views of the analysis pages
+    (filter -> impute -> group results such as the snapshot, trend and
+    correlation frames), so a rerun that does not change a relevant
+    selection only costs the chart render.
+
+    - @derived_view(max_entries): Caches a page function by its arguments
+      plus the dataset version (see load_data.get_dataset_version), so the
+      views are recomputed after every reseed. Like st.cache_data, arguments
+      whose name starts with '_' (indexes, DataFrames) are not part of the key.
+    - Each view has its own bounded LRU cache (max_entries), shared by all
+      sessions of the process. Cached frames are shared: treat them as read-only.
+    - Hit/miss counters per view: view_stats(); every miss is logged with its
+      duration and the running counters. render_view_stats() shows the counters
+      of a page's views in a collapsed sidebar expander.
+    - impute_agriculture_metrics(): The shared "Handle Null Values" step.
+
+    Configuration (environment variables):
+    - DERIVED_VIEW_MAX_ENTRIES: Default number of cached selections per view (default 32).
+"""
+
+import functools
+import inspect
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import pandas as pd
+import streamlit as st
+
+from utils.api_client import logger
+from utils.load_data import get_dataset_version
+
+DERIVED_VIEW_MAX_ENTRIES = int(os.environ.get("DERIVED_VIEW_MAX_ENTRIES", "32"))
+
+# --- 1. SHARED PIPELINE STEP ---
+def impute_agriculture_metrics(df: pd.DataFrame, yield_only: bool = False) -> pd.DataFrame:
+    """
+    Some records are missing one of three metrics: production, area, yield.
+    Apply formula to calculate missing metric when possible.
+    yield (quintals/ha) = production (1000 tonnes) / area (1000 ha) * 10
+    With 'yield_only', only the missing yield is filled.
+    """
+    df = df.copy()
+    df['production_thousand_tonnes'] = pd.to_numeric(df['production_thousand_tonnes'], errors='coerce')
+    df['area_thousand_ha'] = pd.to_numeric(df['area_thousand_ha'], errors='coerce')
+    df['yield_ta_per_ha'] = pd.to_numeric(df['yield_ta_per_ha'], errors='coerce')
+    mask_yield = df['yield_ta_per_ha'].isnull() & df['production_thousand_tonnes'].notnull() & df['area_thousand_ha'].notnull() & (df['area_thousand_ha'] > 0)
+    df.loc[mask_yield, 'yield_ta_per_ha'] = (df['production_thousand_tonnes'] / df['area_thousand_ha']) * 10
+    if yield_only:
+        return df
+    mask_prod = df['production_thousand_tonnes'].isnull() & df['yield_ta_per_ha'].notnull() & df['area_thousand_ha'].notnull()
+    df.loc[mask_prod, 'production_thousand_tonnes'] = (df['yield_ta_per_ha'] * df['area_thousand_ha']) / 10
+    mask_area = df['area_thousand_ha'].isnull() & df['yield_ta_per_ha'].notnull() & df['production_thousand_tonnes'].notnull() & (df['yield_ta_per_ha'] > 0)
+    df.loc[mask_area, 'area_thousand_ha'] = (df['production_thousand_tonnes'] / df['yield_ta_per_ha']) * 10
+    return df
+
+# --- 2. BOUNDED VIEW CACHE ---
+class ViewCache:
+    """Bounded LRU cache of one derived view, with hit/miss counters."""
+
+    def __init__(self, name: str, max_entries: int):
+        self.name = name
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, key, compute):
+        """Return the cached value of 'key', or compute(), store and return it."""
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return self.entries[key]
+            self.misses += 1
+
+        # Computed outside the lock; an exception is not cached
+        started = time.perf_counter()
+        value = compute()
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        logger.info("View '%s' computed in %.1f ms (hits %d, misses %d)",
+                    self.name, (time.perf_counter() - started) * 1000, self.hits, self.misses)
+        return value
+
+    def stats(self) -> dict:
+        with self.lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 3) if total else None,
+                "entries": len(self.entries),
+                "max_entries": self.max_entries,
+            }
+
+# One cache per view (module + qualified name), kept across reruns (the module is imported once per process)
+_views = {}
+_views_lock = threading.Lock()
+
+def _freeze(value):
+    """Make a widget value hashable (lists -> tuples, dicts -> sorted item tuples)."""
+    if isinstance(value, dict):
+        return tuple(sorted((key, _freeze(item)) for key, item in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    if isinstance(value, set):
+        return tuple(sorted(value))
+    return value
+
+def derived_view(max_entries: int = DERIVED_VIEW_MAX_ENTRIES):
+    """
+    Decorator memoizing a page's derived view by (dataset version, arguments).
+    Arguments whose name starts with '_' are not part of the key.
+    A view is identified by its module and qualified name (page scripts run as
+    '__main__', so their file name is used instead of the module name).
+    """
+    def decorator(fn):
+        signature = inspect.signature(fn)
+        module = fn.__module__
+        if module == "__main__":
+            module = os.path.splitext(os.path.basename(fn.__code__.co_filename))[0]
+        name = f"{module}.{fn.__qualname__}"
+        with _views_lock:
+            cache = _views.get(name)
+            if cache is None:
+                cache = _views[name] = ViewCache(name, max_entries)
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            key = (get_dataset_version(),) + tuple(
+                (name, _freeze(value)) for name, value in bound.arguments.items() if not name.startswith("_")
+            )
+            return cache.get(key, lambda: fn(*args, **kwargs))
+
+        wrapper.cache = cache
+        return wrapper
+    return decorator
+
+def view_stats() -> dict:
+    """Hit/miss counters of every derived view: {view name -> stats}."""
+    with _views_lock:
+        return {name: cache.stats() for name, cache in _views.items()}
+
+# --- 3. DEBUG PANEL ---
+def render_view_stats(*views):
+    """Show the hit/miss counters of the given views (decorated functions) in the sidebar."""
+    stats = pd.DataFrame([{"view": view.cache.name.rsplit(".", 1)[-1], **view.cache.stats()} for view in views])
+    with st.sidebar.expander("⚙️ Bộ nhớ đệm (debug)", expanded=False):
+        st.dataframe(stats, hide_index=True, use_container_width=True)
@@ -6,73 +6,253 @@ Description:
     
     Subpages (in the /pages directory) will 'import' functions from this file
     instead of defining API call logic themselves.
+
+    Caching: every cached loader is keyed on the dataset revision returned by
+    the cheap /version endpoint (checked at most once every VERSION_CHECK_TTL
+    seconds). Data is only refetched when the backend was reseeded, never on
+    a timer. If /version is unavailable, caches expire every 10 minutes instead.
+
+    Every request goes through the shared pooled client (utils/api_client.py).
 """
 
 import streamlit as st
 import pandas as pd
-import requests
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from utils.api_client import api_get, logger
+
+# --- 1. CONFIGURATION ---
+# The API base URL, timeouts and compression are configured in utils/api_client.py
+
+# How often (seconds) the dataset revision is re-checked with /version
+VERSION_CHECK_TTL = float(os.environ.get("VERSION_CHECK_TTL", "5"))
+# Cache lifetime (seconds) used only when /version is unavailable
+FALLBACK_CACHE_TTL = 600
+
+# Rows per page and maximum number of pages fetched concurrently by load_all_data_from_api
+PAGE_SIZE = int(os.environ.get("PAGE_SIZE", "1000"))
+PAGE_FETCH_WORKERS = int(os.environ.get("PAGE_FETCH_WORKERS", "8"))
 
-# --- 1. DEFINE API BASE URL ---
-# Read API URL from environment variable, use localhost if not available
-API_BASE_URL = os.environ.get("API_BASE_URL", "http://localhost:8000/api/v1")
+# --- 2. DATASET VERSION (CACHE KEY) ---
+@st.cache_data(ttl=VERSION_CHECK_TTL, show_spinner=False)
+def get_dataset_version() -> str:
+    """
+    Return the current dataset revision with ONE small request to /version.
+    Falls back to a key that changes every FALLBACK_CACHE_TTL seconds.
+    """
+    try:
+        response = api_get("version", timeout=5)
+        if response.status_code == 200:
+            return response.json()["revision"]
+    except Exception:
+        pass
+    return f"fallback-{int(time.time() // FALLBACK_CACHE_TTL)}"
+
+# --- 3. API CALL FUNCTIONS (CHILD FUNCTIONS) ---
+# The cached functions raise on failure (Streamlit does not cache exceptions),
+# so a failed call is retried on the next run instead of being cached until the next reseed.
+class APIError(Exception):
+    """Raised when an API call fails (bad status code)."""
 
-# --- 2. API CALL FUNCTION (CHILD FUNCTION) ---
-@st.cache_data(ttl=600)
 def load_all_data_from_api(endpoint: str, params: dict = {}):
     """
     Generic API call function that automatically handles pagination to retrieve ALL data.
+    The first page returns the total row count (X-Total-Count header); the remaining
+    pages are then requested concurrently. Cached per dataset revision.
     """
-    all_data = []
-    page_size = 1000  
-    skip = 0
-    current_params = params.copy()
-    current_params.pop('limit', None)
-    current_params.pop('skip', None)
-    current_params['limit'] = page_size
-    current_params['skip'] = skip
-
-    while True:
-        try:
-            full_url = f"{API_BASE_URL}/{endpoint}"
-            response = requests.get(full_url, params=current_params)
-            
-            if response.status_code == 200:
-                data = response.json()
-                if not data:
-                    break 
+    try:
+        return _load_all_data_from_api(endpoint, params, get_dataset_version())
+    except APIError as e:
+        st.error(f"Error calling API {endpoint}: {e}")
+    except Exception as e:
+        st.error(f"API connection error: {e}")
+    return pd.DataFrame()
+
+def _fetch_page(endpoint: str, params: dict, skip: int):
+    """Request one page (PAGE_SIZE rows from 'skip'). Returns (rows, total or None)."""
+    page_params = {**params, "skip": skip, "limit": PAGE_SIZE}
+    response = api_get(endpoint, params=page_params)
+    if response.status_code != 200:
+        raise APIError(response.status_code)
+    total = response.headers.get("X-Total-Count")
+    return response.json(), (int(total) if total is not None else None)
+
+@st.cache_data(max_entries=256, show_spinner=False)
+def _load_all_data_from_api(endpoint: str, params: dict, dataset_version: str):
+    params = {key: value for key, value in params.items() if key not in ("skip", "limit")}
+    all_data, total = _fetch_page(endpoint, params, 0)
+
+    if total is None:
+        # No X-Total-Count header: fetch pages one by one until a short page
+        data = all_data
+        while len(data) == PAGE_SIZE:
+            data, _ = _fetch_page(endpoint, params, len(all_data))
+            all_data.extend(data)
+        return pd.DataFrame(all_data)
+
+    # Remaining pages in parallel (bounded pool); map() keeps them in order
+    skips = range(PAGE_SIZE, total, PAGE_SIZE)
+    if skips:
+        with ThreadPoolExecutor(max_workers=min(PAGE_FETCH_WORKERS, len(skips))) as pool:
+            for data, _ in pool.map(lambda skip: _fetch_page(endpoint, params, skip), skips):
                 all_data.extend(data)
-                skip += page_size
-                current_params['skip'] = skip
-            else:
-                st.error(f"Error calling API {endpoint}: {response.status_code}")
-                return pd.DataFrame() 
-        except Exception as e:
-            st.error(f"API connection error: {e}")
-            return pd.DataFrame()
-    
     return pd.DataFrame(all_data)
 
-# --- 3. MASTER DATA LOADING FUNCTION (PARENT FUNCTION) ---
-@st.cache_data(ttl=600)
+def load_data_from_api(endpoint: str, params: dict = {}):
+    """
+    API call function for endpoints that return a small, unpaginated result
+    (ONE request, no pagination loop). Cached per dataset revision.
+    """
+    try:
+        return _load_data_from_api(endpoint, params, get_dataset_version())
+    except APIError as e:
+        st.error(f"Error calling API {endpoint}: {e}")
+    except Exception as e:
+        st.error(f"API connection error: {e}")
+    return pd.DataFrame()
+
+@st.cache_data(max_entries=256, show_spinner=False)
+def _load_data_from_api(endpoint: str, params: dict, dataset_version: str):
+    response = api_get(endpoint, params=params)
+    if response.status_code != 200:
+        raise APIError(response.status_code)
+    return pd.DataFrame(response.json())
+
+# --- 4. BUNDLE API CALL FUNCTION (SINGLE REQUEST) ---
+def load_bundle_from_api():
+    """
+    Load agriculture, provinces, climate and soil data with ONE request to /bundle.
+    The bundle encodes each table as column arrays: {column -> [values]}.
+
+    Returns:
+        dict | None: {table_name -> DataFrame}, or None if the bundle is unavailable
+        (the failure is logged as a warning before the per-dataset fallback).
+    """
+    started = time.perf_counter()
+    try:
+        response = api_get("bundle")
+        if response.status_code != 200:
+            logger.warning("Bundle unavailable (HTTP %s) after %.0f ms, loading the datasets one by one",
+                           response.status_code, (time.perf_counter() - started) * 1000)
+            return None
+        payload = response.json()
+        tables = {name: pd.DataFrame(columns) for name, columns in payload["tables"].items()}
+    except Exception as e:
+        logger.warning("Bundle failed after %.0f ms, loading the datasets one by one: %s",
+                       (time.perf_counter() - started) * 1000, e)
+        return None
+    logger.info("Bundle: %s in %.0f ms", ", ".join(f"{name} {len(df)} rows" for name, df in tables.items()),
+                (time.perf_counter() - started) * 1000)
+    return tables
+
+# --- 5. MASTER DATA LOADING FUNCTION (PARENT FUNCTION) ---
+# Endpoint of each master dataset (used when the bundle is unavailable)
+MASTER_DATASETS = {
+    "agriculture": "statistics/agriculture-data",
+    "provinces": "statistics/provinces",
+    "climate": "statistics/climate-data",
+    "soil": "statistics/soil-data",
+}
+
+# Compact schema of the master DataFrames (see compact_dtypes)
+AGRICULTURE_DIMENSIONS = ["region_level", "region_name", "commodity", "season"]
+AGRICULTURE_METRICS = ["production_thousand_tonnes", "area_thousand_ha", "yield_ta_per_ha"]
+CLIMATE_METRICS = [
+    "avg_temperature", "min_temperature", "max_temperature", "surface_temperature", "wet_bulb_temperature",
+    "precipitation", "solar_radiation", "relative_humidity", "wind_speed", "surface_pressure",
+]
+
+def compact_dtypes(df: pd.DataFrame, categorical: list, float32: list) -> pd.DataFrame:
+    """
+    Convert a master DataFrame to a compact schema:
+    - 'categorical' columns -> category (sorted categories): equality, isin and
+      groupby then compare small integer codes instead of strings.
+    - 'year' -> int16, 'id' -> int32.
+    - 'float32' columns -> float32 (the metrics have far fewer than 7 significant digits).
+    """
+    dtypes = {column: "category" for column in categorical if column in df.columns}
+    dtypes.update({column: "float32" for column in float32 if column in df.columns})
+    if "year" in df.columns:
+        dtypes["year"] = "int16"
+    if "id" in df.columns:
+        dtypes["id"] = "int32"
+    return df.astype(dtypes)
+
+class MasterDataError(Exception):
+    """Raised when one or more master datasets could not be loaded: {dataset -> error message}."""
+    def __init__(self, errors: dict):
+        super().__init__(", ".join(errors))
+        self.errors = errors
+
+def load_master_datasets(dataset_version: str) -> dict:
+    """
+    Load the four master datasets CONCURRENTLY (one thread each, every dataset
+    paginated by _load_all_data_from_api), so a cold start takes about as long as
+    the slowest dataset. Each dataset is timed and its failure reported separately;
+    datasets that succeeded stay cached, so a retry only refetches the failed ones.
+
+    Returns:
+        dict: {dataset -> DataFrame}. Raises MasterDataError if any dataset failed.
+    """
+    def load(name: str):
+        started = time.perf_counter()
+        try:
+            df = _load_all_data_from_api(MASTER_DATASETS[name], {}, dataset_version)
+        except Exception as e:
+            logger.warning("Master dataset '%s' failed after %.0f ms: %s", name, (time.perf_counter() - started) * 1000, e)
+            raise
+        logger.info("Master dataset '%s': %d rows in %.0f ms", name, len(df), (time.perf_counter() - started) * 1000)
+        return df
+
+    tables, errors = {}, {}
+    with ThreadPoolExecutor(max_workers=len(MASTER_DATASETS)) as pool:
+        futures = {name: pool.submit(load, name) for name in MASTER_DATASETS}
+        for name, future in futures.items():
+            try:
+                tables[name] = future.result()
+            except Exception as e:
+                errors[name] = str(e)
+    if errors:
+        raise MasterDataError(errors)
+    return tables
+
 def load_master_data():
     """
-    Load all primary data sources from the API once.
+    Load all primary data sources from the API once per dataset revision.
     This function will be called by subpages.
+    Uses the single-request /bundle endpoint, falling back to
+    concurrent paginated calls per dataset if the bundle is unavailable.
     """
+    try:
+        return _load_master_data(get_dataset_version())
+    except MasterDataError as e:
+        for name, error in e.errors.items():
+            st.error(f"Could not load the '{name}' dataset from the API: {error}")
+        st.stop()
+    except Exception as e:
+        st.error(f"Could not load master data from the API: {e}")
+        st.stop()
+
+@st.cache_data(max_entries=2, show_spinner=False)
+def _load_master_data(dataset_version: str):
     with st.spinner("Loading master data..."):
-        df_agri = load_all_data_from_api("statistics/agriculture-data")
-        df_provinces = load_all_data_from_api("statistics/provinces")
-        df_climate = load_all_data_from_api("statistics/climate-data")
-        df_soil = load_all_data_from_api("statistics/soil-data")
+        started = time.perf_counter()
+        tables = load_bundle_from_api()
+        if tables is None:
+            tables = load_master_datasets(dataset_version)
+        logger.info("Master data loaded in %.0f ms", (time.perf_counter() - started) * 1000)
+        df_agri = tables["agriculture"]
+        df_provinces = tables["provinces"]
+        df_climate = tables["climate"]
+        df_soil = tables["soil"]
         
+        # Process data types (critical for filtering): compact categorical/int16/float32 schema.
+        # Soil and provinces are left as is (64 rows; soil values are sent to /predict as JSON).
+        df_agri = compact_dtypes(df_agri, AGRICULTURE_DIMENSIONS, AGRICULTURE_METRICS)
+        df_climate = compact_dtypes(df_climate, ["province_name"], CLIMATE_METRICS)
+
         # Get df_regions from df_agri
         df_regions = df_agri[df_agri['region_level'] == 'region']
 
-        # Process data types (critical for filtering)
-        if 'year' in df_agri.columns:
-            df_agri['year'] = pd.to_numeric(df_agri['year'], errors='coerce')
-        if 'year' in df_climate.columns:
-            df_climate['year'] = pd.to_numeric(df_climate['year'], errors='coerce')
-                
         return df_agri, df_provinces, df_regions, df_climate, df_soil
\ No newline at end of file